@@ -0,0 +1,301 @@
+"""
+Latency / throughput benchmark for the MCP tool layer.
+
+Calls the backend tool functions directly through a fake MCP Context (no
+transport), against a generated SQLite file and, optionally, a local
+PostgreSQL database, across table sizes and concurrency levels.
+
+    python -m benchmarks.bench_tools --sizes 10000,100000 --concurrency 1,8,32
+    python -m benchmarks.bench_tools --postgres-dsn postgresql://localhost/bench
+
+Results are printed (or written with --output) as JSON: one record per
+backend / tool / table size / concurrency level with p50/p95/p99 latency,
+calls/sec, rows/sec, error count and the process's peak RSS so far.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+BENCH_TABLE = "benchitems"
+
+Scenario = Tuple[str, Callable[[Any], Awaitable[Dict[str, Any]]]]
+
+
+class FakeContext:
+    """Just enough of mcp's Context for the tools: request_context.lifespan_context."""
+
+    def __init__(self, lifespan_context: Any):
+        self.request_context = SimpleNamespace(lifespan_context=lifespan_context)
+
+
+def _peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _rows_in(result: Dict[str, Any]) -> int:
+    if "row_count" in result:
+        return result["row_count"]
+    data = result.get("data")
+    return len(data) if isinstance(data, list) else 0
+
+
+async def run_scenario(
+    ctx: FakeContext, call: Callable[[Any], Awaitable[Dict[str, Any]]], concurrency: int, requests: int
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    rows = 0
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal rows, errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                result = await call(ctx)
+            except Exception:
+                result = {"error": "raised"}
+            latencies.append(time.perf_counter() - start)
+            if "error" in result:
+                errors += 1
+            else:
+                rows += _rows_in(result)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "calls_per_s": round(requests / elapsed, 2) if elapsed else None,
+        "rows_per_s": round(rows / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3),
+            "p50": round(_percentile(latencies, 50) * 1000, 3),
+            "p95": round(_percentile(latencies, 95) * 1000, 3),
+            "p99": round(_percentile(latencies, 99) * 1000, 3),
+        },
+        "peak_rss_kb": _peak_rss_kb(),
+    }
+
+
+# --- SQLite ---
+
+
+def create_sqlite_database(path: str, rows: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute(
+        f"CREATE TABLE {BENCH_TABLE} (id INTEGER PRIMARY KEY, name TEXT NOT NULL,"
+        " category TEXT, price REAL, created_at TEXT)"
+    )
+    conn.executemany(
+        f"INSERT INTO {BENCH_TABLE} (name, category, price, created_at) VALUES (?, ?, ?, ?)",
+        (
+            (f"item {i}", f"cat{i % 20}", (i % 1000) / 3, f"2024-01-01T00:{i % 60:02d}:00")
+            for i in range(rows)
+        ),
+    )
+    conn.execute(f"CREATE INDEX {BENCH_TABLE}_category ON {BENCH_TABLE} (category)")
+    conn.commit()
+    conn.close()
+
+
+def sqlite_scenarios(rows: int) -> List[Scenario]:
+    from src.db_backends.sqlite import query_tools, schema_tools
+
+    return [
+        ("get_database_schema", lambda ctx: schema_tools.get_database_schema(ctx)),
+        (
+            "execute_query:point",
+            lambda ctx: query_tools.execute_query(
+                ctx, f"SELECT * FROM {BENCH_TABLE} WHERE id = ?", [rows // 2]
+            ),
+        ),
+        (
+            "execute_query:index_100",
+            lambda ctx: query_tools.execute_query(
+                ctx, f"SELECT * FROM {BENCH_TABLE} WHERE category = ? LIMIT 100", ["cat7"]
+            ),
+        ),
+        (
+            "execute_query:aggregate",
+            lambda ctx: query_tools.execute_query(
+                ctx, f"SELECT category, count(*), avg(price) FROM {BENCH_TABLE} GROUP BY category"
+            ),
+        ),
+    ]
+
+
+async def bench_sqlite(sizes: List[int], concurrency: List[int], requests: int, workdir: str) -> List[Dict[str, Any]]:
+    from src.db_backends.sqlite.lifespan import app_lifespan
+
+    results = []
+    for size in sizes:
+        path = os.path.join(workdir, f"bench_{size}.db")
+        if not os.path.exists(path):
+            create_sqlite_database(path, size)
+        os.environ["SQLITE_DATABASE_PATH"] = path
+        async with app_lifespan(None) as app:
+            ctx = FakeContext(app)
+            for tool, call in sqlite_scenarios(size):
+                for level in concurrency:
+                    record = await run_scenario(ctx, call, level, requests)
+                    results.append(
+                        {"backend": "sqlite", "tool": tool, "table_rows": size, "concurrency": level, **record}
+                    )
+    return results
+
+
+# --- PostgreSQL ---
+
+
+async def create_postgres_table(dsn: str, table: str, rows: int) -> None:
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn=dsn)
+    try:
+        exists = await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", table)
+        if exists:
+            return
+        await conn.execute(
+            f"CREATE TABLE {table} (id serial PRIMARY KEY, name text NOT NULL,"
+            " category text, price numeric(10, 2), created_at timestamptz)"
+        )
+        await conn.execute(
+            f"INSERT INTO {table} (name, category, price, created_at)"
+            " SELECT 'item ' || g, 'cat' || (g % 20), (g % 1000) / 3.0,"
+            " now() - (g || ' minutes')::interval FROM generate_series(1, $1) g",
+            rows,
+        )
+        await conn.execute(f"CREATE INDEX ON {table} (category)")
+        await conn.execute(f"ANALYZE {table}")
+    finally:
+        await conn.close()
+
+
+def postgres_scenarios(table: str, rows: int) -> List[Scenario]:
+    from src.db_backends.postgres import query_tools, schema_tools
+
+    return [
+        ("list_available_databases", lambda ctx: schema_tools.list_available_databases(ctx)),
+        ("list_database_objects", lambda ctx: schema_tools.list_database_objects(ctx)),
+        ("get_object_columns", lambda ctx: schema_tools.get_object_columns(ctx, table)),
+        (
+            "search_data:filter_100",
+            lambda ctx: query_tools.search_data(
+                ctx, table, filters=[{"field": "category", "op": "=", "value": "cat7"}], limit=100
+            ),
+        ),
+        (
+            "search_data:ilike",
+            lambda ctx: query_tools.search_data(
+                ctx, table, search_term="item 12", search_fields=["name"], limit=10
+            ),
+        ),
+        (
+            "execute_raw_sql:point",
+            lambda ctx: query_tools.execute_raw_sql(
+                ctx, f"SELECT * FROM {table} WHERE id = $1", [rows // 2]
+            ),
+        ),
+        (
+            "execute_raw_sql:aggregate",
+            lambda ctx: query_tools.execute_raw_sql(
+                ctx, f"SELECT category, count(*), avg(price) FROM {table} GROUP BY category"
+            ),
+        ),
+    ]
+
+
+async def bench_postgres(dsn: str, sizes: List[int], concurrency: List[int], requests: int) -> List[Dict[str, Any]]:
+    from src.db_backends.postgres.lifespan import app_lifespan
+
+    os.environ["POSTGRES_DATABASE_URL"] = dsn
+    results = []
+    async with app_lifespan(None) as app:
+        ctx = FakeContext(app)
+        for size in sizes:
+            table = f"{BENCH_TABLE}{size}"
+            await create_postgres_table(dsn, table, size)
+            for tool, call in postgres_scenarios(table, size):
+                for level in concurrency:
+                    record = await run_scenario(ctx, call, level, requests)
+                    results.append(
+                        {"backend": "postgres", "tool": tool, "table_rows": size, "concurrency": level, **record}
+                    )
+    return results
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+async def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=_int_list, default=[10_000, 100_000], help="table sizes (rows)")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8, 32], help="concurrent callers")
+    parser.add_argument("--requests", type=int, default=200, help="calls per tool / size / concurrency")
+    parser.add_argument("--postgres-dsn", help="also benchmark the PostgreSQL tools against this DSN")
+    parser.add_argument("--skip-sqlite", action="store_true")
+    parser.add_argument("--workdir", help="where generated SQLite files are kept (default: a temp dir)")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--verbose", action="store_true", help="keep the tools' own log output")
+    args = parser.parse_args(argv)
+
+    results: List[Dict[str, Any]] = []
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory())
+        if not args.verbose:
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        if not args.skip_sqlite:
+            os.makedirs(workdir, exist_ok=True)
+            results += await bench_sqlite(args.sizes, args.concurrency, args.requests, workdir)
+        if args.postgres_dsn:
+            results += await bench_postgres(args.postgres_dsn, args.sizes, args.concurrency, args.requests)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+        },
+        "results": results,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,284 @@
+"""
+Admission control in front of the database pools. Every database tool call
+takes one of ``max_concurrent`` slots before it runs. Calls that cannot
+start yet wait in a weighted fair queue:
+
+* Each client (MCP session) has two flows: light tools (schema discovery,
+  cache stats) and everything else. Queued calls carry start-time fair
+  queuing tags, and the call with the smallest finish tag goes next. A
+  query counts ``query_weight`` times as much as a light call, so cheap
+  schema calls overtake queued SQL. A client that queues many calls only
+  pushes its own later calls back.
+* A client runs at most ``max_per_client`` calls at once, so one agent
+  cannot hold every pooled connection.
+* When the queue is full, or the client's share of it is, the call is
+  refused at once with a "busy, retry after" error instead of waiting.
+  So is a call that has waited queue_timeout_ms.
+
+A limit of 0 disables it.
+"""
+
+import asyncio
+import functools
+import itertools
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from .metrics import ACQUIRE_WAIT_BUCKETS, Histogram
+
+# EWMA smoothing for the mean slot hold time behind retry_after_s.
+_HOLD_SMOOTHING = 0.1
+
+
+@dataclass(frozen=True)
+class AdmissionSettings:
+    enabled: bool = True
+    max_concurrent: int = 10  # about the pool size (POSTGRES_POOL_MAX_SIZE)
+    max_per_client: int = 4
+    max_queue: int = 100
+    max_queue_per_client: int = 20
+    queue_timeout_ms: int = 10000
+    query_weight: int = 4
+
+    @classmethod
+    def from_env(cls) -> "AdmissionSettings":
+        return cls(
+            enabled=os.environ.get("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes"),
+            max_concurrent=int(os.environ.get("ADMISSION_MAX_CONCURRENT", cls.max_concurrent)),
+            max_per_client=int(os.environ.get("ADMISSION_MAX_PER_CLIENT", cls.max_per_client)),
+            max_queue=int(os.environ.get("ADMISSION_MAX_QUEUE", cls.max_queue)),
+            max_queue_per_client=int(
+                os.environ.get("ADMISSION_MAX_QUEUE_PER_CLIENT", cls.max_queue_per_client)
+            ),
+            queue_timeout_ms=int(os.environ.get("ADMISSION_QUEUE_TIMEOUT_MS", cls.queue_timeout_ms)),
+            query_weight=max(1, int(os.environ.get("ADMISSION_QUERY_WEIGHT", cls.query_weight))),
+        )
+
+
+class ServerBusy(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def response(self) -> Dict[str, Any]:
+        return {
+            "error": f"Server busy: {self.reason}. Retry after {self.retry_after:g} s.",
+            "retry_after_s": self.retry_after,
+        }
+
+
+class _Waiter:
+    __slots__ = ("client", "flow", "start", "finish", "seq", "future")
+
+    def __init__(self, client: "_Client", flow: Deque["_Waiter"], start: float, finish: float, seq: int):
+        self.client = client
+        self.flow = flow
+        self.start = start
+        self.finish = finish
+        self.seq = seq
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class _Client:
+    def __init__(self):
+        self.running = 0
+        self.queued = 0
+        # Per flow (light or not): the finish tag of its last call, and its queued calls
+        self.finish = {True: 0.0, False: 0.0}
+        self.flows: Dict[bool, Deque[_Waiter]] = {True: deque(), False: deque()}
+
+
+class AdmissionQueue:
+    """Slots, per-client limits and the fair queue for one server process."""
+
+    def __init__(self, settings: AdmissionSettings = AdmissionSettings()):
+        self.settings = settings
+        self.running = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed: Dict[str, int] = {}  # reason -> calls refused
+        self.queue_wait = Histogram(ACQUIRE_WAIT_BUCKETS)
+        self._clients: Dict[Any, _Client] = {}
+        self._virtual_time = 0.0
+        self._mean_hold = 0.0
+        self._seq = itertools.count()
+
+    def configure(self, settings: AdmissionSettings) -> None:
+        self.settings = settings
+
+    def _client(self, key: Any) -> _Client:
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = _Client()
+        return client
+
+    def _has_slot(self, client: _Client) -> bool:
+        limits = self.settings
+        return (not limits.max_concurrent or self.running < limits.max_concurrent) and (
+            not limits.max_per_client or client.running < limits.max_per_client
+        )
+
+    def _tags(self, client: _Client, light: bool) -> Tuple[float, float]:
+        start = max(self._virtual_time, client.finish[light])
+        finish = start + (1 if light else self.settings.query_weight)
+        client.finish[light] = finish
+        return start, finish
+
+    def retry_after(self) -> float:
+        """Seconds until the queue ahead should have drained, from the mean slot hold time."""
+        slots = self.settings.max_concurrent or max(self.running, 1)
+        return max(1.0, math.ceil((self.queued + 1) / slots * self._mean_hold))
+
+    def _refuse(self, reason: str, message: str) -> ServerBusy:
+        self.shed[reason] = self.shed.get(reason, 0) + 1
+        return ServerBusy(message, self.retry_after())
+
+    async def acquire(self, key: Any, light: bool) -> None:
+        """Waits for a slot for client ``key``; raises ServerBusy if the call is shed."""
+        limits = self.settings
+        client = self._client(key)
+        if not self.queued and self._has_slot(client):
+            start, _ = self._tags(client, light)
+            self._virtual_time = max(self._virtual_time, start)
+            self._start(client)
+            self.queue_wait.observe(0.0)
+            return
+        if limits.max_queue and self.queued >= limits.max_queue:
+            self._forget_idle(key, client)
+            raise self._refuse("queue_full", f"{self.queued} calls are already queued")
+        if limits.max_queue_per_client and client.queued >= limits.max_queue_per_client:
+            raise self._refuse("client_queue_full", f"this client already has {client.queued} calls queued")
+
+        start, finish = self._tags(client, light)
+        waiter = _Waiter(client, client.flows[light], start, finish, next(self._seq))
+        waiter.flow.append(waiter)
+        client.queued += 1
+        self.queued += 1
+        self._dispatch()  # Starts it at once if the calls ahead are only held back by their clients' limits
+        started = time.perf_counter()
+        try:
+            done, _ = await asyncio.wait(
+                {waiter.future}, timeout=limits.queue_timeout_ms / 1000 if limits.queue_timeout_ms else None
+            )
+        except asyncio.CancelledError:
+            self._abandon(key, waiter)
+            raise
+        self.queue_wait.observe(time.perf_counter() - started)
+        if not done:
+            self._abandon(key, waiter)
+            raise self._refuse("queue_timeout", f"waited {limits.queue_timeout_ms} ms for a free slot")
+
+    def _start(self, client: _Client) -> None:
+        client.running += 1
+        self.running += 1
+        self.admitted += 1
+
+    def _abandon(self, key: Any, waiter: _Waiter) -> None:
+        if waiter.future.done():
+            # Granted just as the caller gave up: hand the slot on.
+            self.release(key, 0.0)
+            return
+        waiter.future.cancel()
+        waiter.flow.remove(waiter)
+        waiter.client.queued -= 1
+        self.queued -= 1
+        self._forget_idle(key, waiter.client)
+
+    def release(self, key: Any, held: float) -> None:
+        client = self._clients[key]
+        client.running -= 1
+        self.running -= 1
+        if held:
+            self._mean_hold += _HOLD_SMOOTHING * (held - self._mean_hold)
+        self._dispatch()
+        self._forget_idle(key, client)
+
+    def _dispatch(self) -> None:
+        """Starts queued calls, smallest finish tag first, while slots are free."""
+        while self.queued:
+            best: Optional[_Waiter] = None
+            for client in self._clients.values():
+                if not client.queued or not self._has_slot(client):
+                    continue
+                for flow in client.flows.values():
+                    if flow and (best is None or (flow[0].finish, flow[0].seq) < (best.finish, best.seq)):
+                        best = flow[0]
+            if best is None:
+                return
+            best.flow.popleft()
+            best.client.queued -= 1
+            self.queued -= 1
+            self._virtual_time = max(self._virtual_time, best.start)
+            self._start(best.client)
+            best.future.set_result(None)
+
+    def _forget_idle(self, key: Any, client: _Client) -> None:
+        if not client.running and not client.queued:
+            self._clients.pop(key, None)
+            if not self._clients:
+                self._virtual_time = 0.0
+
+    def gauges(self) -> Dict[str, int]:
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "clients": len(self._clients),
+            "max_concurrent": self.settings.max_concurrent,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.gauges(),
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "queue_wait": self.queue_wait.snapshot(),
+        }
+
+
+ADMISSION = AdmissionQueue()
+
+
+def client_key(args: tuple, kwargs: dict) -> Any:
+    """
+    The MCP session a tool call came from (one per connected client), read
+    from the Context FastMCP passes in. Calls without one share a key.
+    """
+    for value in itertools.chain(args, kwargs.values()):
+        request_context = getattr(value, "request_context", None)
+        if request_context is not None:
+            session = getattr(request_context, "session", None)
+            return id(session) if session is not None else None
+    return None
+
+
+def admit_calls(
+    func: Callable[..., Awaitable[Any]],
+    name: str,
+    light: bool = False,
+    queue: AdmissionQueue = ADMISSION,
+) -> Callable[..., Awaitable[Any]]:
+    """
+    Wraps a database tool so each call waits for an admission slot; a shed
+    call returns {"error": "Server busy: ...", "retry_after_s": n}.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        key = client_key(args, kwargs)
+        try:
+            await queue.acquire(key, light)
+        except ServerBusy as busy:
+            print(f"WARN: Shed {name} call: {busy.reason}.")
+            return busy.response()
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            queue.release(key, time.perf_counter() - started)
+
+    return wrapper
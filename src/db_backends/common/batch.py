@@ -0,0 +1,59 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+Statement = Tuple[str, List[Any]]
+
+
+def parse_statements(
+    statements: Any, max_statements: int
+) -> Tuple[List[Statement], Optional[Dict[str, Any]]]:
+    """
+    Validates a batch of {"sql": ..., "params": [...]} items (or [sql, params]
+    pairs), returning ((sql, params) list, None) or ([], error response).
+    """
+    if not isinstance(statements, list) or not statements:
+        return [], {"error": "statements must be a non-empty list."}
+    if max_statements and len(statements) > max_statements:
+        return [], {
+            "error": f"Too many statements in one batch ({len(statements)}); the limit is {max_statements}."
+        }
+    parsed = []
+    for i, item in enumerate(statements):
+        if isinstance(item, dict):
+            sql, params = item.get("sql"), item.get("params")
+        elif isinstance(item, (list, tuple)) and 1 <= len(item) <= 2:
+            sql, params = item[0], item[1] if len(item) == 2 else None
+        else:
+            sql, params = None, None
+        if not isinstance(sql, str) or not sql.strip():
+            return [], {"error": f"Statement {i} must have a non-empty 'sql' string."}
+        if params is not None and not isinstance(params, list):
+            return [], {"error": f"Statement {i}: 'params' must be a list."}
+        parsed.append((sql, params or []))
+    return parsed, None
+
+
+async def gather_limited(
+    calls: Sequence[Callable[[], Awaitable[T]]], concurrency: int
+) -> List[T]:
+    """Runs the calls concurrently, at most ``concurrency`` at a time, keeping order."""
+    if concurrency < 1:
+        concurrency = 1
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(call: Callable[[], Awaitable[T]]) -> T:
+        async with semaphore:
+            return await call()
+
+    return await asyncio.gather(*(limited(call) for call in calls))
+
+
+def batch_response(results: List[Dict[str, Any]], consistent: bool) -> Dict[str, Any]:
+    return {
+        "results": results,
+        "statement_count": len(results),
+        "error_count": sum(1 for result in results if "error" in result),
+        "consistent": consistent,
+    }
@@ -0,0 +1,135 @@
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .cache import TTLCache
+from .result_cache import normalize_sql
+
+COST_GUARD_MODES = ("off", "warn", "reject")
+
+# A plan summary, as built by each backend from its EXPLAIN output:
+#   {"estimated_cost": float | None,   # planner cost units (PostgreSQL only)
+#    "estimated_rows": float | None,   # rows the query is expected to return
+#    "full_scans": [{"table": str, "rows": float | None}, ...],
+#    "plan": [str, ...]}               # short, indented plan outline
+
+
+class CostGuard:
+    """
+    Optional pre-flight check of raw queries against their EXPLAIN plan.
+
+    In "warn" mode an offending query still runs and its result carries a
+    "cost_warning"; in "reject" mode it is refused with the plan summary so
+    the caller can rewrite it. Plan summaries are cached by normalized SQL
+    and parameters, since the plan (and its row estimates) depends on both.
+    A threshold of 0 disables that check.
+    """
+
+    def __init__(
+        self,
+        mode: str = "off",
+        max_cost: float = 1_000_000,
+        max_rows: float = 1_000_000,
+        large_table_rows: float = 100_000,
+        plans: Optional[TTLCache] = None,
+    ):
+        if mode not in COST_GUARD_MODES:
+            raise ValueError(f"QUERY_COST_GUARD must be one of {COST_GUARD_MODES}, not '{mode}'.")
+        self.mode = mode
+        self.max_cost = max_cost
+        self.max_rows = max_rows
+        self.large_table_rows = large_table_rows
+        self.plans = plans if plans is not None else TTLCache(max_entries=512, ttl=300)
+        self.checked = 0
+        self.warned = 0
+        self.rejected = 0
+        self.explain_errors = 0
+
+    @classmethod
+    def from_env(cls) -> "CostGuard":
+        return cls(
+            mode=os.environ.get("QUERY_COST_GUARD", "off").lower() or "off",
+            max_cost=float(os.environ.get("QUERY_COST_MAX_COST", 1_000_000)),
+            max_rows=float(os.environ.get("QUERY_COST_MAX_ROWS", 1_000_000)),
+            large_table_rows=float(os.environ.get("QUERY_COST_LARGE_TABLE_ROWS", 100_000)),
+            plans=TTLCache(
+                max_entries=int(os.environ.get("QUERY_COST_PLAN_CACHE_MAX_ENTRIES", 512)),
+                ttl=float(os.environ.get("QUERY_COST_PLAN_CACHE_TTL", 300)),
+            ),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def violations(self, summary: Dict[str, Any]) -> List[str]:
+        found = []
+        cost = summary.get("estimated_cost")
+        if self.max_cost and cost is not None and cost > self.max_cost:
+            found.append(f"estimated cost {cost:,.0f} exceeds {self.max_cost:,.0f}")
+        rows = summary.get("estimated_rows")
+        if self.max_rows and rows is not None and rows > self.max_rows:
+            found.append(f"estimated {rows:,.0f} result rows exceeds {self.max_rows:,.0f}")
+        if self.large_table_rows:
+            for scan in summary.get("full_scans", []):
+                if scan.get("rows") is not None and scan["rows"] >= self.large_table_rows:
+                    found.append(f"full scan of {scan['table']} (~{scan['rows']:,.0f} rows)")
+        return found
+
+    async def check(
+        self,
+        sql: str,
+        params: Optional[Iterable[Any]],
+        explain: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Returns (rejection, warning): an error response to return instead of
+        running ``sql`` with ``params``, or a report to attach to its result. ``explain``
+        produces the plan summary on a cache miss; if it fails the query is
+        let through, so it reports its own error.
+        """
+        if not self.enabled:
+            return None, None
+        self.checked += 1
+        key = (normalize_sql(sql), json.dumps(list(params or []), default=str))
+        summary = self.plans.get(key)
+        if summary is None:
+            try:
+                summary = await explain()
+            except Exception as e:
+                self.explain_errors += 1
+                print(f"Cost guard: EXPLAIN failed ({type(e).__name__}: {e}); not checked.")
+                return None, None
+            self.plans.set(key, summary)
+        violations = self.violations(summary)
+        if not violations:
+            return None, None
+        report = {"violations": violations, "plan": summary}
+        if self.mode == "reject":
+            self.rejected += 1
+            print(f"Cost guard: Rejected query ({'; '.join(violations)}).")
+            return {
+                "error": "Query rejected by the cost guard: "
+                + "; ".join(violations)
+                + ". Narrow it with selective filters on indexed columns or a LIMIT, then retry.",
+                "cost_guard": report,
+            }, None
+        self.warned += 1
+        return None, report
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "checked": self.checked,
+            "warned": self.warned,
+            "rejected": self.rejected,
+            "explain_errors": self.explain_errors,
+            "plan_cache": self.plans.stats(),
+        }
+
+
+def with_warning(result: Dict[str, Any], warning: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Attaches a cost guard warning to a successful result."""
+    if warning is None or "error" in result:
+        return result
+    return {**result, "cost_warning": warning}
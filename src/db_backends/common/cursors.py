@@ -0,0 +1,148 @@
+import asyncio
+import secrets
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .limits import cap_rows
+
+
+class HeldCursor:
+    """
+    A result cursor kept open between tool calls.
+
+    Backends implement ``_fetch`` (read up to ``n`` more rows) and ``_close``
+    (release the cursor and its connection). One row of lookahead is kept so
+    a page can report whether more rows follow without an extra round trip.
+    Pages that exceed ``max_bytes`` are cut short (but never below one row)
+    and ``truncated`` is set; the cut rows are served on the next page.
+    """
+
+    def __init__(self, page_size: int, max_bytes: int = 0):
+        self.page_size = page_size
+        self.max_bytes = max_bytes
+        self.truncated = False
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()
+        self._lookahead: List[Any] = []
+        self._exhausted = False
+
+    async def _fetch(self, n: int) -> List[Any]:
+        raise NotImplementedError
+
+    async def _close(self) -> None:
+        raise NotImplementedError
+
+    async def fetch_page(self) -> Tuple[List[Any], bool]:
+        """Returns the next page of rows and whether more rows remain."""
+        self.last_used = time.monotonic()
+        rows = self._lookahead
+        self._lookahead = []
+        wanted = self.page_size + 1 - len(rows)
+        if not self._exhausted and wanted > 0:
+            fetched = await self._fetch(wanted)
+            if len(fetched) < wanted:
+                self._exhausted = True
+            rows = rows + list(fetched)
+        page, self._lookahead = rows[: self.page_size], rows[self.page_size :]
+        capped, _ = cap_rows(page, 0, self.max_bytes)
+        capped = capped or page[:1]
+        self.truncated = len(capped) < len(page)
+        if self.truncated:
+            self._lookahead = page[len(capped) :] + self._lookahead
+            page = capped
+        self.last_used = time.monotonic()
+        return page, bool(self._lookahead)
+
+    async def close(self) -> None:
+        try:
+            await self._close()
+        except Exception as e:
+            print(f"Error closing held cursor: {e}")
+
+
+class CursorRegistry:
+    """Maps opaque page tokens to open cursors and closes idle ones."""
+
+    def __init__(self, idle_timeout: float = 300.0, max_open: int = 4):
+        self.idle_timeout = idle_timeout
+        self.max_open = max_open
+        self._cursors: Dict[str, HeldCursor] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def has_capacity(self) -> bool:
+        return len(self._cursors) < self.max_open
+
+    def register(self, cursor: HeldCursor) -> str:
+        token = secrets.token_urlsafe(18)
+        self._cursors[token] = cursor
+        return token
+
+    def get(self, token: str) -> Optional[HeldCursor]:
+        return self._cursors.get(token)
+
+    async def discard(self, token: str) -> None:
+        cursor = self._cursors.pop(token, None)
+        if cursor:
+            await cursor.close()
+
+    async def expire_idle(self) -> None:
+        now = time.monotonic()
+        for token, cursor in list(self._cursors.items()):
+            if cursor.lock.locked():
+                continue
+            if now - cursor.last_used > self.idle_timeout:
+                print("Cursor registry: Closing idle result cursor.")
+                await self.discard(token)
+
+    async def _sweep(self) -> None:
+        interval = max(1.0, min(self.idle_timeout / 2, 30.0))
+        while True:
+            await asyncio.sleep(interval)
+            await self.expire_idle()
+
+    def start(self) -> None:
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep())
+
+    async def close(self) -> None:
+        if self._sweeper:
+            self._sweeper.cancel()
+            self._sweeper = None
+        for token in list(self._cursors):
+            await self.discard(token)
+
+
+async def open_page(
+    registry: CursorRegistry, cursor: HeldCursor
+) -> Tuple[List[Any], Optional[str]]:
+    """Fetches the first page from a new cursor, registering it if rows remain."""
+    try:
+        rows, has_more = await cursor.fetch_page()
+    except BaseException:
+        await cursor.close()
+        raise
+    if not has_more:
+        await cursor.close()
+        return rows, None
+    return rows, registry.register(cursor)
+
+
+async def next_page(
+    registry: CursorRegistry, token: str
+) -> Optional[Tuple[HeldCursor, List[Any], Optional[str]]]:
+    """Fetches the next page for ``token``; returns None if it is unknown or expired."""
+    cursor = registry.get(token)
+    if cursor is None:
+        return None
+    async with cursor.lock:
+        if registry.get(token) is not cursor:
+            return None  # Closed by a concurrent call while we waited.
+        try:
+            rows, has_more = await cursor.fetch_page()
+        except BaseException:
+            await registry.discard(token)
+            raise
+        if not has_more:
+            await registry.discard(token)
+            return cursor, rows, None
+    return cursor, rows, token
@@ -0,0 +1,168 @@
+import csv
+import gzip
+import io
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+EXPORT_COMPRESSIONS = ("none", "gzip")
+# zlib's default level: close to level 9's size at a fraction of its CPU cost.
+_GZIP_LEVEL = 6
+
+
+@dataclass(frozen=True)
+class ExportSettings:
+    """
+    Where and how export_query writes files. Rows are read and written
+    chunk_rows at a time, so memory use does not grow with the result.
+    A statement_timeout_ms of 0 lets exports run as long as they need to.
+    """
+
+    directory: str = "exports"
+    chunk_rows: int = 10000
+    statement_timeout_ms: int = 0
+
+    @classmethod
+    def from_env(cls) -> "ExportSettings":
+        return cls(
+            directory=os.environ.get("EXPORT_DIR", cls.directory),
+            chunk_rows=int(os.environ.get("EXPORT_CHUNK_ROWS", cls.chunk_rows)),
+            statement_timeout_ms=int(
+                os.environ.get("EXPORT_STATEMENT_TIMEOUT_MS", cls.statement_timeout_ms)
+            ),
+        )
+
+
+def check_export(fmt: str, compression: str) -> Optional[Dict[str, Any]]:
+    """Returns an error response for an unknown or unavailable format, else None."""
+    if fmt not in EXPORT_FORMATS:
+        return {"error": f"Unknown export format '{fmt}'. Valid formats are: {list(EXPORT_FORMATS)}."}
+    if compression not in EXPORT_COMPRESSIONS:
+        return {"error": f"Unknown compression '{compression}'. Use one of {list(EXPORT_COMPRESSIONS)}."}
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            return {"error": "The 'parquet' export format requires pyarrow to be installed."}
+    return None
+
+
+def export_path(
+    settings: ExportSettings, file_name: Optional[str], fmt: str, compression: str
+) -> str:
+    """
+    Absolute path of a new export file inside the export directory. Raises
+    ValueError for names that would leave it.
+    """
+    # Parquet compresses internally; the file stays a plain .parquet.
+    extension = f".{fmt}" + (".gz" if compression == "gzip" and fmt != "parquet" else "")
+    if file_name is None:
+        file_name = f"export-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    if not file_name or os.path.basename(file_name) != file_name or file_name.startswith("."):
+        raise ValueError("file_name must be a plain file name, without directories.")
+    if not file_name.endswith(extension):
+        file_name += extension
+    directory = os.path.abspath(settings.directory)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, file_name)
+
+
+class ExportWriter:
+    """
+    Writes one export file, either from rows or from already encoded
+    CSV/JSONL chunks (PostgreSQL COPY output). The file is created
+    exclusively, so an existing file is never overwritten, and it is
+    removed again if the export fails.
+    """
+
+    def __init__(self, path: str, fmt: str, compression: str):
+        self.path = path
+        self.format = fmt
+        self.compression = compression
+        self.rows = 0
+        self.columns: List[str] = []
+        self._raw = open(path, "xb")
+        self._file: Any = self._raw
+        if compression == "gzip" and fmt != "parquet":
+            self._file = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=_GZIP_LEVEL)
+        self._parquet: Any = None
+        self._schema: Any = None
+
+    def __enter__(self) -> "ExportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+        if exc_type is not None:
+            os.remove(self.path)
+
+    def write_header(self, columns: List[str]) -> None:
+        self.columns = columns
+        if self.format == "csv":
+            self._write_csv([columns])
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Encodes and writes one chunk of rows (read positionally)."""
+        if self.format == "csv":
+            self._write_csv(rows)
+        elif self.format == "jsonl":
+            lines = [
+                json.dumps(dict(zip(self.columns, row)), default=str) + "\n" for row in rows
+            ]
+            self._file.write("".join(lines).encode("utf-8"))
+        else:
+            self._write_parquet(rows)
+        self.rows += len(rows)
+
+    def write_raw(self, chunk: bytes) -> None:
+        """Writes bytes already encoded in this export's format."""
+        self._file.write(chunk)
+
+    def _write_csv(self, rows: Sequence[Sequence[Any]]) -> None:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        self._file.write(buffer.getvalue().encode("utf-8"))
+
+    def _write_parquet(self, rows: Sequence[Sequence[Any]]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        data = {name: [row[i] for row in rows] for i, name in enumerate(self.columns)}
+        # Column types are inferred from the first chunk and enforced on the rest.
+        table = pa.table(data, schema=self._schema)
+        if self._parquet is None:
+            self._schema = table.schema
+            self._parquet = pq.ParquetWriter(
+                self._raw,
+                self._schema,
+                compression="gzip" if self.compression == "gzip" else "snappy",
+                compression_level=_GZIP_LEVEL if self.compression == "gzip" else None,
+            )
+        self._parquet.write_table(table)
+
+    def close(self) -> None:
+        if self._raw.closed:
+            return
+        try:
+            if self.format == "parquet" and self._parquet is None:
+                self._write_parquet([])  # An empty result still gets a valid file.
+            if self._parquet is not None:
+                self._parquet.close()
+            if self._file is not self._raw:
+                self._file.close()
+        finally:
+            self._raw.close()
+
+    def summary(self) -> Dict[str, Any]:
+        """The tool response for a finished export."""
+        return {
+            "path": self.path,
+            "format": self.format,
+            "compression": self.compression,
+            "row_count": self.rows,
+            "bytes": os.path.getsize(self.path),
+        }
@@ -0,0 +1,68 @@
+import base64
+import csv
+import io
+from typing import Any, Dict, List, Optional, Sequence
+
+# "objects" is the historical list-of-dicts shape and stays the default.
+RESULT_FORMATS = ("objects", "compact", "columnar", "csv", "arrow")
+
+
+def check_format(fmt: str) -> Optional[Dict[str, Any]]:
+    """Returns an error response for an unknown or unavailable format, else None."""
+    if fmt not in RESULT_FORMATS:
+        return {"error": f"Unknown format '{fmt}'. Valid formats are: {list(RESULT_FORMATS)}."}
+    if fmt == "arrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return {"error": "The 'arrow' format requires pyarrow to be installed."}
+    return None
+
+
+def _csv_bytes(columns: List[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _arrow_ipc_bytes(columns: List[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    import pyarrow as pa
+
+    table = pa.table({name: [row[i] for row in rows] for i, name in enumerate(columns)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_rows(
+    columns: List[str], rows: Sequence[Sequence[Any]], fmt: str = "objects"
+) -> Dict[str, Any]:
+    """
+    Encodes rows (asyncpg Records or sqlite3 tuples, read positionally) as
+    the response fields for ``fmt``:
+
+    * objects  - {"data": [{column: value}, ...]}
+    * compact  - {"columns": [...], "data": [[value, ...], ...]}
+    * columnar - {"columns": [...], "data": {column: [value, ...]}}
+    * csv      - {"columns": [...], "data": base64 CSV with a header row}
+    * arrow    - {"columns": [...], "data": base64 Arrow IPC stream}
+
+    Every format also carries "row_count", so callers (and metrics) need
+    not decode ``data`` to count rows.
+    """
+    if fmt == "objects":
+        return {"data": [dict(zip(columns, row)) for row in rows], "row_count": len(rows)}
+    if fmt == "compact":
+        data: Any = [list(row) for row in rows]
+    elif fmt == "columnar":
+        data = {name: [row[i] for row in rows] for i, name in enumerate(columns)}
+    elif fmt == "csv":
+        data = base64.b64encode(_csv_bytes(columns, rows)).decode("ascii")
+    elif fmt == "arrow":
+        data = base64.b64encode(_arrow_ipc_bytes(columns, rows)).decode("ascii")
+    else:
+        raise ValueError(f"Unknown format '{fmt}'.")
+    return {"format": fmt, "columns": columns, "data": data, "row_count": len(rows)}
@@ -0,0 +1,29 @@
+from typing import Any, Dict, Optional
+
+
+def check_raw_select(query: str) -> Optional[Dict[str, Any]]:
+    """Returns an error response if ``query`` is not allowed for raw execution."""
+    # Basic check to allow only SELECT (very rudimentary, can be bypassed)
+    if not query.strip().upper().startswith("SELECT"):
+        return {
+            "error": "Only SELECT statements are tentatively permitted for raw execution."
+        }
+
+    # Add more disallowed keywords if necessary, but this is not foolproof
+    disallowed_keywords = [
+        "DROP",
+        "DELETE",
+        "INSERT",
+        "UPDATE",
+        "TRUNCATE",
+        "ALTER",
+        "CREATE",
+        "EXECUTE",
+    ]
+    query_upper = query.upper()
+    for keyword in disallowed_keywords:
+        if keyword in query_upper:
+            return {
+                "error": f"Query contains disallowed keyword '{keyword}'. Raw execution denied."
+            }
+    return None
@@ -0,0 +1,182 @@
+import csv
+import gzip
+import json
+import os
+import re
+from dataclasses import dataclass
+from itertools import islice
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+IMPORT_FILE_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+Row = Tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class ImportSettings:
+    """
+    import_rows is the only tool that writes, so it is off unless enabled.
+    Files can only be read from ``directory``; rows are inserted
+    ``batch_rows`` at a time, all in one transaction. A
+    statement_timeout_ms of 0 lets imports run as long as they need to.
+    """
+
+    enabled: bool = False
+    directory: str = "imports"
+    batch_rows: int = 5000
+    statement_timeout_ms: int = 0
+
+    @classmethod
+    def from_env(cls) -> "ImportSettings":
+        return cls(
+            enabled=os.environ.get("IMPORT_ENABLED", "").lower() in ("1", "true", "yes"),
+            directory=os.environ.get("IMPORT_DIR", cls.directory),
+            batch_rows=int(os.environ.get("IMPORT_BATCH_ROWS", cls.batch_rows)),
+            statement_timeout_ms=int(
+                os.environ.get("IMPORT_STATEMENT_TIMEOUT_MS", cls.statement_timeout_ms)
+            ),
+        )
+
+
+def check_import(
+    settings: ImportSettings,
+    table_name: str,
+    rows: Optional[List[Any]],
+    file_path: Optional[str],
+    columns: Optional[List[str]],
+    batch_size: Optional[int],
+) -> Optional[Dict[str, Any]]:
+    """Returns an error response if the import_rows call cannot proceed, else None."""
+    if not settings.enabled:
+        return {"error": "Imports are disabled on this server (IMPORT_ENABLED)."}
+    if not _IDENTIFIER.match(table_name):
+        return {"error": "Invalid table name."}
+    if (rows is None) == (file_path is None):
+        return {"error": "Pass either rows or file_path, not both."}
+    if columns is not None and (not columns or not all(_IDENTIFIER.match(c) for c in columns)):
+        return {"error": "columns must be a non-empty list of plain column names."}
+    if batch_size is not None and batch_size < 1:
+        return {"error": "batch_size must be a positive integer."}
+    return None
+
+
+def _cell(value: Any) -> Any:
+    # Nested JSON values are stored as JSON text.
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+def inline_rows(rows: List[Any], columns: Optional[List[str]]) -> Tuple[List[str], List[Row]]:
+    """
+    Normalizes the rows argument, a list of objects or of value lists, to
+    (columns, tuples). Objects default to the first object's keys, and a
+    missing key becomes NULL. Raises ValueError for malformed rows.
+    """
+    if not rows:
+        raise ValueError("rows must not be empty.")
+    if isinstance(rows[0], dict):
+        columns = columns or list(rows[0])
+        if not all(isinstance(row, dict) for row in rows):
+            raise ValueError("Mix of object and list rows.")
+        normalized = [tuple(_cell(row.get(c)) for c in columns) for row in rows]
+    else:
+        if not columns:
+            raise ValueError("columns is required when rows are lists of values.")
+        normalized = []
+        for i, row in enumerate(rows):
+            if not isinstance(row, (list, tuple)) or len(row) != len(columns):
+                raise ValueError(f"Row {i} does not have {len(columns)} values.")
+            normalized.append(tuple(_cell(value) for value in row))
+    _check_columns(columns)
+    return columns, normalized
+
+
+def _check_columns(columns: List[str]) -> None:
+    bad = [c for c in columns if not isinstance(c, str) or not _IDENTIFIER.match(c)]
+    if bad:
+        raise ValueError(f"Invalid column names: {bad}.")
+
+
+def resolve_import_file(settings: ImportSettings, file_path: str) -> Tuple[str, str]:
+    """
+    (absolute path, "csv" or "jsonl") of a file inside the import directory,
+    by extension (optionally followed by .gz). Raises ValueError otherwise.
+    """
+    directory = os.path.realpath(settings.directory)
+    path = os.path.realpath(os.path.join(directory, file_path))
+    if os.path.commonpath([directory, path]) != directory:
+        raise ValueError("file_path must be inside the server's import directory.")
+    if not os.path.isfile(path):
+        raise ValueError(f"Import file '{file_path}' not found.")
+    stem = path[:-3] if path.endswith(".gz") else path
+    fmt = IMPORT_FILE_FORMATS.get(os.path.splitext(stem)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported import file type; use one of {sorted(IMPORT_FILE_FORMATS)} (optionally .gz).")
+    return path, fmt
+
+
+def open_text(path: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def csv_header(path: str) -> List[str]:
+    """The column names in a CSV file's header row."""
+    with open_text(path) as f:
+        header = next(csv.reader(f), None)
+    if not header:
+        raise ValueError("The CSV file is empty; it must start with a header row.")
+    _check_columns(header)
+    return header
+
+
+def file_rows(path: str, fmt: str, columns: Optional[List[str]]) -> Tuple[List[str], Iterator[Row]]:
+    """
+    (columns, row iterator) for an import file, read lazily. CSV columns
+    come from the header row and empty fields load as NULL; JSONL objects
+    default to the first object's keys.
+    """
+    if fmt == "csv":
+        header = csv_header(path)
+        return header, _csv_rows(path)
+    if columns is None:
+        with open_text(path) as f:
+            first = next((line for line in f if line.strip()), None)
+        if first is None:
+            raise ValueError("The JSONL file has no rows.")
+        columns = list(json.loads(first))
+        _check_columns(columns)
+    return columns, _jsonl_rows(path, columns)
+
+
+def _csv_rows(path: str) -> Iterator[Row]:
+    with open_text(path) as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            yield tuple(value if value != "" else None for value in row)
+
+
+def _jsonl_rows(path: str, columns: List[str]) -> Iterator[Row]:
+    with open_text(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                raise ValueError(f"Line {number} is not valid JSON.") from None
+            if not isinstance(item, dict):
+                raise ValueError(f"Line {number} is not a JSON object.")
+            yield tuple(_cell(item.get(c)) for c in columns)
+
+
+def batched(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
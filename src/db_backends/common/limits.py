@@ -0,0 +1,72 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class QueryLimits:
+    """
+    Caps applied by every query tool. A value of 0 disables that cap.
+
+    max_response_bytes is an estimate based on the JSON size of each row's
+    values, so it bounds the response size rather than matching it exactly.
+    """
+
+    max_rows: int = 10000
+    max_response_bytes: int = 5_000_000
+    statement_timeout_ms: int = 30000
+    batch_max_statements: int = 50
+    batch_concurrency: int = 4
+
+    @classmethod
+    def from_env(cls) -> "QueryLimits":
+        return cls(
+            max_rows=int(os.environ.get("QUERY_MAX_ROWS", cls.max_rows)),
+            max_response_bytes=int(
+                os.environ.get("QUERY_MAX_RESPONSE_BYTES", cls.max_response_bytes)
+            ),
+            statement_timeout_ms=int(
+                os.environ.get("QUERY_STATEMENT_TIMEOUT_MS", cls.statement_timeout_ms)
+            ),
+            batch_max_statements=int(
+                os.environ.get("QUERY_BATCH_MAX_STATEMENTS", cls.batch_max_statements)
+            ),
+            batch_concurrency=int(
+                os.environ.get("QUERY_BATCH_CONCURRENCY", cls.batch_concurrency)
+            ),
+        )
+
+    @property
+    def statement_timeout(self) -> Optional[float]:
+        """The statement timeout in seconds, for driver-level ``timeout=`` arguments."""
+        if not self.statement_timeout_ms:
+            return None
+        return self.statement_timeout_ms / 1000
+
+    def clamp_rows(self, requested: int) -> int:
+        """Clamps a caller-supplied row count (limit, page size) to max_rows."""
+        if self.max_rows and requested > self.max_rows:
+            return self.max_rows
+        return requested
+
+
+def estimate_row_bytes(row: Sequence[Any]) -> int:
+    return len(json.dumps(list(row), default=str))
+
+
+def cap_rows(
+    rows: List[Any], max_rows: int, max_bytes: int
+) -> Tuple[List[Any], bool]:
+    """Trims ``rows`` to the row and byte caps, returning (rows, truncated)."""
+    truncated = False
+    if max_rows and len(rows) > max_rows:
+        rows = rows[:max_rows]
+        truncated = True
+    if max_bytes:
+        total = 0
+        for i, row in enumerate(rows):
+            total += estimate_row_bytes(row)
+            if total > max_bytes:
+                return rows[:i], True
+    return rows, truncated
@@ -0,0 +1,331 @@
+import functools
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ACQUIRE_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts are per bucket, not cumulative."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, cumulative count) pairs in Prometheus order, ending with +Inf."""
+        pairs, running = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            pairs.append(("+Inf" if bound == float("inf") else repr(bound), running))
+        return pairs
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (the max for +Inf)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for le, running in self.cumulative():
+            if running >= rank:
+                return self.max if le == "+Inf" else min(float(le), self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_s": round(self.sum, 6),
+            "mean_s": round(self.sum / self.count, 6) if self.count else None,
+            "max_s": round(self.max, 6),
+            **{
+                f"p{int(q * 100)}_s": round(self.quantile(q), 6) if self.count else None
+                for q in (0.5, 0.95, 0.99)
+            },
+        }
+
+
+class ToolStats:
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0  # calls answered by another call's execution (single-flight)
+        self.rows = 0
+        self.response_bytes = 0
+        self.errors: Dict[str, int] = {}
+        self.latency = Histogram()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "rows": self.rows,
+            "response_bytes": self.response_bytes,
+            "errors": dict(self.errors),
+            "latency": self.latency.snapshot(),
+        }
+
+
+class PoolMonitor:
+    """
+    Tracks waits on a connection pool exposing asyncpg's get_size /
+    get_idle_size / get_min_size / get_max_size. Connections must be taken
+    through acquire() / connection() for waiters and wait times to count.
+    ``up`` is cleared by whoever health-checks the pool (e.g. replicas).
+    """
+
+    def __init__(self, pool: Any = None, acquire_timeout: Optional[float] = None):
+        self.pool = pool
+        self.acquire_timeout = acquire_timeout
+        self.up = True
+        self.waiters = 0
+        self.acquire_wait = Histogram(ACQUIRE_WAIT_BUCKETS)
+
+    async def acquire(self, timeout: Optional[float] = None) -> Any:
+        self.waiters += 1
+        start = time.perf_counter()
+        try:
+            return await self.pool.acquire(
+                timeout=self.acquire_timeout if timeout is None else timeout
+            )
+        finally:
+            self.waiters -= 1
+            self.acquire_wait.observe(time.perf_counter() - start)
+
+    async def release(self, conn: Any) -> None:
+        await self.pool.release(conn)
+
+    @asynccontextmanager
+    async def connection(self, timeout: Optional[float] = None):
+        conn = await self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    def gauges(self) -> Dict[str, int]:
+        size = self.pool.get_size()
+        idle = self.pool.get_idle_size()
+        return {
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "min_size": self.pool.get_min_size(),
+            "max_size": self.pool.get_max_size(),
+            "waiters": self.waiters,
+            "up": int(self.up),
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.gauges(), "acquire_wait": self.acquire_wait.snapshot()}
+
+
+def result_rows(result: Any) -> int:
+    if not isinstance(result, dict):
+        return 0
+    if isinstance(result.get("row_count"), int):
+        return result["row_count"]
+    if isinstance(result.get("results"), list):  # execute_batch
+        return sum(result_rows(item) for item in result["results"])
+    data = result.get("data")
+    return len(data) if isinstance(data, list) else 0
+
+
+def content_size(content: Sequence[Any]) -> int:
+    """Characters of text in a tool response as FastMCP serialized it."""
+    return sum(len(getattr(item, "text", "") or "") for item in content)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """Process-wide per-tool counters and the pools being watched."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.tools: Dict[str, ToolStats] = {}
+        self.pools: Dict[str, PoolMonitor] = {}
+        self.queues: Dict[str, Any] = {}  # admission queues (common/admission.py)
+        self.startup: Dict[str, float] = {}  # phase -> seconds
+
+    def tool(self, name: str) -> ToolStats:
+        stats = self.tools.get(name)
+        if stats is None:
+            stats = self.tools[name] = ToolStats()
+        return stats
+
+    def record(
+        self, name: str, seconds: float, result: Any = None, error_type: Optional[str] = None
+    ) -> None:
+        stats = self.tool(name)
+        stats.calls += 1
+        stats.latency.observe(seconds)
+        if error_type is None and isinstance(result, dict) and "error" in result:
+            # Tools report most failures as {"error": ...} rather than raising.
+            error_type = "error_response"
+        if error_type is not None:
+            stats.errors[error_type] = stats.errors.get(error_type, 0) + 1
+            return
+        stats.rows += result_rows(result)
+
+    def record_response(self, name: str, size: int) -> None:
+        """
+        Counts the size of a response already serialized for the client
+        (see main.py), so results are never encoded a second time.
+        """
+        self.tool(name).response_bytes += size
+
+    def record_startup(self, phase: str, seconds: float) -> None:
+        self.startup[phase] = seconds
+
+    def startup_summary(self) -> str:
+        return ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.startup.items())
+
+    def watch_pool(self, name: str, monitor: PoolMonitor) -> None:
+        self.pools[name] = monitor
+
+    def unwatch_pool(self, name: str) -> None:
+        self.pools.pop(name, None)
+
+    def watch_queue(self, name: str, queue: Any) -> None:
+        self.queues[name] = queue
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "startup_s": {phase: round(seconds, 4) for phase, seconds in self.startup.items()},
+            "tools": {name: stats.snapshot() for name, stats in sorted(self.tools.items())},
+            "pools": {name: monitor.snapshot() for name, monitor in self.pools.items()},
+            "admission": {name: queue.snapshot() for name, queue in self.queues.items()},
+        }
+
+    def render_prometheus(self) -> str:
+        """Text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        tools = sorted(self.tools.items())
+        family("querycraft_tool_calls_total", "counter", "Tool invocations.")
+        for name, stats in tools:
+            lines.append(f'querycraft_tool_calls_total{{tool="{_label(name)}"}} {stats.calls}')
+        family("querycraft_tool_shared_calls_total", "counter", "Calls answered by an identical in-flight call.")
+        for name, stats in tools:
+            lines.append(f'querycraft_tool_shared_calls_total{{tool="{_label(name)}"}} {stats.shared}')
+        family("querycraft_tool_errors_total", "counter", "Failed tool invocations by error type.")
+        for name, stats in tools:
+            for error_type, count in sorted(stats.errors.items()):
+                lines.append(
+                    f'querycraft_tool_errors_total{{tool="{_label(name)}",type="{_label(error_type)}"}} {count}'
+                )
+        family("querycraft_tool_rows_total", "counter", "Rows returned by successful calls.")
+        for name, stats in tools:
+            lines.append(f'querycraft_tool_rows_total{{tool="{_label(name)}"}} {stats.rows}')
+        family(
+            "querycraft_tool_response_bytes_total", "counter", "Approximate serialized size of responses sent to clients."
+        )
+        for name, stats in tools:
+            lines.append(
+                f'querycraft_tool_response_bytes_total{{tool="{_label(name)}"}} {stats.response_bytes}'
+            )
+        family("querycraft_tool_latency_seconds", "histogram", "Tool call latency.")
+        for name, stats in tools:
+            _render_histogram(lines, "querycraft_tool_latency_seconds", f'tool="{_label(name)}"', stats.latency)
+
+        pools = sorted(self.pools.items())
+        gauges = {name: monitor.gauges() for name, monitor in pools}
+        for key in ("size", "idle", "in_use", "min_size", "max_size", "waiters", "up"):
+            family(f"querycraft_pool_{key}", "gauge", f"Connection pool {key.replace('_', ' ')}.")
+            for name, _ in pools:
+                lines.append(f'querycraft_pool_{key}{{pool="{_label(name)}"}} {gauges[name][key]}')
+        family("querycraft_pool_acquire_wait_seconds", "histogram", "Time spent waiting for a pooled connection.")
+        for name, monitor in pools:
+            _render_histogram(
+                lines, "querycraft_pool_acquire_wait_seconds", f'pool="{_label(name)}"', monitor.acquire_wait
+            )
+
+        queues = sorted(self.queues.items())
+        for key, help_text in (
+            ("running", "Tool calls holding an admission slot."),
+            ("queued", "Tool calls waiting for an admission slot."),
+            ("clients", "Clients with running or queued tool calls."),
+        ):
+            family(f"querycraft_admission_{key}", "gauge", help_text)
+            for name, queue in queues:
+                lines.append(f'querycraft_admission_{key}{{queue="{_label(name)}"}} {queue.gauges()[key]}')
+        family("querycraft_admission_admitted_total", "counter", "Tool calls admitted.")
+        for name, queue in queues:
+            lines.append(f'querycraft_admission_admitted_total{{queue="{_label(name)}"}} {queue.admitted}')
+        family("querycraft_admission_shed_total", "counter", "Tool calls refused as busy, by reason.")
+        for name, queue in queues:
+            for reason, count in sorted(queue.shed.items()):
+                lines.append(
+                    f'querycraft_admission_shed_total{{queue="{_label(name)}",reason="{_label(reason)}"}} {count}'
+                )
+        family("querycraft_admission_queue_wait_seconds", "histogram", "Time tool calls waited for admission.")
+        for name, queue in queues:
+            _render_histogram(
+                lines, "querycraft_admission_queue_wait_seconds", f'queue="{_label(name)}"', queue.queue_wait
+            )
+        family("querycraft_startup_seconds", "gauge", "Server startup time by phase.")
+        for phase, seconds in self.startup.items():
+            lines.append(f'querycraft_startup_seconds{{phase="{_label(phase)}"}} {seconds}')
+        return "\n".join(lines) + "\n"
+
+
+def _render_histogram(lines: List[str], metric: str, labels: str, histogram: Histogram) -> None:
+    for le, running in histogram.cumulative():
+        lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {running}')
+    lines.append(f"{metric}_sum{{{labels}}} {histogram.sum}")
+    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+
+
+METRICS = MetricsRegistry()
+
+
+def instrument_tool(
+    func: Callable[..., Awaitable[Any]], name: str, registry: MetricsRegistry = METRICS
+) -> Callable[..., Awaitable[Any]]:
+    """
+    Wraps an async tool so every call is recorded in ``registry``. The
+    wrapper keeps the tool's name, docstring and signature, which FastMCP
+    uses to build the tool schema and inject the Context.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            registry.record(name, time.perf_counter() - start, error_type=type(e).__name__)
+            raise
+        registry.record(name, time.perf_counter() - start, result)
+        return result
+
+    return wrapper
+
+
+async def server_stats() -> Dict[str, Any]:
+    """
+    Reports per-tool call counts (and how many shared an identical
+    in-flight call), latency percentiles (bucket upper bounds),
+    rows returned, approximate response bytes and errors by type, plus
+    connection pool gauges and acquire wait times, and admission queue
+    depth, wait times and calls shed as busy.
+    """
+    return METRICS.snapshot()
@@ -0,0 +1,142 @@
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+_TABLE_REF = re.compile(r'\b(?:FROM|JOIN)\s+((?:"[^"]+"|[\w$]+)(?:\.(?:"[^"]+"|[\w$]+))?)', re.I)
+_QUOTED_OR_SPACE = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapses whitespace outside string literals and drops a trailing ';'."""
+    normalized = _QUOTED_OR_SPACE.sub(lambda m: m.group(1) or " ", sql).strip()
+    return normalized.rstrip(";").rstrip()
+
+
+def referenced_tables(sql: str) -> List[str]:
+    """Best-effort list of unqualified table names after FROM / JOIN."""
+    tables = []
+    for ref in _TABLE_REF.findall(sql):
+        name = ref.rsplit(".", 1)[-1].strip('"').lower()
+        if name not in tables:
+            tables.append(name)
+    return tables
+
+
+def result_cache_key(tool: str, sql: str, params: Optional[Iterable[Any]]) -> Hashable:
+    return (tool, normalize_sql(sql), json.dumps(list(params or []), default=str))
+
+
+def _parse_table_ttls(spec: str) -> Dict[str, float]:
+    """Parses "orders=5,users=600" into {"orders": 5.0, "users": 600.0}."""
+    ttls = {}
+    for item in spec.split(","):
+        if "=" in item:
+            table, ttl = item.split("=", 1)
+            ttls[table.strip().lower()] = float(ttl)
+    return ttls
+
+
+class ResultCache:
+    """
+    Opt-in LRU cache of query results, bounded by their serialized size.
+
+    An entry lives for the smallest TTL configured for the tables its SQL
+    references (falling back to the default TTL) and is dropped early when
+    the backend reports that data changed.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 60.0,
+        table_ttls: Optional[Dict[str, float]] = None,
+    ):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.table_ttls = table_ttls or {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.data_version: Any = None
+        self._bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        return cls(
+            enabled=os.environ.get("QUERY_RESULT_CACHE_ENABLED", "").lower()
+            in ("1", "true", "yes"),
+            max_bytes=int(
+                os.environ.get("QUERY_RESULT_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+            ),
+            ttl=float(os.environ.get("QUERY_RESULT_CACHE_TTL", 60)),
+            table_ttls=_parse_table_ttls(
+                os.environ.get("QUERY_RESULT_CACHE_TABLE_TTLS", "")
+            ),
+        )
+
+    def ttl_for(self, tables: Iterable[str]) -> float:
+        ttls = [self.table_ttls[t] for t in tables if t in self.table_ttls]
+        return min(ttls) if ttls else self.ttl
+
+    def _pop(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry[0]:
+            if entry is not None:
+                self._pop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def set(self, key: Hashable, value: Any, tables: Iterable[str]) -> None:
+        ttl = self.ttl_for(tables)
+        if not self.enabled or ttl <= 0:
+            return
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._pop(key)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self) -> None:
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self._bytes = 0
+
+    def observe_data_version(self, version: Any) -> None:
+        """Clears the cache if the backend's data version moved since last seen."""
+        if version != self.data_version:
+            self.clear()
+            self.data_version = version
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
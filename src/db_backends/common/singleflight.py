@@ -0,0 +1,102 @@
+"""
+Single-flight for read-only tools: concurrent calls with the same arguments
+share one execution and all receive its result, so a burst of identical
+calls (many agents starting at once) takes one pooled connection instead
+of one each. Only calls that overlap are shared; nothing is kept once the
+execution finishes (that is the result cache's job).
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from mcp.server.fastmcp import Context
+
+from .metrics import METRICS, MetricsRegistry
+from .result_cache import normalize_sql
+
+# SQL arguments are compared after normalize_sql, like result cache keys.
+_SQL_ARGUMENTS = ("query", "sql_query")
+
+
+def single_flight_enabled() -> bool:
+    return os.environ.get("SINGLE_FLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+def call_key(name: str, signature: inspect.Signature, args: tuple, kwargs: dict) -> Optional[Hashable]:
+    """
+    The key identical calls share, with defaults filled in; None for a call
+    that must run on its own (page_size opens a cursor per caller).
+    """
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    if bound.arguments.get("page_size") is not None:
+        return None
+    arguments = {}
+    for key, value in bound.arguments.items():
+        if isinstance(value, Context):
+            continue
+        if key in _SQL_ARGUMENTS and isinstance(value, str):
+            value = normalize_sql(value)
+        arguments[key] = value
+    return (name, json.dumps(arguments, sort_keys=True, default=str))
+
+
+class SingleFlight:
+    """In-flight executions by call key."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Returns (result, shared); shared is True if another call's execution answered."""
+        task = self._calls.get(key)
+        shared = task is not None and not task.done()
+        if not shared:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(functools.partial(self._finished, key))
+        # A caller that is cancelled stops waiting; the execution the others wait on carries on.
+        return await asyncio.shield(task), shared
+
+    def _finished(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every caller went away.
+
+
+SINGLE_FLIGHT = SingleFlight()
+
+
+def share_calls(
+    func: Callable[..., Awaitable[Any]],
+    name: str,
+    flights: SingleFlight = SINGLE_FLIGHT,
+    registry: MetricsRegistry = METRICS,
+) -> Callable[..., Awaitable[Any]]:
+    """
+    Wraps a read-only tool so overlapping identical calls share one
+    execution. Errors, raised or returned, reach every caller. Calls
+    answered by another call's execution are counted as ``shared`` in
+    ``registry``.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        key = call_key(name, signature, args, kwargs)
+        if key is None:
+            return await func(*args, **kwargs)
+        result, shared = await flights.run(key, functools.partial(func, *args, **kwargs))
+        if shared:
+            registry.tool(name).shared += 1
+        return result
+
+    return wrapper
@@ -0,0 +1,5 @@
+# MariaDB speaks the MySQL protocol, so it shares the mysql backend and only
+# differs in configuration (MARIADB_* variables) and the statement timeout.
+from ..mysql.lifespan import MySQLAppContext, create_app_lifespan
+
+app_lifespan = create_app_lifespan("mariadb")
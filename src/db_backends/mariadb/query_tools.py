@@ -0,0 +1,6 @@
+from ..mysql.query_tools import (
+    execute_raw_sql,
+    fetch_next_page,
+    get_cache_stats,
+    search_data,
+)
@@ -0,0 +1,5 @@
+from ..mysql.schema_tools import (
+    get_object_columns,
+    list_available_databases,
+    list_database_objects,
+)
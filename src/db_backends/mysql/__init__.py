@@ -0,0 +1,38 @@
+from ..plugins import BackendManifest
+
+MANIFEST = BackendManifest(
+    name="mysql",
+    label="MySQL",
+    package=__name__,
+    drivers=("aiomysql",),
+    url_schemes=("mysql",),
+    tools={
+        "list_available_databases": "schema_tools:list_available_databases",
+        "list_database_objects": "schema_tools:list_database_objects",
+        "get_object_columns": "schema_tools:get_object_columns",
+        "search_data": "query_tools:search_data",
+        "execute_raw_sql": "query_tools:execute_raw_sql",
+        "fetch_next_page": "query_tools:fetch_next_page",
+        "get_cache_stats": "query_tools:get_cache_stats",
+    },
+    # Read-only tools: identical concurrent calls share one execution.
+    shared_calls=(
+        "list_available_databases",
+        "list_database_objects",
+        "get_object_columns",
+        "search_data",
+        "execute_raw_sql",
+    ),
+    # Cheap metadata tools: served ahead of queued queries.
+    light_tools=(
+        "list_available_databases",
+        "list_database_objects",
+        "get_object_columns",
+        "get_cache_stats",
+    ),
+)
+
+
+def __getattr__(name):
+    # Tools and app_lifespan are imported on first access, not with the package.
+    return MANIFEST.export(name)
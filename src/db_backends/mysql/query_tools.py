@@ -0,0 +1,376 @@
+import asyncio
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp.server.fastmcp import Context
+
+from ..common.cursors import HeldCursor, next_page, open_page
+from ..common.formats import check_format, encode_rows
+from ..common.guards import check_raw_select
+from ..common.limits import QueryLimits, cap_rows
+from ..common.result_cache import referenced_tables, result_cache_key
+from ..plugins import LazyModule
+from .lifespan import MySQLAppContext
+
+aiomysql = LazyModule("aiomysql")
+
+# ER_QUERY_TIMEOUT (MySQL max_execution_time) and ER_STATEMENT_TIMEOUT
+# (MariaDB max_statement_time).
+_TIMEOUT_ERROR_CODES = frozenset({3024, 1969})
+
+
+def _is_timeout(e: BaseException) -> bool:
+    if isinstance(e, asyncio.TimeoutError):
+        return True
+    return (
+        isinstance(e, aiomysql.OperationalError)
+        and bool(e.args)
+        and e.args[0] in _TIMEOUT_ERROR_CODES
+    )
+
+
+def _timeout_error(limits: QueryLimits) -> Dict[str, Any]:
+    return {
+        "error": f"Query cancelled: exceeded the statement timeout of {limits.statement_timeout_ms} ms."
+    }
+
+
+def _query_error(e: Exception, limits: QueryLimits, tool: str) -> Dict[str, Any]:
+    if _is_timeout(e):
+        return _timeout_error(limits)
+    print(f"Error in {tool}: {e}")
+    return {"error": f"Raw SQL execution failed: {type(e).__name__}"}
+
+
+def _args(params: Optional[List[Any]]) -> Optional[Tuple[Any, ...]]:
+    # With no args aiomysql leaves the SQL alone, so a literal '%' survives.
+    return tuple(params) if params else None
+
+
+async def _fetch_streamed(
+    conn: "aiomysql.Connection",
+    limits: QueryLimits,
+    query: str,
+    params: Optional[List[Any]],
+    max_rows: int,
+) -> Tuple[List[str], List[Tuple[Any, ...]], bool]:
+    """
+    Runs a query through an unbuffered (SSCursor) result and reads at most
+    max_rows + 1 rows (to detect truncation), so an oversized result is
+    never materialized. Returns (columns, rows, truncated).
+
+    Closing an unbuffered cursor reads the rest of the result off the wire,
+    so when rows are left over (or anything fails mid-stream) the connection
+    is closed instead; the pool drops it and opens a fresh one when needed.
+    """
+    timeout = limits.statement_timeout
+    cursor = await conn.cursor(aiomysql.SSCursor)
+    exhausted = False
+    try:
+        await asyncio.wait_for(cursor.execute(query, _args(params)), timeout)
+        columns = [d[0] for d in cursor.description] if cursor.description else []
+        if max_rows:
+            rows = await asyncio.wait_for(cursor.fetchmany(max_rows + 1), timeout)
+            exhausted = len(rows) <= max_rows
+        else:
+            rows = await asyncio.wait_for(cursor.fetchall(), timeout)
+            exhausted = True
+    finally:
+        if exhausted:
+            await cursor.close()
+        else:
+            conn.close()
+    rows, truncated = cap_rows(list(rows), max_rows, limits.max_response_bytes)
+    return columns, rows, truncated
+
+
+class _MySQLHeldCursor(HeldCursor):
+    """An unbuffered (SSCursor) result pinned to one pooled connection."""
+
+    def __init__(
+        self,
+        db_pool: "aiomysql.Pool",
+        page_size: int,
+        limits: QueryLimits,
+        format: str = "objects",
+    ):
+        super().__init__(page_size, max_bytes=limits.max_response_bytes)
+        self.format = format
+        self.columns: List[str] = []
+        self._pool = db_pool
+        self._limits = limits
+        self._conn = None
+        self._cursor = None
+        self._exhausted = False
+
+    async def open(self, query: str, params: Optional[List[Any]]) -> None:
+        self._conn = await self._pool.acquire()
+        self._cursor = await self._conn.cursor(aiomysql.SSCursor)
+        await asyncio.wait_for(
+            self._cursor.execute(query, _args(params)), self._limits.statement_timeout
+        )
+        if self._cursor.description:
+            self.columns = [d[0] for d in self._cursor.description]
+
+    async def _fetch(self, n: int) -> List[Any]:
+        rows = await asyncio.wait_for(
+            self._cursor.fetchmany(n), self._limits.statement_timeout
+        )
+        if len(rows) < n:
+            self._exhausted = True
+        return list(rows)
+
+    def encode_page(self, rows: List[Any], token: Optional[str]) -> Dict[str, Any]:
+        return {
+            **encode_rows(self.columns, rows, self.format),
+            "next_page_token": token,
+            "truncated": self.truncated,
+        }
+
+    async def _close(self) -> None:
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        try:
+            if self._exhausted and self._cursor is not None:
+                await self._cursor.close()
+            else:
+                # Abandoning the rest of the result: drop it with the connection.
+                conn.close()
+        finally:
+            self._pool.release(conn)
+
+
+_FILTER_OPERATORS = frozenset(
+    {"=", "!=", "<>", "<", "<=", ">", ">=", "LIKE", "NOT LIKE", "ILIKE", "NOT ILIKE"}
+)
+
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _quote_ident(name: str) -> str:
+    return "`" + name.replace("`", "``") + "`"
+
+
+def _search_sql(
+    table_name: str,
+    search_fields: Tuple[str, ...],
+    filter_shape: Tuple[Tuple[str, str], ...],
+    sort_field: Optional[str],
+    sort_direction: str,
+) -> str:
+    """
+    Builds the SQL for one search_data statement shape, with %s
+    placeholders in the same order as the parameters search_data collects.
+    """
+    where_clauses = []
+    if search_fields:
+        # LIKE is case-insensitive under MySQL/MariaDB's default collations.
+        clauses = [f"{_quote_ident(field)} LIKE %s" for field in search_fields]
+        where_clauses.append(f"({' OR '.join(clauses)})")
+    for field, op in filter_shape:
+        # ILIKE is a PostgreSQL spelling; LIKE already ignores case here.
+        op = op.replace("ILIKE", "LIKE")
+        where_clauses.append(f"{_quote_ident(field)} {op} %s")
+
+    sql = f"SELECT * FROM {_quote_ident(table_name)}"
+    if where_clauses:
+        sql += " WHERE " + " AND ".join(where_clauses)
+    if sort_field:
+        sql += f" ORDER BY {_quote_ident(sort_field)} {sort_direction}"
+    sql += " LIMIT %s OFFSET %s"
+    return sql
+
+
+async def search_data(
+    ctx: Context,
+    table_name: str,
+    search_term: Optional[str] = None,
+    search_fields: Optional[List[str]] = None,
+    filters: Optional[
+        List[Dict[str, Any]]
+    ] = None,  # Example: [{"field": "price", "op": ">", "value": 100}]
+    sort_by: Optional[
+        Dict[str, str]
+    ] = None,  # Example: {"field": "name", "direction": "asc"}
+    limit: int = 10,
+    offset: int = 0,
+    format: str = "objects",
+) -> Dict[str, Any]:
+    """
+    Searches data in the specified table of the connected database.
+    search_term is matched (case-insensitively, via LIKE) against
+    search_fields; filters are {"field", "op", "value"} conditions.
+    limit is capped by the server's max_rows setting; "truncated" is true when
+    a row or response-size cap cut the page short.
+    format: "objects" (default), "compact", "columnar", "csv" or "arrow".
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, MySQLAppContext) or not lifespan_ctx.db_pool:
+        return {"error": "MySQL connection pool not available."}
+    limits = lifespan_ctx.limits
+
+    if not _IDENTIFIER.match(table_name):
+        return {"error": "Invalid table name."}
+    format_error = check_format(format)
+    if format_error:
+        return format_error
+
+    valid_search_fields = tuple(
+        field for field in (search_fields or []) if _IDENTIFIER.match(field)
+    )
+    query_params: List[Any] = []
+    if search_term and valid_search_fields:
+        query_params.extend([f"%{search_term}%"] * len(valid_search_fields))
+    else:
+        valid_search_fields = ()
+
+    filter_shape = []
+    for f in filters or []:
+        op = str(f.get("op", "")).upper()
+        if not _IDENTIFIER.match(str(f.get("field", ""))) or op not in _FILTER_OPERATORS:
+            return {
+                "error": f"Invalid filter {f!r}. Fields must be plain identifiers and op one of {sorted(_FILTER_OPERATORS)}."
+            }
+        filter_shape.append((f["field"], op))
+        query_params.append(f["value"])
+
+    sort_field, sort_direction = None, "ASC"
+    if sort_by:
+        sort_field = sort_by.get("field", "")
+        sort_direction = sort_by.get("direction", "asc").upper()
+        if not _IDENTIFIER.match(sort_field) or sort_direction not in ("ASC", "DESC"):
+            return {"error": "Invalid sort_by; use a plain identifier field and asc/desc."}
+
+    sql = _search_sql(
+        table_name, valid_search_fields, tuple(filter_shape), sort_field, sort_direction
+    )
+    capped_limit = limits.clamp_rows(limit)
+    query_params.extend([capped_limit, offset])
+
+    result_cache = lifespan_ctx.result_cache
+    if result_cache.enabled:
+        cache_key = result_cache_key("search_data", sql, query_params + [limit, format])
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    try:
+        async with lifespan_ctx.db_pool.acquire() as conn:
+            columns, rows, truncated = await _fetch_streamed(
+                conn, limits, sql, query_params, max_rows=0
+            )
+    except Exception as e:
+        if _is_timeout(e):
+            return _timeout_error(limits)
+        print(f"Error in search_data: {e}")
+        return {"error": f"Database query failed: {type(e).__name__}"}
+    truncated = truncated or (capped_limit < limit and len(rows) == capped_limit)
+    result = {**encode_rows(columns, rows, format), "truncated": truncated}
+    if result_cache.enabled:
+        result_cache.set(cache_key, result, [table_name.lower()])
+    return result
+
+
+async def execute_raw_sql(
+    ctx: Context,
+    query: str,
+    params: Optional[List[Any]] = None,
+    page_size: Optional[int] = None,
+    format: str = "objects",
+) -> Dict[str, Any]:
+    """
+    [!] SECURITY WARNING [!] Executes a raw SQL query.
+    Use with extreme caution and only with trusted, validated queries and a read-only DB user.
+    Only SELECT statements are tentatively permitted by a basic check.
+    Parameters use %s placeholders. Rows are streamed from an unbuffered
+    server-side result. Pass page_size to return only the first page, along
+    with a next_page_token for fetch_next_page.
+    Results are capped by the server's max_rows / max_response_bytes settings
+    ("truncated" is true when a cap was hit) and by its statement timeout.
+    format: "objects" (default), "compact", "columnar", "csv" or "arrow".
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, MySQLAppContext) or not lifespan_ctx.db_pool:
+        return {"error": "MySQL connection pool not available."}
+    limits = lifespan_ctx.limits
+    format_error = check_format(format)
+    if format_error:
+        return format_error
+    check_error = check_raw_select(query)
+    if check_error:
+        return check_error
+
+    if page_size is not None:
+        if page_size < 1:
+            return {"error": "page_size must be a positive integer."}
+        if not lifespan_ctx.cursors.has_capacity():
+            return {
+                "error": "Too many open result cursors. Page through or wait for idle ones to expire."
+            }
+        print(f"Opening cursor for RAW SQL (with caution): {query}, params: {params}")
+        cursor = _MySQLHeldCursor(
+            lifespan_ctx.db_pool, limits.clamp_rows(page_size), limits, format
+        )
+        try:
+            await cursor.open(query, params)
+            rows, token = await open_page(lifespan_ctx.cursors, cursor)
+        except Exception as e:
+            await cursor.close()
+            return _query_error(e, limits, "execute_raw_sql")
+        return cursor.encode_page(rows, token)
+
+    result_cache = lifespan_ctx.result_cache
+    if result_cache.enabled:
+        cache_key = result_cache_key("execute_raw_sql", query, [params, format])
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    try:
+        async with lifespan_ctx.db_pool.acquire() as conn:
+            print(f"Executing RAW SQL (with caution): {query}, params: {params}")
+            columns, rows, truncated = await _fetch_streamed(
+                conn, limits, query, params, max_rows=limits.max_rows
+            )
+    except Exception as e:
+        return _query_error(e, limits, "execute_raw_sql")
+    result = {**encode_rows(columns, rows, format), "truncated": truncated}
+    if result_cache.enabled:
+        result_cache.set(cache_key, result, referenced_tables(query))
+    return result
+
+
+async def fetch_next_page(ctx: Context, page_token: str) -> Dict[str, Any]:
+    """
+    Fetches the next page of a result opened with execute_raw_sql(page_size=...).
+    The returned next_page_token is null once the result is exhausted.
+    Cursors left idle for too long are closed and their tokens expire.
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, MySQLAppContext) or not lifespan_ctx.db_pool:
+        return {"error": "MySQL connection pool not available."}
+
+    try:
+        page = await next_page(lifespan_ctx.cursors, page_token)
+    except Exception as e:
+        if _is_timeout(e):
+            return _timeout_error(lifespan_ctx.limits)
+        print(f"Error in fetch_next_page: {e}")
+        return {"error": f"Fetching next page failed: {type(e).__name__}"}
+    if page is None:
+        return {"error": "Unknown or expired page token."}
+    cursor, rows, token = page
+    return cursor.encode_page(rows, token)
+
+
+async def get_cache_stats(ctx: Context) -> Dict[str, Any]:
+    """Reports hit/miss counters and sizes of the schema and query result caches."""
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, MySQLAppContext):
+        return {"error": "MySQL context not available."}
+    return {
+        "schema_cache": lifespan_ctx.schema_cache.stats(),
+        "result_cache": lifespan_ctx.result_cache.stats(),
+    }
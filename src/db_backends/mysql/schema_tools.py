@@ -0,0 +1,179 @@
+from typing import Any, Dict, List, Optional
+
+from mcp.server.fastmcp import Context
+
+from .lifespan import MySQLAppContext
+
+# Results of the tools below are cached on lifespan_ctx.schema_cache and
+# expire by TTL (MySQL has no DDL notifications to invalidate them early).
+# information_schema column names are aliased because MySQL 8 returns them
+# in upper case.
+
+
+async def list_available_databases(ctx: Context) -> Dict[str, Any]:
+    """Lists the databases (schemas) the connected user can see."""
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, MySQLAppContext) or not lifespan_ctx.db_pool:
+        return {"error": "MySQL connection pool not available."}
+
+    cache_key = ("list_available_databases",)
+    cached = lifespan_ctx.schema_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    query = """
+        SELECT schema_name AS name FROM information_schema.schemata
+        ORDER BY schema_name
+    """
+    try:
+        async with lifespan_ctx.db_pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query)
+                rows = await cursor.fetchall()
+        database_names = [row[0] for row in rows]
+        result = {"databases": database_names, "count": len(database_names)}
+        lifespan_ctx.schema_cache.set(cache_key, result)
+        return result
+    except Exception as e:
+        print(f"Error in list_available_databases: {e}")
+        return {"error": f"An error occurred: {type(e).__name__}"}
+
+
+async def list_database_objects(
+    ctx: Context,
+    schema_name: Optional[str] = None,
+    object_types: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Lists tables and views within a database (schema_name); defaults to the
+    database named in the connection URL.
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, MySQLAppContext) or not lifespan_ctx.db_pool:
+        return {"error": "MySQL connection pool not available."}
+
+    if object_types is None:
+        object_types = ["BASE TABLE", "VIEW"]
+
+    # Basic validation for object_types
+    valid_object_types = ["BASE TABLE", "VIEW"]
+    for obj_type in object_types:
+        if obj_type.upper() not in valid_object_types:
+            return {
+                "error": f"Invalid object_type '{obj_type}'. Valid types are: {valid_object_types}."
+            }
+    schema_name = schema_name or lifespan_ctx.database
+    if not schema_name:
+        return {"error": "No schema_name given and the connection URL names no database."}
+
+    cache_key = ("list_database_objects", schema_name, tuple(object_types))
+    cached = lifespan_ctx.schema_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    placeholders = ", ".join(["%s"] * len(object_types))
+    query = f"""
+        SELECT table_name AS name, table_schema AS db, table_type AS type
+        FROM information_schema.tables
+        WHERE table_schema = %s AND table_type IN ({placeholders})
+        ORDER BY table_schema, table_type, table_name
+    """
+    try:
+        async with lifespan_ctx.db_pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    query, (schema_name, *[t.upper() for t in object_types])
+                )
+                rows = await cursor.fetchall()
+        db_objects = [{"name": r[0], "schema": r[1], "type": r[2]} for r in rows]
+        result = {"objects": db_objects}
+        lifespan_ctx.schema_cache.set(cache_key, result)
+        return result
+    except Exception as e:
+        print(f"Error in list_database_objects: {e}")
+        return {"error": f"An error occurred: {type(e).__name__}"}
+
+
+async def fetch_object_columns(
+    lifespan_ctx: MySQLAppContext, object_name: str, schema_name: Optional[str] = None
+) -> Dict[str, Any]:
+    """Catalog lookup behind get_object_columns. Cached on lifespan_ctx.schema_cache."""
+    schema_name = schema_name or lifespan_ctx.database
+    if not schema_name:
+        return {"error": "No schema_name given and the connection URL names no database."}
+    cache_key = ("get_object_columns", schema_name, object_name)
+    cached = lifespan_ctx.schema_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    query = """
+        SELECT c.column_name AS name, c.data_type AS data_type,
+               c.column_type AS column_type, c.is_nullable AS is_nullable,
+               c.column_default AS column_default,
+               c.character_maximum_length AS char_max_len,
+               c.numeric_precision AS num_precision, c.numeric_scale AS num_scale,
+               pk.seq_in_index AS pk_position
+        FROM information_schema.columns c
+        LEFT JOIN information_schema.statistics pk
+          ON pk.table_schema = c.table_schema AND pk.table_name = c.table_name
+         AND pk.column_name = c.column_name AND pk.index_name = 'PRIMARY'
+        WHERE c.table_schema = %s AND c.table_name = %s
+        ORDER BY c.ordinal_position
+    """
+    async with lifespan_ctx.db_pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(query, (schema_name, object_name))
+            rows = await cursor.fetchall()
+    if not rows:
+        return {
+            "error": f"Object '{schema_name}.{object_name}' not found or has no columns."
+        }
+
+    columns_info = []
+    for (
+        name,
+        data_type,
+        column_type,
+        is_nullable,
+        default,
+        char_max_len,
+        num_precision,
+        num_scale,
+        pk_position,
+    ) in rows:
+        col = {
+            "name": name,
+            "data_type": data_type,
+            "column_type": column_type,
+            "is_nullable": is_nullable.upper() == "YES",
+            "is_primary_key": pk_position is not None,
+            "default": default,
+        }
+        if char_max_len is not None:
+            col["char_max_len"] = char_max_len
+        if num_precision is not None:
+            col["num_precision"] = num_precision
+        if num_scale is not None:
+            col["num_scale"] = num_scale
+        columns_info.append(col)
+    primary_key = [
+        row[0] for row in sorted((r for r in rows if r[8] is not None), key=lambda r: r[8])
+    ]
+    result = {"columns": columns_info, "primary_key": primary_key}
+    lifespan_ctx.schema_cache.set(cache_key, result)
+    return result
+
+
+async def get_object_columns(
+    ctx: Context, object_name: str, schema_name: Optional[str] = None
+) -> Dict[str, Any]:
+    """Retrieves column information, including the primary key, for a specified table or view."""
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, MySQLAppContext) or not lifespan_ctx.db_pool:
+        return {"error": "MySQL connection pool not available."}
+
+    try:
+        return await fetch_object_columns(lifespan_ctx, object_name, schema_name)
+    except Exception as e:
+        print(f"Error in get_object_columns: {e}")
+        return {"error": f"An error occurred: {type(e).__name__}"}
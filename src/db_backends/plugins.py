@@ -0,0 +1,127 @@
+"""
+Backend manifests: each backend package declares, in its ``__init__``, a
+``MANIFEST`` naming its lifespan, its tools and the drivers it needs, as
+"module:attribute" strings. Nothing is imported until it is asked for, so
+choosing a backend or listing its tools costs no driver import.
+
+Third-party backends register a BackendManifest under the
+``querycraft.backends`` entry point group.
+"""
+
+import importlib
+import importlib.util
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+ENTRY_POINT_GROUP = "querycraft.backends"
+BUILTIN_BACKENDS = ("postgres", "sqlite", "mysql", "mariadb")
+
+
+@dataclass(frozen=True)
+class BackendManifest:
+    name: str
+    package: str  # import path the "module:attribute" targets are relative to
+    tools: Dict[str, str]  # tool name -> "module:function"
+    lifespan: str = "lifespan:app_lifespan"
+    drivers: Tuple[str, ...] = ()  # top-level modules the backend needs at runtime
+    url_schemes: Tuple[str, ...] = ()  # for DATA_SOURCES URLs
+    label: str = ""
+    shared_calls: Tuple[str, ...] = ()  # read-only tools identical concurrent calls may share
+    light_tools: Tuple[str, ...] = ()  # cheap metadata tools the admission queue serves first
+
+    def _resolve(self, target: str) -> Any:
+        module, _, attribute = target.partition(":")
+        return getattr(importlib.import_module(f"{self.package}.{module}"), attribute)
+
+    def missing_drivers(self) -> List[str]:
+        """Drivers that are not installed; checked without importing them."""
+        return [d for d in self.drivers if importlib.util.find_spec(d) is None]
+
+    def load_lifespan(self) -> Callable:
+        return self._resolve(self.lifespan)
+
+    def load_tools(self) -> Dict[str, Callable]:
+        return {name: self._resolve(target) for name, target in self.tools.items()}
+
+    def export(self, name: str) -> Any:
+        """Module __getattr__ for the backend package: lazy re-exports of its tools and lifespan."""
+        if name in self.tools:
+            return self._resolve(self.tools[name])
+        if name == self.lifespan.partition(":")[2]:
+            return self.load_lifespan()
+        raise AttributeError(f"module '{self.package}' has no attribute '{name}'")
+
+
+_manifests: Dict[str, BackendManifest] = {}
+_entry_points_loaded = False
+
+
+def _load_entry_points() -> None:
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            manifest = entry_point.load()
+        except Exception as e:
+            print(f"WARN: Backend plugin '{entry_point.name}' could not be loaded: {e}")
+            continue
+        _manifests.setdefault(manifest.name, manifest)
+
+
+def get_manifest(name: str) -> Optional[BackendManifest]:
+    """A built-in backend's manifest, else one registered through entry points."""
+    if name not in _manifests:
+        if name in BUILTIN_BACKENDS:
+            _manifests[name] = importlib.import_module(f"src.db_backends.{name}").MANIFEST
+        else:
+            _load_entry_points()
+    return _manifests.get(name)
+
+
+def all_manifests() -> List[BackendManifest]:
+    for name in BUILTIN_BACKENDS:
+        get_manifest(name)
+    _load_entry_points()
+    return list(_manifests.values())
+
+
+def agreed_tools(manifests: Iterable[BackendManifest], attribute: str) -> Set[str]:
+    """
+    Tools listed in the tuple ``attribute`` (e.g. "shared_calls") by every
+    manifest that implements them. In sources mode one tool serves several
+    backends, so any one of them can leave it out.
+    """
+    listed: Set[str] = set()
+    left_out: Set[str] = set()
+    for manifest in manifests:
+        names = getattr(manifest, attribute)
+        listed.update(names)
+        left_out.update(name for name in manifest.tools if name not in names)
+    return listed - left_out
+
+
+def backend_for_scheme(scheme: str) -> Optional[str]:
+    for manifest in all_manifests():
+        if scheme in manifest.url_schemes:
+            return manifest.name
+    return None
+
+
+class LazyModule:
+    """
+    Stands in for a driver module and imports it on first attribute access,
+    so a backend's modules load without paying for the driver until its
+    lifespan connects. Annotations naming driver types must be strings.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute: str) -> Any:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
@@ -1,7 +1,45 @@
-from .lifespan import app_lifespan
-from .query_tools import execute_raw_sql, search_data
-from .schema_tools import (
-    get_object_columns,
-    list_available_databases,
-    list_database_objects,
+from ..plugins import BackendManifest
+
+MANIFEST = BackendManifest(
+    name="postgres",
+    label="PostgreSQL",
+    package=__name__,
+    drivers=("asyncpg",),
+    url_schemes=("postgres", "postgresql"),
+    tools={
+        "list_available_databases": "schema_tools:list_available_databases",
+        "list_database_objects": "schema_tools:list_database_objects",
+        "get_object_columns": "schema_tools:get_object_columns",
+        "profile_table": "schema_tools:profile_table",
+        "search_data": "query_tools:search_data",
+        "create_search_index": "text_search:create_search_index",
+        "execute_raw_sql": "query_tools:execute_raw_sql",
+        "execute_batch": "query_tools:execute_batch",
+        "fetch_next_page": "query_tools:fetch_next_page",
+        "export_query": "query_tools:export_query",
+        "import_rows": "query_tools:import_rows",
+        "get_cache_stats": "query_tools:get_cache_stats",
+    },
+    # Read-only tools: identical concurrent calls share one execution.
+    shared_calls=(
+        "list_available_databases",
+        "list_database_objects",
+        "get_object_columns",
+        "profile_table",
+        "search_data",
+        "execute_raw_sql",
+        "execute_batch",
+    ),
+    # Cheap metadata tools: served ahead of queued queries.
+    light_tools=(
+        "list_available_databases",
+        "list_database_objects",
+        "get_object_columns",
+        "get_cache_stats",
+    ),
 )
+
+
+def __getattr__(name):
+    # Tools and app_lifespan are imported on first access, not with the package.
+    return MANIFEST.export(name)
@@ -0,0 +1,84 @@
+import json
+from typing import Any, Dict, List, Optional
+
+# Nodes that consume all of their input before returning a row, so a Limit
+# above them does not cut the scans below short.
+_BLOCKING_NODES = {"Sort", "Aggregate", "Hash", "SetOp", "WindowAgg", "Gather Merge"}
+_MAX_OUTLINE_LINES = 40
+
+
+def _is_full_scan(node: Dict[str, Any]) -> bool:
+    if node["Node Type"] == "Seq Scan":
+        return True
+    # An index walked end to end (e.g. to return rows in order) reads the whole table too.
+    return node["Node Type"] in ("Index Scan", "Index Only Scan") and "Index Cond" not in node
+
+
+def _walk(
+    node: Dict[str, Any],
+    depth: int,
+    under_limit: bool,
+    scans: List[Dict[str, Any]],
+    outline: List[str],
+) -> None:
+    node_type = node["Node Type"]
+    relation = node.get("Relation Name")
+    table = f"{node['Schema']}.{relation}" if relation and "Schema" in node else relation
+    line = "  " * depth + node_type
+    if table:
+        line += f" on {table}"
+    if node.get("Index Name"):
+        line += f" using {node['Index Name']}"
+    outline.append(f"{line} (rows={node.get('Plan Rows')}, cost={node.get('Total Cost')})")
+    if table and not under_limit and _is_full_scan(node):
+        scans.append({"table": table, "rows": node.get("Plan Rows")})
+
+    if node_type == "Limit":
+        under_limit = True
+    elif node_type in _BLOCKING_NODES:
+        under_limit = False
+    for child in node.get("Plans", []):
+        _walk(child, depth + 1, under_limit, scans, outline)
+
+
+async def explain_summary(
+    conn, query: str, params: List[Any], timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Plans ``query`` with EXPLAIN (FORMAT JSON) and summarizes it for the cost
+    guard. Full scans report the table's size from pg_class.reltuples rather
+    than the scan's (filtered) output estimate.
+    """
+    raw = await conn.fetchval(
+        f"EXPLAIN (FORMAT JSON, VERBOSE) {query}", *params, timeout=timeout
+    )
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+    scans: List[Dict[str, Any]] = []
+    outline: List[str] = []
+    _walk(plan, 0, False, scans, outline)
+
+    if scans:
+        sizes = await conn.fetch(
+            """
+            SELECT t.name, c.reltuples
+            FROM unnest($1::text[]) AS t(name)
+            JOIN pg_class c ON c.oid = to_regclass(quote_ident(split_part(t.name, '.', 1))
+                                                   || '.' || quote_ident(split_part(t.name, '.', 2)))
+            """,
+            list({scan["table"] for scan in scans if "." in scan["table"]}),
+            timeout=timeout,
+        )
+        reltuples = {row["name"]: row["reltuples"] for row in sizes}
+        for scan in scans:
+            # reltuples is -1 until the table is first vacuumed or analyzed.
+            if reltuples.get(scan["table"], -1) >= 0:
+                scan["rows"] = max(scan["rows"] or 0, reltuples[scan["table"]])
+
+    if len(outline) > _MAX_OUTLINE_LINES:
+        outline = outline[:_MAX_OUTLINE_LINES] + [f"... {len(outline) - _MAX_OUTLINE_LINES} more nodes"]
+    return {
+        "estimated_cost": plan.get("Total Cost"),
+        "estimated_rows": plan.get("Plan Rows"),
+        "full_scans": scans,
+        "plan": outline,
+    }
@@ -1,29 +1,283 @@
+import asyncio
 import os
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 
-import asyncpg
 from mcp.server.fastmcp import FastMCP
 
+from ..common.cache import TTLCache
+from ..common.cost_guard import CostGuard
+from ..common.cursors import CursorRegistry
+from ..common.export import ExportSettings
+from ..common.ingest import ImportSettings
+from ..common.limits import QueryLimits
+from ..common.metrics import METRICS, PoolMonitor
+from ..common.result_cache import ResultCache
+from ..plugins import LazyModule
+from .listener import PostgresNotificationListener
+from .replicas import Replica, ReplicaRouter, connect_errors, connection_lost
+
+asyncpg = LazyModule("asyncpg")
+
 
 @dataclass
 class PostgresAppContext:
-    db_pool: asyncpg.Pool
+    db_pool: "asyncpg.Pool"
+    cursors: CursorRegistry = field(default_factory=CursorRegistry)
+    limits: QueryLimits = field(default_factory=QueryLimits)
+    schema_cache: TTLCache = field(default_factory=TTLCache)
+    result_cache: ResultCache = field(default_factory=ResultCache)
+    cost_guard: CostGuard = field(default_factory=CostGuard)
+    text_search_config: str = "simple"  # regconfig of search_data's fulltext mode
+    allow_index_ddl: bool = False  # create_search_index may run CREATE INDEX
+    exports: ExportSettings = field(default_factory=ExportSettings)
+    imports: ImportSettings = field(default_factory=ImportSettings)
+    pool_monitor: Optional[PoolMonitor] = None
+    replicas: Optional[ReplicaRouter] = None
+
+    def __post_init__(self):
+        if self.pool_monitor is None:
+            self.pool_monitor = PoolMonitor(self.db_pool)
+
+    def connection(self):
+        """Pooled primary connection for ``async with``; waits feed the pool gauges."""
+        return self.pool_monitor.connection()
+
+    @asynccontextmanager
+    async def read_connection(self):
+        """
+        Connection for read-only work: the least busy healthy replica when
+        replicas are configured, else (or if it cannot be reached) the primary.
+        """
+        replica = self.replicas.pick() if self.replicas else None
+        if replica is not None:
+            try:
+                conn = await replica.monitor.acquire()
+            except asyncio.TimeoutError:
+                pass  # Busy rather than down: this read goes to the primary.
+            except connect_errors() as e:
+                replica.mark(False, type(e).__name__)
+            else:
+                try:
+                    yield conn
+                except Exception as e:
+                    if connection_lost(e, conn):
+                        replica.mark(False, type(e).__name__)
+                    raise
+                finally:
+                    await replica.monitor.release(conn)
+                return
+        async with self.connection() as conn:
+            yield conn
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    return float(value) or None  # 0 disables the limit
+
+
+def _pool_settings(server_settings: Dict[str, str]) -> Dict[str, Any]:
+    """asyncpg.create_pool keyword arguments from POSTGRES_POOL_* variables."""
+    return {
+        "min_size": int(os.environ.get("POSTGRES_POOL_MIN_SIZE", 1)),
+        "max_size": int(os.environ.get("POSTGRES_POOL_MAX_SIZE", 10)),
+        # Recycle a connection after this many queries (asyncpg's default).
+        "max_queries": int(os.environ.get("POSTGRES_POOL_MAX_QUERIES", 50000)),
+        # Close connections idle for longer than this many seconds (0 = never).
+        "max_inactive_connection_lifetime": float(
+            os.environ.get("POSTGRES_POOL_MAX_INACTIVE_LIFETIME", 300)
+        ),
+        # asyncpg's per-connection LRU of prepared statements, keyed on SQL text.
+        "statement_cache_size": int(
+            os.environ.get("POSTGRES_STATEMENT_CACHE_SIZE", 100)
+        ),
+        "server_settings": server_settings,
+    }
+
+
+async def _prewarm(db_pool: "asyncpg.Pool", count: int) -> None:
+    """Opens at least ``count`` connections up front, running a trivial query on each."""
+    count = min(count, db_pool.get_max_size())
+    if count <= 0:
+        return
+    acquired = await asyncio.gather(
+        *(db_pool.acquire() for _ in range(count)), return_exceptions=True
+    )
+    conns = [conn for conn in acquired if not isinstance(conn, BaseException)]
+    try:
+        # Raised after the finally hands back the connections that were acquired,
+        # so a failed prewarm leaves the pool closable.
+        for result in acquired:
+            if isinstance(result, BaseException):
+                raise result
+        await asyncio.gather(*(conn.fetchval("SELECT 1") for conn in conns))
+    finally:
+        for conn in conns:
+            await db_pool.release(conn)
 
 
 @asynccontextmanager
-async def app_lifespan(server: FastMCP) -> AsyncIterator[PostgresAppContext]:
+async def app_lifespan(
+    server: FastMCP,
+    db_url: Optional[str] = None,
+    replica_urls: Optional[List[str]] = None,
+    pool_name: str = "postgres",
+) -> AsyncIterator[PostgresAppContext]:
+    """
+    db_url / replica_urls override POSTGRES_DATABASE_URL / POSTGRES_REPLICA_URLS
+    (used for named data sources); pool_name labels the pools in metrics.
+    """
     db_pool = None
-    db_url = os.environ.get("POSTGRES_DATABASE_URL")
+    cursors = None
+    listener = None
+    replicas = None
+    if db_url is None:
+        db_url = os.environ.get("POSTGRES_DATABASE_URL")
+        if replica_urls is None:
+            replica_urls = [
+                url.strip()
+                for url in os.environ.get("POSTGRES_REPLICA_URLS", "").split(",")
+                if url.strip()
+            ]
     if not db_url:
         raise ValueError("POSTGRES_DATABASE_URL not set.")
     try:
         print("PostgreSQL Lifespan: Connecting...")
-        db_pool = await asyncpg.create_pool(dsn=db_url, min_size=1, max_size=10)
-        print("PostgreSQL Lifespan: Connection pool established.")
-        yield PostgresAppContext(db_pool=db_pool)
+        limits = QueryLimits.from_env()
+        server_settings = {}
+        if limits.statement_timeout_ms:
+            # Set per connection at connect time, so queries need no extra round trip.
+            server_settings["statement_timeout"] = str(limits.statement_timeout_ms)
+        pool_settings = _pool_settings(server_settings)
+        acquire_timeout = _env_float("POSTGRES_POOL_ACQUIRE_TIMEOUT", 30.0)
+        prewarm = int(os.environ.get("POSTGRES_POOL_PREWARM", 0))
+        # Assigned before prewarming, so the finally below closes it if that fails.
+        db_pool = await asyncpg.create_pool(dsn=db_url, **pool_settings)
+        await _prewarm(db_pool, prewarm)
+        print(
+            f"PostgreSQL Lifespan: Connection pool established "
+            f"(min={pool_settings['min_size']}, max={pool_settings['max_size']}, "
+            f"warm={db_pool.get_size()})."
+        )
+
+        if replica_urls:
+            replicas = ReplicaRouter(
+                [],
+                health_interval=float(
+                    os.environ.get("POSTGRES_REPLICA_HEALTH_INTERVAL", 10)
+                ),
+            )
+            for i, url in enumerate(replica_urls):
+                name = f"replica{i}"
+                replica_pool = None
+                try:
+                    replica_pool = await asyncpg.create_pool(dsn=url, **pool_settings)
+                    await _prewarm(replica_pool, prewarm)
+                    up = True
+                except Exception as e:
+                    # Start it empty and down; the health check brings it up later.
+                    print(
+                        f"PostgreSQL Lifespan: Replica {name} unreachable ({type(e).__name__}: {e})."
+                    )
+                    if replica_pool is not None:
+                        # The pool connected but prewarming failed: close its connections
+                        # before replacing it.
+                        replica_pool.terminate()
+                    replica_pool = await asyncpg.create_pool(
+                        dsn=url, **{**pool_settings, "min_size": 0}
+                    )
+                    up = False
+                monitor = PoolMonitor(replica_pool, acquire_timeout)
+                monitor.up = up
+                replicas.replicas.append(Replica(name, url, monitor))
+                METRICS.watch_pool(f"{pool_name}_{name}", monitor)
+            replicas.start()
+            print(f"PostgreSQL Lifespan: Routing reads across replicas {replicas.status()}.")
+        # Paged results pin a pooled connection each, so keep this below max_size.
+        cursors = CursorRegistry(
+            idle_timeout=float(os.environ.get("QUERY_CURSOR_IDLE_TIMEOUT", 300)),
+            max_open=int(os.environ.get("QUERY_MAX_OPEN_CURSORS", 4)),
+        )
+        cursors.start()
+
+        schema_cache = TTLCache(
+            max_entries=int(os.environ.get("SCHEMA_CACHE_MAX_ENTRIES", 256)),
+            ttl=float(os.environ.get("SCHEMA_CACHE_TTL", 300)),
+        )
+        listener = PostgresNotificationListener(db_url)
+        schema_channel = os.environ.get(
+            "POSTGRES_SCHEMA_CHANNEL", "querycraft_schema_changed"
+        )
+        if schema_cache.enabled:
+            listener.subscribe(schema_channel, schema_cache.clear)
+            if os.environ.get("POSTGRES_INSTALL_SCHEMA_TRIGGER", "").lower() in (
+                "1",
+                "true",
+                "yes",
+            ):
+                try:
+                    await listener.install_schema_trigger(schema_channel)
+                    print("PostgreSQL Lifespan: Schema change event trigger installed.")
+                except Exception as e:
+                    print(
+                        f"PostgreSQL Lifespan: Could not install schema event trigger ({type(e).__name__}: {e})."
+                    )
+        cost_guard = CostGuard.from_env()
+        if cost_guard.enabled:
+            # Cached plans go stale with the schema, like the schema cache.
+            listener.subscribe(schema_channel, cost_guard.plans.clear)
+        result_cache = ResultCache.from_env()
+        if result_cache.enabled:
+            # Nothing notifies this channel by default: have write paths (e.g.
+            # table triggers) call pg_notify on it to drop cached results early.
+            listener.subscribe(
+                os.environ.get("QUERY_RESULT_CACHE_CHANNEL", "querycraft_data_changed"),
+                result_cache.clear,
+            )
+        try:
+            await listener.start()
+        except Exception as e:
+            # Caches still expire by TTL; they just won't see DDL until it connects.
+            print(f"PostgreSQL Lifespan: LISTEN connection failed ({type(e).__name__}: {e}); retrying in the background.")
+            listener.reconnect()
+
+        text_search_config = os.environ.get("POSTGRES_FTS_CONFIG", "simple")
+        if not text_search_config.replace("_", "").isalnum():
+            # It is spliced into the search SQL as a literal.
+            raise ValueError(f"Invalid POSTGRES_FTS_CONFIG '{text_search_config}'.")
+
+        pool_monitor = PoolMonitor(db_pool, acquire_timeout)
+        METRICS.watch_pool(pool_name, pool_monitor)
+        yield PostgresAppContext(
+            db_pool=db_pool,
+            cursors=cursors,
+            limits=limits,
+            schema_cache=schema_cache,
+            result_cache=result_cache,
+            cost_guard=cost_guard,
+            text_search_config=text_search_config,
+            allow_index_ddl=os.environ.get("SEARCH_INDEX_DDL_ENABLED", "").lower()
+            in ("1", "true", "yes"),
+            exports=ExportSettings.from_env(),
+            imports=ImportSettings.from_env(),
+            pool_monitor=pool_monitor,
+            replicas=replicas,
+        )
     finally:
-        if db_pool:
+        METRICS.unwatch_pool(pool_name)
+        if listener:
+            await listener.close()
+        if cursors:
+            await cursors.close()
+        if replicas:
+            # After the cursors: held cursors may pin replica connections.
+            for replica in replicas.replicas:
+                METRICS.unwatch_pool(f"{pool_name}_{replica.name}")
+            await replicas.close()
+        if db_pool is not None:
             print("PostgreSQL Lifespan: Closing connection pool...")
             await db_pool.close()
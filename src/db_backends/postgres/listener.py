@@ -0,0 +1,123 @@
+import asyncio
+from typing import Callable, Dict, List, Optional
+
+from ..plugins import LazyModule
+
+asyncpg = LazyModule("asyncpg")
+
+# Reconnect backoff: doubles from the first delay up to the cap.
+_RECONNECT_FIRST_DELAY_S = 1.0
+_RECONNECT_MAX_DELAY_S = 60.0
+
+# Installed only when POSTGRES_INSTALL_SCHEMA_TRIGGER is set; needs superuser.
+_SCHEMA_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION querycraft_notify_schema_change()
+RETURNS event_trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('{channel}', tg_tag);
+END
+$$;
+DROP EVENT TRIGGER IF EXISTS querycraft_schema_change;
+CREATE EVENT TRIGGER querycraft_schema_change ON ddl_command_end
+    EXECUTE FUNCTION querycraft_notify_schema_change();
+"""
+
+
+class PostgresNotificationListener:
+    """
+    Owns one dedicated (non-pooled) connection that LISTENs on a set of
+    channels and calls back on every notification. If the connection is lost
+    every callback is fired once, so caches fail safe instead of going stale,
+    and the listener reconnects in the background with exponential backoff,
+    firing the callbacks again once it is back for anything sent meanwhile.
+    """
+
+    def __init__(self, dsn: str):
+        self._dsn = dsn
+        self._conn = None
+        self._callbacks: Dict[str, List[Callable[[], None]]] = {}
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def subscribe(self, channel: str, callback: Callable[[], None]) -> None:
+        self._callbacks.setdefault(channel, []).append(callback)
+
+    def _on_notification(self, conn, pid, channel, payload) -> None:
+        for callback in self._callbacks.get(channel, []):
+            callback()
+
+    def _fire_all(self) -> None:
+        for callbacks in self._callbacks.values():
+            for callback in callbacks:
+                callback()
+
+    def _on_termination(self, conn) -> None:
+        print("PostgreSQL Listener: Connection lost; caches fall back to TTL expiry until it reconnects.")
+        self._conn = None
+        self._fire_all()
+        self.reconnect()
+
+    async def start(self) -> None:
+        if not self._callbacks:
+            return
+        conn = await asyncpg.connect(dsn=self._dsn)
+        try:
+            for channel in self._callbacks:
+                await conn.add_listener(channel, self._on_notification)
+        except BaseException:
+            await conn.close()
+            raise
+        conn.add_termination_listener(self._on_termination)
+        self._conn = conn
+        print(f"PostgreSQL Listener: Listening on {sorted(self._callbacks)}.")
+
+    def reconnect(self) -> None:
+        """Retries start() in the background until it succeeds or the listener is closed."""
+        if self._closed or not self._callbacks:
+            return
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = _RECONNECT_FIRST_DELAY_S
+        attempt = 0
+        while not self._closed:
+            await asyncio.sleep(delay)
+            attempt += 1
+            print(f"PostgreSQL Listener: Reconnecting (attempt {attempt})...")
+            try:
+                await self.start()
+            except Exception as e:
+                delay = min(delay * 2, _RECONNECT_MAX_DELAY_S)
+                print(
+                    f"PostgreSQL Listener: Reconnect attempt {attempt} failed "
+                    f"({type(e).__name__}: {e}); retrying in {delay:g} s."
+                )
+                continue
+            # Notifications sent while disconnected were missed.
+            self._fire_all()
+            return
+
+    async def install_schema_trigger(self, channel: str) -> None:
+        """Installs an event trigger that notifies ``channel`` after every DDL command."""
+        if not channel.replace("_", "").isalnum():
+            raise ValueError(f"Invalid notification channel name '{channel}'.")
+        conn = await asyncpg.connect(dsn=self._dsn)
+        try:
+            await conn.execute(_SCHEMA_TRIGGER_SQL.format(channel=channel))
+        finally:
+            await conn.close()
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            try:
+                await self._reconnect_task
+            except asyncio.CancelledError:
+                pass
+            self._reconnect_task = None
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            conn.remove_termination_listener(self._on_termination)
+            await conn.close()
@@ -1,8 +1,315 @@
-from typing import Any, Dict, List, Optional
+import asyncio
+import base64
+import binascii
+import functools
+import json
+import os
+import re
+import uuid
+from contextlib import AsyncExitStack
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from mcp.server.fastmcp import Context
 
+from ..common.batch import batch_response, gather_limited, parse_statements
+from ..common.cost_guard import with_warning
+from ..common.cursors import HeldCursor, next_page, open_page
+from ..common.export import ExportWriter, check_export, export_path
+from ..common.formats import check_format, encode_rows
+from ..common.ingest import (
+    Row,
+    batched,
+    check_import,
+    csv_header,
+    file_rows,
+    inline_rows,
+    open_text,
+    resolve_import_file,
+)
+from ..common.guards import check_raw_select
+from ..common.limits import QueryLimits, cap_rows
+from ..common.result_cache import referenced_tables, result_cache_key
+from ..plugins import LazyModule
 from ..postgres.lifespan import PostgresAppContext
+from .explain import explain_summary
+from .schema_tools import _quote_ident, _resolve_column, fetch_object_columns, resolve_relation
+from .text_search import SEARCH_MODES, canonical_fields, fts_document, fts_query
+
+asyncpg = LazyModule("asyncpg")
+
+
+async def _fetch_limited(
+    conn, limits: QueryLimits, query: str, params: List[Any], max_rows: int
+) -> Tuple[List["asyncpg.Record"], bool]:
+    """
+    Runs a query under the statement timeout. With max_rows, at most
+    max_rows + 1 rows (to detect truncation) are read through a cursor in a
+    read-only transaction, so an oversized result is never fully
+    materialized. Returns (rows, truncated).
+
+    The server-side statement_timeout is set once per pooled connection in
+    the lifespan; the asyncpg timeout= here is the client-side backstop.
+    """
+    timeout = limits.statement_timeout
+    if max_rows:
+        async with conn.transaction(readonly=True):
+            cursor = await conn.cursor(query, *params, timeout=timeout)
+            rows = await cursor.fetch(max_rows + 1, timeout=timeout)
+    else:
+        rows = await conn.fetch(query, *params, timeout=timeout)
+    return cap_rows(rows, max_rows, limits.max_response_bytes)
+
+
+def _columns(rows: List["asyncpg.Record"]) -> List[str]:
+    return list(rows[0].keys()) if rows else []
+
+
+def _timeout_error(limits: QueryLimits) -> Dict[str, Any]:
+    return {
+        "error": f"Query cancelled: exceeded the statement timeout of {limits.statement_timeout_ms} ms."
+    }
+
+
+def _raw_sql_error(
+    e: Exception, limits: QueryLimits, tool: str = "execute_raw_sql"
+) -> Dict[str, Any]:
+    if isinstance(e, (asyncpg.QueryCanceledError, asyncio.TimeoutError)):
+        return _timeout_error(limits)
+    print(f"Error in {tool}: {e}")
+    return {"error": f"Raw SQL execution failed: {type(e).__name__}"}
+
+
+async def _select_result(
+    conn, limits: QueryLimits, query: str, params: List[Any], format: str
+) -> Dict[str, Any]:
+    rows, truncated = await _fetch_limited(
+        conn, limits, query, params, max_rows=limits.max_rows
+    )
+    # For SELECT, fetch returns a list of Record objects.
+    return {
+        **encode_rows(_columns(rows), rows, format),
+        "truncated": truncated,
+    }
+
+
+async def _cost_check(
+    lifespan_ctx: PostgresAppContext, conn, query: str, params: List[Any]
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Runs the cost guard on ``conn``; returns (rejection, warning)."""
+
+    async def explain() -> Dict[str, Any]:
+        timeout = lifespan_ctx.limits.statement_timeout
+        if conn.is_in_transaction():
+            # A savepoint, so a failed EXPLAIN leaves the transaction usable.
+            async with conn.transaction():
+                return await explain_summary(conn, query, params, timeout)
+        return await explain_summary(conn, query, params, timeout)
+
+    return await lifespan_ctx.cost_guard.check(query, params, explain)
+
+
+async def _cached_raw_select(
+    lifespan_ctx: PostgresAppContext, query: str, params: List[Any], format: str
+) -> Dict[str, Any]:
+    """Runs an already-checked SELECT on a pooled connection, via the result cache."""
+    limits = lifespan_ctx.limits
+    result_cache = lifespan_ctx.result_cache
+    if result_cache.enabled:
+        cache_key = result_cache_key("execute_raw_sql", query, [params, format])
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    try:
+        async with lifespan_ctx.read_connection() as conn:
+            rejection, warning = await _cost_check(lifespan_ctx, conn, query, params)
+            if rejection:
+                return rejection
+            print(f"Executing RAW SQL (with caution): {query}, params: {params}")
+            result = with_warning(
+                await _select_result(conn, limits, query, params, format), warning
+            )
+    except Exception as e:
+        return _raw_sql_error(e, limits)
+    if result_cache.enabled:
+        result_cache.set(cache_key, result, referenced_tables(query))
+    return result
+
+
+async def _checked_raw_select(
+    lifespan_ctx: PostgresAppContext, query: str, params: List[Any], format: str
+) -> Dict[str, Any]:
+    return check_raw_select(query) or await _cached_raw_select(
+        lifespan_ctx, query, params, format
+    )
+
+
+class _PostgresHeldCursor(HeldCursor):
+    """A server-side cursor pinned to one pooled connection in a read-only transaction."""
+
+    def __init__(
+        self,
+        lifespan_ctx: PostgresAppContext,
+        page_size: int,
+        limits: QueryLimits,
+        format: str = "objects",
+    ):
+        super().__init__(page_size, max_bytes=limits.max_response_bytes)
+        self.format = format
+        self.columns: List[str] = []
+        self._lifespan_ctx = lifespan_ctx
+        self._limits = limits
+        # Holds the read connection until _close, wherever it was routed.
+        self._connection = AsyncExitStack()
+        self._conn = None
+        self._tr = None
+        self._in_transaction = False
+        self._cursor = None
+
+    async def open(self, query: str, params: List[Any]) -> None:
+        self._conn = await self._connection.enter_async_context(
+            self._lifespan_ctx.read_connection()
+        )
+        self._tr = self._conn.transaction(readonly=True)
+        await self._tr.start()
+        self._in_transaction = True
+        self._cursor = await self._conn.cursor(
+            query, *params, timeout=self._limits.statement_timeout
+        )
+
+    async def _fetch(self, n: int) -> List[Any]:
+        rows = await self._cursor.fetch(n, timeout=self._limits.statement_timeout)
+        self.columns = self.columns or _columns(rows)
+        return rows
+
+    def encode_page(self, rows: List[Any], token: Optional[str]) -> Dict[str, Any]:
+        return {
+            **encode_rows(self.columns, rows, self.format),
+            "next_page_token": token,
+            "truncated": self.truncated,
+        }
+
+    async def _close(self) -> None:
+        if self._conn is None:
+            return
+        self._conn = None
+        try:
+            if self._in_transaction:
+                await self._tr.rollback()
+        finally:
+            await self._connection.aclose()
+
+
+_FILTER_OPERATORS = frozenset(
+    {"=", "!=", "<>", "<", "<=", ">", ">=", "LIKE", "ILIKE", "NOT LIKE", "NOT ILIKE"}
+)
+
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _quote_type(udt_name: str) -> str:
+    schema, _, name = udt_name.partition(".")
+    return f"{_quote_ident(schema)}.{_quote_ident(name)}"
+
+
+def _encode_keyset_cursor(values: List[Any]) -> str:
+    # Values travel as text and are cast back to the column type in SQL.
+    payload = json.dumps([None if v is None else str(v) for v in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_keyset_cursor(cursor: str, n_columns: int) -> List[Optional[str]]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        raise ValueError("Malformed cursor.") from None
+    if not isinstance(values, list) or len(values) != n_columns:
+        raise ValueError("Cursor does not match this search's sort columns.")
+    return values
+
+
+@lru_cache(maxsize=int(os.environ.get("POSTGRES_SEARCH_SHAPE_CACHE_SIZE", 512)))
+def _search_sql(
+    schema_name: str,
+    table_name: str,
+    search_fields: Tuple[str, ...],
+    filter_shape: Tuple[Tuple[str, str], ...],
+    sort_field: Optional[str],
+    sort_direction: str,
+    keyset: Tuple[Tuple[str, str], ...] = (),
+    after_cursor: bool = False,
+    search_mode: str = "substring",
+    text_search_config: str = "simple",
+) -> str:
+    """
+    Builds the canonical SQL for one search_data statement shape.
+
+    Identical shapes always produce byte-identical SQL, so asyncpg's
+    per-connection prepared statement cache (bounded by
+    POSTGRES_STATEMENT_CACHE_SIZE, dropped with the connection) serves
+    repeat searches without re-parsing or re-planning them.
+
+    With ``keyset`` ((column, type) pairs: sort column then primary key) the
+    statement seeks past the cursor row with a row comparison instead of
+    using OFFSET, and takes only a LIMIT parameter.
+
+    The "fulltext" and "trigram" search modes add a search_rank column and,
+    without a sort field, order by it (best match first).
+
+    Every identifier is a catalog name (see search_data) and is quoted, so
+    each mode resolves a field to the same column.
+    """
+    where_clauses = []
+    param_idx = 1
+    rank = None
+    if search_fields:
+        search_fields = tuple(_quote_ident(field) for field in search_fields)
+        # One parameter for the term, shared by every searched field.
+        if search_mode == "fulltext":
+            # Parses to the same expression create_search_index indexes.
+            document = fts_document(search_fields, text_search_config)
+            query = fts_query(text_search_config)
+            where_clauses.append(f"{document} @@ {query}")
+            rank = f"ts_rank({document}, {query})"
+        elif search_mode == "trigram":
+            clauses = [f"{field} % $1" for field in search_fields]
+            where_clauses.append(f"({' OR '.join(clauses)})")
+            similarities = [f"similarity({field}, $1)" for field in search_fields]
+            rank = similarities[0] if len(similarities) == 1 else f"GREATEST({', '.join(similarities)})"
+        else:
+            clauses = [f"{field} ILIKE $1" for field in search_fields]
+            where_clauses.append(f"({' OR '.join(clauses)})")
+        param_idx += 1
+    for field, op in filter_shape:
+        where_clauses.append(f"{_quote_ident(field)} {op} ${param_idx}")
+        param_idx += 1
+    if keyset and after_cursor:
+        columns = ", ".join(_quote_ident(col) for col, _ in keyset)
+        values = []
+        for _, udt_name in keyset:
+            values.append(f"${param_idx}::text::{_quote_type(udt_name)}")
+            param_idx += 1
+        comparison = "<" if sort_direction == "DESC" else ">"
+        where_clauses.append(f"({columns}) {comparison} ({', '.join(values)})")
+
+    columns = f"*, {rank} AS search_rank" if rank else "*"
+    sql = f"SELECT {columns} FROM {_quote_ident(schema_name)}.{_quote_ident(table_name)}"
+    if where_clauses:
+        sql += " WHERE " + " AND ".join(where_clauses)
+    if keyset:
+        order = ", ".join(f"{_quote_ident(col)} {sort_direction}" for col, _ in keyset)
+        sql += f" ORDER BY {order} LIMIT ${param_idx}"
+        return sql
+    if sort_field:
+        sql += f" ORDER BY {_quote_ident(sort_field)} {sort_direction}"
+    elif rank:
+        sql += " ORDER BY search_rank DESC"
+    sql += f" LIMIT ${param_idx} OFFSET ${param_idx + 1}"
+    return sql
 
 
 async def search_data(
@@ -18,114 +325,589 @@ async def search_data(
     ] = None,  # Example: {"field": "name", "direction": "asc"}
     limit: int = 10,
     offset: int = 0,
+    pagination: str = "offset",
+    cursor: Optional[str] = None,
+    format: str = "objects",
+    search_mode: str = "substring",
 ) -> Dict[str, Any]:
     """
     Searches data in the specified table.
     (Simplified: add proper filter and sort construction based on your needs)
+    limit is capped by the server's max_rows setting; "truncated" is true when
+    a row or response-size cap cut the result short.
+    pagination="keyset" pages by (sort_by field, primary key) instead of
+    OFFSET, so deep pages stay fast: pass the returned next_cursor as cursor
+    to get the next page (next_cursor is null on the last page). The sort
+    field should be NOT NULL for keyset paging to be exact.
+    format: "objects" (default, list of dicts), "compact" (columns + row
+    arrays), "columnar" (column -> values), "csv" or "arrow" (base64 blobs).
+    search_mode: how search_term matches search_fields.
+      "substring" (default): case-insensitive substring (ILIKE '%term%').
+      "fulltext": word search with web-style syntax ("phrase", or, -word),
+        ranked; fast with create_search_index(kind="fulltext") on the same fields.
+      "trigram": fuzzy similarity (pg_trgm), ranked; fast with
+        create_search_index(kind="trigram"), which also speeds up "substring".
+    Ranked modes return a search_rank column and, without sort_by, best matches first.
     """
     lifespan_ctx = ctx.request_context.lifespan_context
     if not isinstance(lifespan_ctx, PostgresAppContext) or not lifespan_ctx.db_pool:
         return {"error": "PostgreSQL connection pool not available."}
-    db_pool = lifespan_ctx.db_pool
+    limits = lifespan_ctx.limits
 
     if not table_name.isalnum():  # Basic sanitization
         return {"error": "Invalid table name."}
+    if search_mode not in SEARCH_MODES:
+        return {"error": f"search_mode must be one of {list(SEARCH_MODES)}."}
+    format_error = check_format(format)
+    if format_error:
+        return format_error
 
-    query_params = []
-    where_clauses = []
-    param_idx = 1
+    # Reduce the request to its statement shape; values only ever become params.
+    search_fields = [field for field in (search_fields or []) if field.isalnum()]  # Basic sanitization
+    for f in filters or []:
+        op = str(f.get("op", "")).upper()
+        if not _IDENTIFIER.match(str(f.get("field", ""))) or op not in _FILTER_OPERATORS:
+            return {
+                "error": f"Invalid filter {f!r}. Fields must be plain identifiers and op one of {sorted(_FILTER_OPERATORS)}."
+            }
+    sort_field, sort_direction = None, "ASC"
+    if sort_by:
+        sort_field = sort_by.get("field", "")
+        sort_direction = sort_by.get("direction", "asc").upper()
+        if not _IDENTIFIER.match(sort_field) or sort_direction not in ("ASC", "DESC"):
+            return {"error": "Invalid sort_by; use a plain identifier field and asc/desc."}
+    if pagination not in ("offset", "keyset"):
+        return {"error": "pagination must be 'offset' or 'keyset'."}
+    if pagination == "keyset" and offset:
+        return {"error": "offset cannot be used with keyset pagination; pass cursor."}
 
-    if search_term and search_fields:
-        clauses = []
-        for field in search_fields:
-            if not field.isalnum():
-                continue  # Basic sanitization
-            clauses.append(f"{field} ILIKE ${param_idx}")
+    # The table is resolved through search_path, as the query would resolve it,
+    # and every field is checked against that table's columns.
+    try:
+        relation = await resolve_relation(lifespan_ctx, table_name)
+        table_info = relation and await fetch_object_columns(lifespan_ctx, relation[1], relation[0])
+    except Exception as e:
+        print(f"Error in search_data: {e}")
+        return {"error": f"Database query failed: {type(e).__name__}"}
+    if relation is None:
+        return {"error": f"Table '{table_name}' not found."}
+    if "error" in table_info:
+        return table_info
+    column_types = {c["name"]: c["udt_name"] for c in table_info["columns"]}
+    fields = {}
+    for field in search_fields + [f["field"] for f in filters or []] + ([sort_field] if sort_field else []):
+        column = _resolve_column(field, column_types)
+        if column is None:
+            return {"error": f"Unknown column '{field}' in table '{table_name}'."}
+        fields[field] = column
+
+    valid_search_fields = tuple(dict.fromkeys(fields[field] for field in search_fields))
+    query_params: List[Any] = []
+    if search_term and valid_search_fields:
+        if search_mode == "substring":
             query_params.append(f"%{search_term}%")
-            param_idx += 1
-        if clauses:
-            where_clauses.append(f"({' OR '.join(clauses)})")
+        else:
+            query_params.append(search_term)
+            # Canonical order, matching the expression create_search_index indexed.
+            valid_search_fields = canonical_fields(valid_search_fields)
+    else:
+        valid_search_fields = ()
 
-    # Add more complex filter construction here based on 'filters' input
-    # Example for a simple filter:
-    if filters:
-        for f in filters:
-            # Validate f["field"], f["op"]
-            where_clauses.append(f"{f['field']} {f['op']} ${param_idx}")
-            query_params.append(f["value"])
-            param_idx += 1
+    filter_shape = []
+    for f in filters or []:
+        filter_shape.append((fields[f["field"]], str(f["op"]).upper()))
+        query_params.append(f["value"])
+    if sort_field:
+        sort_field = fields[sort_field]
 
-    sql = f"SELECT * FROM {table_name}"  # Table name from a whitelist or further sanitized
-    if where_clauses:
-        sql += " WHERE " + " AND ".join(where_clauses)
+    keyset: Tuple[Tuple[str, str], ...] = ()
+    if pagination == "keyset":
+        if not table_info["primary_key"]:
+            return {"error": f"Keyset pagination needs a primary key on '{table_name}'."}
+        key_columns = [sort_field] if sort_field else []
+        key_columns += [c for c in table_info["primary_key"] if c != sort_field]
+        keyset = tuple((c, column_types[c]) for c in key_columns)
+        if cursor:
+            try:
+                query_params.extend(_decode_keyset_cursor(cursor, len(keyset)))
+            except ValueError as e:
+                return {"error": f"Invalid cursor: {e}"}
 
-    # Add sorting
-    if sort_by:
-        sql += f" ORDER BY {sort_by['field']} {sort_by.get('direction', 'asc').upper()}"
+    sql = _search_sql(
+        relation[0],
+        relation[1],
+        valid_search_fields,
+        tuple(filter_shape),
+        sort_field,
+        sort_direction,
+        keyset,
+        bool(keyset and cursor),
+        search_mode,
+        lifespan_ctx.text_search_config,
+    )
+    capped_limit = limits.clamp_rows(limit)
+    if keyset:
+        # One extra row tells us whether there is a next page.
+        query_params.append(capped_limit + 1)
+    else:
+        query_params.extend([capped_limit, offset])
 
-    sql += f" LIMIT ${param_idx} OFFSET ${param_idx + 1}"
-    query_params.extend([limit, offset])
+    result_cache = lifespan_ctx.result_cache
+    if result_cache.enabled:
+        cache_key = result_cache_key(
+            "search_data", sql, query_params + [limit, format]
+        )
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
     try:
-        async with db_pool.acquire() as conn:
+        async with lifespan_ctx.read_connection() as conn:
             # print(f"Executing: {sql} with {query_params}") # For debugging
-            rows = await conn.fetch(sql, *query_params)
-        return {"data": [dict(row) for row in rows]}
+            rows, truncated = await _fetch_limited(
+                conn, limits, sql, query_params, max_rows=0
+            )
+        if keyset:
+            has_more = len(rows) > capped_limit or truncated
+            rows = rows[:capped_limit]
+            next_cursor = None
+            if has_more and rows:
+                next_cursor = _encode_keyset_cursor([rows[-1][c] for c, _ in keyset])
+            result = {
+                **encode_rows(_columns(rows), rows, format),
+                "next_cursor": next_cursor,
+                "truncated": truncated or (capped_limit < limit and has_more),
+            }
+        else:
+            truncated = truncated or (
+                capped_limit < limit and len(rows) == capped_limit
+            )
+            result = {
+                **encode_rows(_columns(rows), rows, format),
+                "truncated": truncated,
+            }
+        if result_cache.enabled:
+            result_cache.set(cache_key, result, [table_name.lower()])
+        return result
+    except (asyncpg.QueryCanceledError, asyncio.TimeoutError):
+        return _timeout_error(limits)
     except Exception as e:
         print(f"Error in search_data: {e}")
+        if search_mode == "trigram" and isinstance(e, asyncpg.UndefinedFunctionError):
+            return {
+                "error": "Trigram search needs the pg_trgm extension; create_search_index(kind='trigram') installs it."
+            }
         return {"error": f"Database query failed: {type(e).__name__}"}
 
 
 async def execute_raw_sql(
-    ctx: Context, query: str, params: Optional[List[Any]] = None
+    ctx: Context,
+    query: str,
+    params: Optional[List[Any]] = None,
+    page_size: Optional[int] = None,
+    format: str = "objects",
 ) -> Dict[str, Any]:
     """
     [!] SECURITY WARNING [!] Executes a raw SQL query.
     Highly discouraged for LLM-generated queries due to SQL injection risks.
     Use with extreme caution and only with trusted, validated queries and a read-only DB user.
     Only SELECT statements are tentatively permitted by a basic check.
+    Pass page_size to stream the result through a server-side cursor: only the
+    first page is returned, along with a next_page_token for fetch_next_page.
+    Results are capped by the server's max_rows / max_response_bytes settings
+    ("truncated" is true when a cap was hit) and by its statement timeout.
+    format: "objects" (default, list of dicts), "compact" (columns + row
+    arrays), "columnar" (column -> values), "csv" or "arrow" (base64 blobs);
+    pages fetched with fetch_next_page keep the same format.
     """
     lifespan_ctx = ctx.request_context.lifespan_context
     if not isinstance(lifespan_ctx, PostgresAppContext) or not lifespan_ctx.db_pool:
         return {"error": "PostgreSQL connection pool not available."}
-    db_pool = lifespan_ctx.db_pool
+    limits = lifespan_ctx.limits
+    format_error = check_format(format)
+    if format_error:
+        return format_error
 
-    # Basic check to allow only SELECT (very rudimentary, can be bypassed)
-    if not query.strip().upper().startswith("SELECT"):
-        return {
-            "error": "Only SELECT statements are tentatively permitted for raw execution."
-        }
+    check_error = check_raw_select(query)
+    if check_error:
+        return check_error
 
-    # Add more disallowed keywords if necessary, but this is not foolproof
-    disallowed_keywords = [
-        "DROP",
-        "DELETE",
-        "INSERT",
-        "UPDATE",
-        "TRUNCATE",
-        "ALTER",
-        "CREATE",
-        "EXECUTE",
-    ]
-    query_upper = query.upper()
-    for keyword in disallowed_keywords:
-        if keyword in query_upper:
+    if page_size is not None:
+        if page_size < 1:
+            return {"error": "page_size must be a positive integer."}
+        if not lifespan_ctx.cursors.has_capacity():
             return {
-                "error": f"Query contains disallowed keyword '{keyword}'. Raw execution denied."
+                "error": "Too many open result cursors. Page through or wait for idle ones to expire."
             }
+        warning = None
+        if lifespan_ctx.cost_guard.enabled:
+            try:
+                async with lifespan_ctx.read_connection() as conn:
+                    rejection, warning = await _cost_check(
+                        lifespan_ctx, conn, query, params or []
+                    )
+            except Exception as e:
+                return _raw_sql_error(e, limits)
+            if rejection:
+                return rejection
+        print(f"Opening cursor for RAW SQL (with caution): {query}, params: {params}")
+        cursor = _PostgresHeldCursor(
+            lifespan_ctx, limits.clamp_rows(page_size), limits, format
+        )
+        try:
+            await cursor.open(query, params or [])
+            rows, token = await open_page(lifespan_ctx.cursors, cursor)
+        except (asyncpg.QueryCanceledError, asyncio.TimeoutError):
+            await cursor.close()
+            return _timeout_error(limits)
+        except Exception as e:
+            await cursor.close()
+            return _raw_sql_error(e, limits)
+        return with_warning(cursor.encode_page(rows, token), warning)
+
+    return await _cached_raw_select(lifespan_ctx, query, params or [], format)
 
+
+async def execute_batch(
+    ctx: Context,
+    statements: List[Dict[str, Any]],
+    consistent: bool = False,
+    format: str = "objects",
+) -> Dict[str, Any]:
+    """
+    Runs several read-only SELECTs in one tool call and returns one result
+    (or {"error": ...}) per statement, in order.
+    statements: [{"sql": "SELECT ... WHERE id = $1", "params": [42]}, ...]
+    By default statements run concurrently on separate pooled connections.
+    With consistent=true they run one after another on a single connection
+    inside one read-only REPEATABLE READ transaction, so all of them see the
+    same snapshot. The same checks, caps and timeout as execute_raw_sql apply
+    to each statement.
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, PostgresAppContext) or not lifespan_ctx.db_pool:
+        return {"error": "PostgreSQL connection pool not available."}
+    limits = lifespan_ctx.limits
+    format_error = check_format(format)
+    if format_error:
+        return format_error
+    parsed, batch_error = parse_statements(statements, limits.batch_max_statements)
+    if batch_error:
+        return batch_error
+    print(f"Executing batch of {len(parsed)} RAW SQL statements (consistent={consistent})")
+
+    if not consistent:
+        results = await gather_limited(
+            [
+                functools.partial(_checked_raw_select, lifespan_ctx, query, params, format)
+                for query, params in parsed
+            ],
+            limits.batch_concurrency,
+        )
+        return batch_response(results, consistent)
+
+    results = []
     try:
-        async with db_pool.acquire() as conn:
-            print(f"Executing RAW SQL (with caution): {query}, params: {params}")
-            if params:
-                rows = await conn.fetch(query, *params)
+        async with lifespan_ctx.read_connection() as conn:
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
+                for query, params in parsed:
+                    check_error = check_raw_select(query)
+                    if check_error:
+                        results.append(check_error)
+                        continue
+                    try:
+                        rejection, warning = await _cost_check(lifespan_ctx, conn, query, params)
+                        if rejection:
+                            results.append(rejection)
+                            continue
+                        # A savepoint, so one failed statement keeps the snapshot usable.
+                        async with conn.transaction():
+                            results.append(
+                                with_warning(
+                                    await _select_result(conn, limits, query, params, format),
+                                    warning,
+                                )
+                            )
+                    except Exception as e:
+                        results.append(_raw_sql_error(e, limits, "execute_batch"))
+    except Exception as e:
+        return _raw_sql_error(e, limits, "execute_batch")
+    return batch_response(results, consistent)
+
+
+async def fetch_next_page(ctx: Context, page_token: str) -> Dict[str, Any]:
+    """
+    Fetches the next page of a result opened with execute_raw_sql(page_size=...).
+    The returned next_page_token is null once the result is exhausted.
+    Cursors left idle for too long are closed and their tokens expire.
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, PostgresAppContext) or not lifespan_ctx.db_pool:
+        return {"error": "PostgreSQL connection pool not available."}
+
+    try:
+        page = await next_page(lifespan_ctx.cursors, page_token)
+    except (asyncpg.QueryCanceledError, asyncio.TimeoutError):
+        return _timeout_error(lifespan_ctx.limits)
+    except Exception as e:
+        print(f"Error in fetch_next_page: {e}")
+        return {"error": f"Fetching next page failed: {type(e).__name__}"}
+    if page is None:
+        return {"error": "Unknown or expired page token."}
+    cursor, rows, token = page
+    return cursor.encode_page(rows, token)
+
+
+def _copy_status_rows(status: str) -> int:
+    # copy_from_query returns the command tag, e.g. "COPY 1234".
+    return int(status.split()[-1])
+
+
+async def _export_copy(conn, query: str, params: List[Any], writer: ExportWriter) -> None:
+    """Streams COPY ... TO STDOUT output straight into the file, chunk by chunk."""
+
+    async def write(chunk: bytes) -> None:
+        await asyncio.to_thread(writer.write_raw, chunk)
+
+    if writer.format == "csv":
+        status = await conn.copy_from_query(
+            query, *params, output=write, format="csv", header=True
+        )
+    else:
+        # One JSON document per row. CSV mode with control characters as
+        # quote and delimiter copies the JSON text verbatim: neither can occur
+        # unescaped in JSON, so no value is ever quoted or escaped.
+        status = await conn.copy_from_query(
+            f"SELECT row_to_json(q) FROM ({query}) AS q",
+            *params,
+            output=write,
+            format="csv",
+            quote="\x01",
+            delimiter="\x02",
+        )
+    writer.rows = _copy_status_rows(status)
+
+
+async def _export_cursor(
+    conn, query: str, params: List[Any], writer: ExportWriter, chunk_rows: int
+) -> None:
+    """Reads the result through a server-side cursor, chunk_rows at a time."""
+    statement = await conn.prepare(query)
+    writer.write_header([attribute.name for attribute in statement.get_attributes()])
+    cursor = await statement.cursor(*params)
+    while True:
+        rows = await cursor.fetch(chunk_rows)
+        if not rows:
+            break
+        await asyncio.to_thread(writer.write_rows, rows)
+
+
+async def export_query(
+    ctx: Context,
+    query: str,
+    params: Optional[List[Any]] = None,
+    format: str = "csv",
+    compression: str = "none",
+    file_name: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Runs a SELECT and writes its full result to a file on the server,
+    returning the file's path, row count and size instead of the rows.
+    For results too large to return through execute_raw_sql: the row and
+    response-size caps do not apply, and rows are streamed to disk (CSV and
+    JSONL via COPY ... TO STDOUT) without being held in memory.
+    format: "csv" (with a header row), "jsonl" (one JSON object per row) or
+    "parquet" (requires pyarrow). compression: "none" or "gzip".
+    Files go to the server's export directory (EXPORT_DIR); file_name
+    defaults to a generated name and an existing file is never overwritten.
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, PostgresAppContext) or not lifespan_ctx.db_pool:
+        return {"error": "PostgreSQL connection pool not available."}
+    settings = lifespan_ctx.exports
+    export_error = check_export(format, compression) or check_raw_select(query)
+    if export_error:
+        return export_error
+    try:
+        path = export_path(settings, file_name, format, compression)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    query = query.strip().rstrip(";")
+    params = params or []
+    print(f"Exporting RAW SQL to {path}: {query}, params: {params}")
+    try:
+        with ExportWriter(path, format, compression) as writer:
+            async with lifespan_ctx.read_connection() as conn:
+                async with conn.transaction(readonly=True):
+                    # Replaces the per-connection statement timeout for this export only.
+                    await conn.execute(
+                        f"SET LOCAL statement_timeout = {int(settings.statement_timeout_ms)}"
+                    )
+                    if format == "parquet":
+                        await _export_cursor(conn, query, params, writer, settings.chunk_rows)
+                    else:
+                        await _export_copy(conn, query, params, writer)
+    except FileExistsError:
+        return {"error": f"Export file '{os.path.basename(path)}' already exists."}
+    except asyncpg.QueryCanceledError:
+        return {
+            "error": f"Export cancelled: exceeded the export statement timeout of {settings.statement_timeout_ms} ms."
+        }
+    except Exception as e:
+        print(f"Error in export_query: {e}")
+        return {"error": f"Export failed: {type(e).__name__}: {e}"}
+    return writer.summary()
+
+
+def _parse_bool(value: str) -> bool:
+    return value.strip().lower() in ("t", "true", "y", "yes", "on", "1")
+
+
+# Binary COPY needs Python values of the column's type; JSON and CSV give
+# text, so text values for these types are parsed first.
+_TEXT_PARSERS: Dict[str, Callable[[str], Any]] = {
+    "int2": int,
+    "int4": int,
+    "int8": int,
+    "float4": float,
+    "float8": float,
+    "numeric": Decimal,
+    "bool": _parse_bool,
+    "date": date.fromisoformat,
+    "time": time.fromisoformat,
+    "timestamp": datetime.fromisoformat,
+    "timestamptz": datetime.fromisoformat,
+    "uuid": uuid.UUID,
+}
+
+
+def _coercer(type_name: str) -> Callable[[Any], Any]:
+    if type_name in ("json", "jsonb"):
+        return lambda v: v if v is None or isinstance(v, str) else json.dumps(v)
+    if type_name in ("text", "varchar", "bpchar", "name"):
+        return lambda v: v if v is None or isinstance(v, str) else str(v)
+    parse = _TEXT_PARSERS.get(type_name)
+    if parse is None:
+        return lambda v: v
+    return lambda v: parse(v) if isinstance(v, str) else v
+
+
+def _coerced(rows: List[Row], coercers: List[Callable[[Any], Any]]) -> Iterator[Row]:
+    for row in rows:
+        yield tuple(coerce(value) for coerce, value in zip(coercers, row))
+
+
+async def _gzip_chunks(path: str, size: int = 1 << 20):
+    """Decompressed bytes of a .gz file, read off the event loop."""
+    with open_text(path) as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, size)
+            if not chunk:
+                return
+            yield chunk.encode("utf-8")
+
+
+async def import_rows(
+    ctx: Context,
+    table_name: str,
+    rows: Optional[List[Any]] = None,
+    columns: Optional[List[str]] = None,
+    file_path: Optional[str] = None,
+    batch_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Bulk-loads rows into an existing table with COPY, in one transaction:
+    either all rows are loaded or, on any error, none are.
+    rows: a list of objects ({"column": value}) or, with columns, a list of
+    value lists; text values are converted to the column types. file_path
+    instead loads a .csv (with a header row; empty fields are NULL) or
+    .jsonl file, optionally .gz, from the server's import directory
+    (IMPORT_DIR); CSV files are streamed to the server and parsed there.
+    columns picks the keys read from objects. Rows are copied batch_size at
+    a time (default IMPORT_BATCH_ROWS). Requires the server to allow
+    imports (IMPORT_ENABLED).
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, PostgresAppContext) or not lifespan_ctx.db_pool:
+        return {"error": "PostgreSQL connection pool not available."}
+    settings = lifespan_ctx.imports
+    import_error = check_import(settings, table_name, rows, file_path, columns, batch_size)
+    if import_error:
+        return import_error
+
+    path = fmt = None
+    try:
+        if rows is not None:
+            columns, source = inline_rows(rows, columns)
+        else:
+            path, fmt = resolve_import_file(settings, file_path)
+            if fmt == "csv":
+                columns, source = csv_header(path), None
             else:
-                rows = await conn.fetch(query)
+                columns, source = file_rows(path, fmt, columns)
+    except (OSError, ValueError) as e:
+        return {"error": f"Invalid import: {e}"}
 
-        # For non-SELECT commands that don't return rows but are somehow allowed (e.g. EXPLAIN)
-        # conn.execute might be used, and it returns a status string.
-        # For SELECT, fetch returns a list of Record objects.
-        return {"data": [dict(row) for row in rows]}
+    print(f"Importing into {table_name} ({', '.join(columns)}) from {file_path or 'rows'}")
+    row_count = batches = 0
+    try:
+        # Writes go to the primary.
+        async with lifespan_ctx.connection() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    f"SET LOCAL statement_timeout = {int(settings.statement_timeout_ms)}"
+                )
+                if source is None:
+                    # One COPY FROM STDIN of the file as is; the server parses the CSV.
+                    status = await conn.copy_to_table(
+                        table_name,
+                        source=_gzip_chunks(path) if path.endswith(".gz") else path,
+                        columns=columns,
+                        format="csv",
+                        header=True,
+                    )
+                    row_count, batches = _copy_status_rows(status), 1
+                else:
+                    statement = await conn.prepare(
+                        f'SELECT {", ".join(_quote_ident(c) for c in columns)} '
+                        f"FROM {_quote_ident(table_name)} LIMIT 0"
+                    )
+                    coercers = [_coercer(a.type.name) for a in statement.get_attributes()]
+                    pending = batched(source, batch_size or settings.batch_rows)
+                    while True:
+                        # File rows are read and parsed off the event loop.
+                        batch = await asyncio.to_thread(next, pending, None)
+                        if batch is None:
+                            break
+                        await conn.copy_records_to_table(
+                            table_name, records=_coerced(batch, coercers), columns=columns
+                        )
+                        row_count += len(batch)
+                        batches += 1
+    except asyncpg.QueryCanceledError:
+        return {
+            "error": f"Import cancelled: exceeded the import statement timeout of {settings.statement_timeout_ms} ms."
+        }
+    except (ValueError, TypeError) as e:  # Malformed file lines or values of the wrong type
+        return {"error": f"Invalid import: {e}"}
     except Exception as e:
-        print(f"Error in execute_raw_sql: {e}")
-        return {"error": f"Raw SQL execution failed: {type(e).__name__}"}
+        print(f"Error in import_rows: {e}")
+        return {"error": f"Import failed: {type(e).__name__}: {e}"}
+    lifespan_ctx.result_cache.clear()
+    return {"table": table_name, "columns": columns, "row_count": row_count, "batches": batches}
+
+
+async def get_cache_stats(ctx: Context) -> Dict[str, Any]:
+    """
+    Reports hit/miss counters and sizes of the schema and query result
+    caches, and the cost guard's counters and plan cache.
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, PostgresAppContext):
+        return {"error": "PostgreSQL context not available."}
+    return {
+        "schema_cache": lifespan_ctx.schema_cache.stats(),
+        "result_cache": lifespan_ctx.result_cache.stats(),
+        "cost_guard": lifespan_ctx.cost_guard.stats(),
+    }
@@ -0,0 +1,121 @@
+import asyncio
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..common.metrics import PoolMonitor
+from ..plugins import LazyModule
+
+asyncpg = LazyModule("asyncpg")
+
+def connect_errors() -> Tuple[type, ...]:
+    """
+    Errors from taking a replica connection that mean the server cannot be
+    reached. Check for asyncio.TimeoutError (an OSError) first: a pool that
+    is only busy is not down.
+    """
+    return (asyncpg.PostgresConnectionError, asyncpg.InterfaceError, OSError)
+
+
+def connection_lost(error: BaseException, conn: Any) -> bool:
+    """
+    True if ``error``, raised while using ``conn``, means the connection or
+    server is gone. Query timeouts and local errors (e.g. an export's disk
+    write) are not health signals.
+    """
+    if isinstance(error, (asyncpg.PostgresConnectionError, ConnectionError)):
+        return True
+    if not isinstance(error, asyncpg.InterfaceError):
+        return False
+    try:
+        return conn.is_closed()
+    except asyncpg.InterfaceError:
+        return True  # The pool already took the proxy back because the connection dropped.
+
+
+class Replica:
+    def __init__(self, name: str, dsn: str, monitor: PoolMonitor):
+        self.name = name
+        self.dsn = dsn
+        self.monitor = monitor
+
+    @property
+    def up(self) -> bool:
+        return self.monitor.up
+
+    def mark(self, up: bool, reason: str = "") -> None:
+        if up != self.monitor.up:
+            state = "up" if up else f"down ({reason})"
+            print(f"PostgreSQL Replicas: {self.name} is {state}.")
+        self.monitor.up = up
+
+    def load(self) -> int:
+        gauges = self.monitor.gauges()
+        return gauges["in_use"] + gauges["waiters"]
+
+
+class ReplicaRouter:
+    """
+    Picks the least busy healthy read replica for read-only tools. Replicas
+    are marked down when they fail a connection or a periodic health check
+    (a short-lived connection running SELECT 1) and back up once a check
+    passes; callers fall back to the primary when none is up.
+    """
+
+    def __init__(
+        self,
+        replicas: List[Replica],
+        health_interval: float = 10.0,
+        health_timeout: float = 3.0,
+    ):
+        self.replicas = replicas
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self._rotation = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def pick(self) -> Optional[Replica]:
+        healthy = [replica for replica in self.replicas if replica.up]
+        if not healthy:
+            return None
+        # Rotate the starting point so ties don't always land on the first replica.
+        offset = next(self._rotation) % len(healthy)
+        rotated = healthy[offset:] + healthy[:offset]
+        return min(rotated, key=Replica.load)
+
+    async def check(self, replica: Replica) -> None:
+        try:
+            conn = await asyncpg.connect(dsn=replica.dsn, timeout=self.health_timeout)
+            try:
+                await conn.fetchval("SELECT 1", timeout=self.health_timeout)
+            finally:
+                await conn.close()
+        except Exception as e:
+            replica.mark(False, type(e).__name__)
+        else:
+            replica.mark(True)
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await self.check_all()
+
+    def start(self) -> None:
+        if self._task is None and self.replicas and self.health_interval > 0:
+            self._task = asyncio.create_task(self._health_loop())
+
+    def status(self) -> Dict[str, Any]:
+        return {replica.name: replica.up for replica in self.replicas}
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.monitor.pool.close()
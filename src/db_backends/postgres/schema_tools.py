@@ -1,9 +1,22 @@
-from typing import Any, Dict, List, Optional
+import math
+from typing import Any, Dict, List, Optional, Tuple
 
 from mcp.server.fastmcp import Context
 
+from ..common.formats import check_format, encode_rows
 from ..postgres.lifespan import PostgresAppContext
 
+# Most common values reported per column by profile_table.
+_MAX_COMMON_VALUES = 5
+
+
+def _quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+# Results of the tools below are cached on lifespan_ctx.schema_cache; the
+# cache expires by TTL and is cleared by the schema-change LISTEN channel.
+
 
 async def list_available_databases(ctx: Context) -> Dict[str, Any]:
     """Lists available databases the connected user can see."""
@@ -11,17 +24,23 @@ async def list_available_databases(ctx: Context) -> Dict[str, Any]:
     if not isinstance(lifespan_ctx, PostgresAppContext) or not lifespan_ctx.db_pool:
         return {"error": "PostgreSQL connection pool not available."}
 
-    db_pool = lifespan_ctx.db_pool
+    cache_key = ("list_available_databases",)
+    cached = lifespan_ctx.schema_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     query = """
         SELECT datname FROM pg_database
         WHERE datistemplate = false AND has_database_privilege(datname, 'CONNECT')
         ORDER BY datname;
     """
     try:
-        async with db_pool.acquire() as conn:
+        async with lifespan_ctx.read_connection() as conn:
             rows = await conn.fetch(query)
         database_names = [row["datname"] for row in rows]
-        return {"databases": database_names, "count": len(database_names)}
+        result = {"databases": database_names, "count": len(database_names)}
+        lifespan_ctx.schema_cache.set(cache_key, result)
+        return result
     except Exception as e:
         print(f"Error in list_available_databases: {e}")
         return {"error": f"An error occurred: {type(e).__name__}"}
@@ -34,7 +53,6 @@ async def list_database_objects(
     lifespan_ctx = ctx.request_context.lifespan_context
     if not isinstance(lifespan_ctx, PostgresAppContext) or not lifespan_ctx.db_pool:
         return {"error": "PostgreSQL connection pool not available."}
-    db_pool = lifespan_ctx.db_pool
 
     if object_types is None:
         object_types = ["BASE TABLE", "VIEW"]
@@ -47,6 +65,11 @@ async def list_database_objects(
                 "error": f"Invalid object_type '{obj_type}'. Valid types are: {valid_object_types}."
             }
 
+    cache_key = ("list_database_objects", schema_name, tuple(object_types))
+    cached = lifespan_ctx.schema_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     query = """
         SELECT table_name, table_schema, table_type
         FROM information_schema.tables
@@ -54,7 +77,7 @@ async def list_database_objects(
         ORDER BY table_schema, table_type, table_name;
     """
     try:
-        async with db_pool.acquire() as conn:
+        async with lifespan_ctx.read_connection() as conn:
             # Note: asyncpg expects a list for ANY($array_parameter)
             rows = await conn.fetch(query, schema_name, object_types)
         db_objects = [
@@ -65,52 +88,281 @@ async def list_database_objects(
             }
             for r in rows
         ]
-        return {"objects": db_objects}
+        result = {"objects": db_objects}
+        lifespan_ctx.schema_cache.set(cache_key, result)
+        return result
     except Exception as e:
         print(f"Error in list_database_objects: {e}")
         return {"error": f"An error occurred: {type(e).__name__}"}
 
 
+async def resolve_relation(
+    lifespan_ctx: PostgresAppContext, name: str
+) -> Optional[Tuple[str, str]]:
+    """
+    (schema, relation) that the unqualified ``name`` resolves to through
+    search_path, exactly as a query naming it would; None if there is none.
+    Cached on lifespan_ctx.schema_cache.
+    """
+    cache_key = ("resolve_relation", name)
+    cached = lifespan_ctx.schema_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    async with lifespan_ctx.read_connection() as conn:
+        row = await conn.fetchrow(
+            """
+            SELECT n.nspname, c.relname
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.oid = to_regclass($1)
+            """,
+            name,
+        )
+    if row is None:
+        return None
+    result = (row["nspname"], row["relname"])
+    lifespan_ctx.schema_cache.set(cache_key, result)
+    return result
+
+
+def _resolve_column(name: str, column_types: Dict[str, str]) -> Optional[str]:
+    """The column ``name`` refers to: an exact match, else its unquoted (lower-case) folding."""
+    if name in column_types:
+        return name
+    return name.lower() if name.lower() in column_types else None
+
+
+async def fetch_object_columns(
+    lifespan_ctx: PostgresAppContext, object_name: str, schema_name: str = "public"
+) -> Dict[str, Any]:
+    """
+    Catalog lookup behind get_object_columns, shared with other tools (e.g.
+    search_data checks its fields against it and keyset pagination needs
+    the primary key). Cached on
+    lifespan_ctx.schema_cache.
+    """
+    cache_key = ("get_object_columns", schema_name, object_name)
+    cached = lifespan_ctx.schema_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    query = """
+        SELECT c.column_name, c.data_type, c.udt_schema, c.udt_name,
+               c.is_nullable, c.column_default, c.character_maximum_length,
+               c.numeric_precision, c.numeric_scale, pk.ordinal_position AS pk_position
+        FROM information_schema.columns c
+        LEFT JOIN (
+            SELECT kcu.column_name, kcu.ordinal_position
+            FROM information_schema.table_constraints tc
+            JOIN information_schema.key_column_usage kcu
+              ON kcu.constraint_schema = tc.constraint_schema
+             AND kcu.constraint_name = tc.constraint_name
+            WHERE tc.constraint_type = 'PRIMARY KEY'
+              AND tc.table_schema = $1 AND tc.table_name = $2
+        ) pk ON pk.column_name = c.column_name
+        WHERE c.table_schema = $1 AND c.table_name = $2
+        ORDER BY c.ordinal_position;
+    """
+    async with lifespan_ctx.read_connection() as conn:
+        rows = await conn.fetch(query, schema_name, object_name)
+    if not rows:
+        return {
+            "error": f"Object '{schema_name}.{object_name}' not found or has no columns."
+        }
+
+    columns_info = []
+    for r in rows:
+        col = {
+            "name": r["column_name"],
+            "data_type": r["data_type"],
+            "udt_name": f"{r['udt_schema']}.{r['udt_name']}",
+            "is_nullable": r["is_nullable"].upper() == "YES",
+            "is_primary_key": r["pk_position"] is not None,
+            "default": r["column_default"],
+        }
+        if r["character_maximum_length"] is not None:
+            col["char_max_len"] = r["character_maximum_length"]
+        if r["numeric_precision"] is not None:
+            col["num_precision"] = r["numeric_precision"]
+        if r["numeric_scale"] is not None:
+            col["num_scale"] = r["numeric_scale"]
+        columns_info.append(col)
+    primary_key = [
+        r["column_name"]
+        for r in sorted(
+            (r for r in rows if r["pk_position"] is not None),
+            key=lambda r: r["pk_position"],
+        )
+    ]
+    result = {"columns": columns_info, "primary_key": primary_key}
+    lifespan_ctx.schema_cache.set(cache_key, result)
+    return result
+
+
 async def get_object_columns(
     ctx: Context, object_name: str, schema_name: str = "public"
 ) -> Dict[str, Any]:
-    """Retrieves column information for a specified table or view."""
+    """Retrieves column information, including the primary key, for a specified table or view."""
     lifespan_ctx = ctx.request_context.lifespan_context
     if not isinstance(lifespan_ctx, PostgresAppContext) or not lifespan_ctx.db_pool:
         return {"error": "PostgreSQL connection pool not available."}
-    db_pool = lifespan_ctx.db_pool
 
-    query = """
-        SELECT column_name, data_type, is_nullable, column_default,
-               character_maximum_length, numeric_precision, numeric_scale
-        FROM information_schema.columns
-        WHERE table_schema = $1 AND table_name = $2
-        ORDER BY ordinal_position;
+    try:
+        return await fetch_object_columns(lifespan_ctx, object_name, schema_name)
+    except Exception as e:
+        print(f"Error in get_object_columns: {e}")
+        return {"error": f"An error occurred: {type(e).__name__}"}
+
+
+def _sample_percent(sample_size: int, reltuples: float, pages: int) -> float:
+    """
+    TABLESAMPLE SYSTEM picks whole pages, so ask for enough pages to hold
+    about twice the sample, and at least one page per sampled row so the
+    sample is not drawn from a handful of neighbouring pages. Returned as a
+    percentage of the table; without a row estimate, assume one row per page.
+    """
+    if pages <= 0:
+        return 100.0
+    rows_per_page = max(reltuples / pages, 1.0) if reltuples > 0 else 1.0
+    wanted = max(float(sample_size), 2 * sample_size / rows_per_page)
+    return min(100.0, 100.0 * wanted / pages)
+
+
+def _column_profile(stats: Optional[Any], row_estimate: Optional[float]) -> Dict[str, Any]:
+    if stats is None:
+        return {}
+    n_distinct = stats["n_distinct"]
+    # Negative n_distinct is minus the fraction of rows that are distinct.
+    if n_distinct < 0 and row_estimate is not None:
+        n_distinct = -n_distinct * row_estimate
+    profile = {
+        "null_fraction": stats["null_frac"],
+        "distinct_estimate": round(n_distinct) if n_distinct >= 0 else None,
+        "avg_width": stats["avg_width"],
+    }
+    if stats["most_common_vals"]:
+        profile["most_common_values"] = [
+            {"value": value, "frequency": frequency}
+            for value, frequency in zip(
+                stats["most_common_vals"][:_MAX_COMMON_VALUES], stats["most_common_freqs"]
+            )
+        ]
+    return profile
+
+
+async def profile_table(
+    ctx: Context,
+    object_name: str,
+    schema_name: str = "public",
+    sample_size: int = 20,
+    format: str = "objects",
+) -> Dict[str, Any]:
     """
+    Summarizes a table without scanning it: the planner's row count
+    estimate and size, per-column null fraction, distinct count estimate
+    and most common values (from pg_stats, as of the last ANALYZE), and a
+    random sample of sample_size rows read with TABLESAMPLE SYSTEM.
+    Prefer this to COUNT(*) or SELECT * LIMIT for getting to know a table.
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, PostgresAppContext) or not lifespan_ctx.db_pool:
+        return {"error": "PostgreSQL connection pool not available."}
+    format_error = check_format(format)
+    if format_error:
+        return format_error
+    if sample_size < 0:
+        return {"error": "sample_size must not be negative."}
+    sample_size = lifespan_ctx.limits.clamp_rows(sample_size)
+
+    cache_key = ("profile_table", schema_name, object_name, sample_size, format)
+    cached = lifespan_ctx.schema_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        async with db_pool.acquire() as conn:
-            rows = await conn.fetch(query, schema_name, object_name)
-        if not rows:
-            return {
-                "error": f"Object '{schema_name}.{object_name}' not found or has no columns."
-            }
+        table_info = await fetch_object_columns(lifespan_ctx, object_name, schema_name)
+        if "error" in table_info:
+            return table_info
+        async with lifespan_ctx.read_connection() as conn:
+            relation = await conn.fetchrow(
+                """
+                SELECT c.relkind::text AS relkind, c.reltuples,
+                       pg_relation_size(c.oid) / current_setting('block_size')::int AS pages,
+                       pg_total_relation_size(c.oid) AS total_bytes,
+                       s.n_live_tup, greatest(s.last_analyze, s.last_autoanalyze) AS last_analyzed
+                FROM pg_class c
+                LEFT JOIN pg_stat_all_tables s ON s.relid = c.oid
+                WHERE c.oid = to_regclass(quote_ident($1) || '.' || quote_ident($2))
+                """,
+                schema_name,
+                object_name,
+            )
+            stats = await conn.fetch(
+                """
+                SELECT attname, null_frac, n_distinct, avg_width,
+                       most_common_vals::text::text[] AS most_common_vals, most_common_freqs
+                FROM pg_stats
+                WHERE schemaname = $1 AND tablename = $2 AND NOT inherited
+                """,
+                schema_name,
+                object_name,
+            )
 
-        columns_info = []
-        for r in rows:
-            col = {
-                "name": r["column_name"],
-                "data_type": r["data_type"],
-                "is_nullable": r["is_nullable"].upper() == "YES",
-                "default": r["column_default"],
-            }
-            if r["character_maximum_length"] is not None:
-                col["char_max_len"] = r["character_maximum_length"]
-            if r["numeric_precision"] is not None:
-                col["num_precision"] = r["numeric_precision"]
-            if r["numeric_scale"] is not None:
-                col["num_scale"] = r["numeric_scale"]
-            columns_info.append(col)
-        return {"columns": columns_info}
+            # reltuples is -1 until the first VACUUM / ANALYZE; fall back to the
+            # statistics collector's live tuple count.
+            row_estimate, row_source = None, None
+            if relation is not None and relation["reltuples"] >= 0:
+                row_estimate, row_source = relation["reltuples"], "pg_class.reltuples"
+            elif relation is not None and relation["n_live_tup"]:
+                row_estimate, row_source = relation["n_live_tup"], "pg_stat_all_tables.n_live_tup"
+
+            sample_rows: List[Any] = []
+            sample_method = None
+            if sample_size:
+                relation_sql = f"{_quote_ident(schema_name)}.{_quote_ident(object_name)}"
+                if relation is not None and relation["relkind"] in ("r", "m", "p"):
+                    percent = _sample_percent(
+                        sample_size, relation["reltuples"], relation["pages"]
+                    )
+                    sample_method = f"TABLESAMPLE SYSTEM ({percent:.4g}%)"
+                    # Shuffled before the LIMIT, so rows are not all from the first sampled pages.
+                    sample_rows = await conn.fetch(
+                        f"SELECT * FROM {relation_sql} TABLESAMPLE SYSTEM ($1) "
+                        "ORDER BY random() LIMIT $2",
+                        percent,
+                        sample_size,
+                    )
+                else:
+                    # Views cannot be sampled; their first rows will have to do.
+                    sample_method = "LIMIT"
+                    sample_rows = await conn.fetch(
+                        f"SELECT * FROM {relation_sql} LIMIT $1", sample_size
+                    )
     except Exception as e:
-        print(f"Error in get_object_columns: {e}")
+        print(f"Error in profile_table: {e}")
         return {"error": f"An error occurred: {type(e).__name__}"}
+
+    stats_by_column = {row["attname"]: row for row in stats}
+    columns = [
+        {
+            "name": column["name"],
+            "data_type": column["data_type"],
+            **_column_profile(stats_by_column.get(column["name"]), row_estimate),
+        }
+        for column in table_info["columns"]
+    ]
+    result = {
+        "table": f"{schema_name}.{object_name}",
+        "row_count_estimate": None if row_estimate is None else math.ceil(row_estimate),
+        "row_count_source": row_source,
+        "total_bytes": relation["total_bytes"] if relation is not None else None,
+        "last_analyzed": relation["last_analyzed"] if relation is not None else None,
+        "columns": columns,
+        "sample_method": sample_method,
+        "sample": encode_rows(
+            list(sample_rows[0].keys()) if sample_rows else [], sample_rows, format
+        ),
+    }
+    if not stats:
+        result["hint"] = "No column statistics yet; run ANALYZE on the table to collect them."
+    lifespan_ctx.schema_cache.set(cache_key, result)
+    return result
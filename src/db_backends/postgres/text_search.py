@@ -0,0 +1,157 @@
+import hashlib
+from typing import Any, Dict, List, Sequence, Tuple
+
+from mcp.server.fastmcp import Context
+
+from ..plugins import LazyModule
+from .lifespan import PostgresAppContext
+from .schema_tools import _quote_ident, _resolve_column, fetch_object_columns, resolve_relation
+
+asyncpg = LazyModule("asyncpg")
+
+SEARCH_MODES = ("substring", "fulltext", "trigram")
+
+
+def canonical_fields(fields: Sequence[str]) -> Tuple[str, ...]:
+    """Sorted and de-duplicated, so an index matches searches over the same fields in any order."""
+    return tuple(sorted(set(fields)))
+
+
+def fts_document(fields: Tuple[str, ...], config: str) -> str:
+    """
+    The tsvector expression searched by search_data(search_mode="fulltext").
+    create_search_index indexes exactly this expression, which is what lets
+    the planner use the index, so the two must stay in sync.
+    """
+    text = " || ' ' || ".join(f"coalesce({field}::text, '')" for field in fields)
+    return f"to_tsvector('{config}'::regconfig, {text})"
+
+
+def fts_query(config: str, param: str = "$1") -> str:
+    # websearch_to_tsquery accepts free text ("quoted phrases", or, -negation) and never raises.
+    return f"websearch_to_tsquery('{config}'::regconfig, {param})"
+
+
+def _index_name(kind: str, table_name: str, fields: Tuple[str, ...]) -> str:
+    digest = hashlib.sha1(",".join(fields).encode()).hexdigest()[:8]
+    # Identifiers are capped at 63 bytes; the digest keeps truncated names distinct.
+    return f"qc_{kind}_{table_name[:40]}_{digest}".lower()
+
+
+def _index_statements(
+    kind: str, schema_name: str, table_name: str, fields: Tuple[str, ...], config: str
+) -> List[Tuple[str, str]]:
+    """
+    (index name, CREATE INDEX statement) pairs for one create_search_index
+    call. ``table_name`` and ``fields`` are catalog names, quoted here the
+    same way search_data quotes them, so the indexed expression matches.
+    """
+    table = f"{_quote_ident(schema_name)}.{_quote_ident(table_name)}"
+    if kind == "fulltext":
+        name = _index_name("fts", table_name, fields)
+        document = fts_document(tuple(_quote_ident(field) for field in fields), config)
+        return [
+            (
+                name,
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gin (({document}))",
+            )
+        ]
+    # One trigram index per column: they serve `field % term` and `field ILIKE '%term%'`.
+    statements = []
+    for field in fields:
+        name = _index_name("trgm", table_name, (field,))
+        statements.append(
+            (
+                name,
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} "
+                f"USING gin ({_quote_ident(field)} gin_trgm_ops)",
+            )
+        )
+    return statements
+
+
+async def create_search_index(
+    ctx: Context,
+    table_name: str,
+    fields: List[str],
+    kind: str = "fulltext",
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """
+    Creates (or with refresh=true, rebuilds) the index behind a search_data
+    text search mode, then refreshes the table's planner statistics.
+    kind="fulltext": one GIN index over the tsvector of all fields, used by
+    search_mode="fulltext" on the same set of fields.
+    kind="trigram": a pg_trgm GIN index per field (installing the extension
+    if needed), used by search_mode="trigram" and by the default substring
+    (ILIKE) search.
+    Indexes are built CONCURRENTLY, so the table stays writable; requires
+    the server to allow index DDL (SEARCH_INDEX_DDL_ENABLED).
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, PostgresAppContext) or not lifespan_ctx.db_pool:
+        return {"error": "PostgreSQL connection pool not available."}
+    if not lifespan_ctx.allow_index_ddl:
+        return {"error": "Index creation is disabled on this server (SEARCH_INDEX_DDL_ENABLED)."}
+    if not table_name.isalnum():  # Same sanitization as search_data
+        return {"error": "Invalid table name."}
+    if kind not in ("fulltext", "trigram"):
+        return {"error": "kind must be 'fulltext' or 'trigram'."}
+    if not fields or not all(field.isalnum() for field in fields):
+        return {"error": "fields must be a non-empty list of plain column names."}
+
+    # Resolved exactly as search_data resolves them, so the indexed expression
+    # is the one its searches build.
+    try:
+        relation = await resolve_relation(lifespan_ctx, table_name)
+        table_info = relation and await fetch_object_columns(lifespan_ctx, relation[1], relation[0])
+    except Exception as e:
+        print(f"Error in create_search_index: {e}")
+        return {"error": f"Database query failed: {type(e).__name__}"}
+    if relation is None:
+        return {"error": f"Table '{table_name}' not found."}
+    if "error" in table_info:
+        return table_info
+    column_types = {c["name"]: c["udt_name"] for c in table_info["columns"]}
+    columns = []
+    for field in fields:
+        column = _resolve_column(field, column_types)
+        if column is None:
+            return {"error": f"Unknown column '{field}' in table '{table_name}'."}
+        columns.append(column)
+
+    schema_name, table_name = relation
+    fields_key = canonical_fields(columns)
+    statements = _index_statements(kind, schema_name, table_name, fields_key, lifespan_ctx.text_search_config)
+    created = []
+    try:
+        # Writes go to the primary. CONCURRENTLY cannot run inside a transaction,
+        # and building over a large table can outlast the statement timeout.
+        async with lifespan_ctx.connection() as conn:
+            await conn.execute("SET statement_timeout = 0")
+            if kind == "trigram":
+                await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            for name, statement in statements:
+                if refresh:
+                    print(f"Rebuilding search index {name}...")
+                    await conn.execute(f"REINDEX INDEX CONCURRENTLY {_quote_ident(schema_name)}.{name}")
+                else:
+                    print(f"Creating search index: {statement}")
+                    await conn.execute(statement)
+                created.append(name)
+            await conn.execute(f"ANALYZE {_quote_ident(schema_name)}.{_quote_ident(table_name)}")
+    except asyncpg.UndefinedTableError as e:
+        if refresh:
+            return {"error": f"No {kind} search index to refresh ({e}); create it first.", "indexes": created}
+        return {"error": f"Index creation failed: {e}", "indexes": created}
+    except Exception as e:
+        print(f"Error in create_search_index: {e}")
+        return {"error": f"Index creation failed: {type(e).__name__}: {e}", "indexes": created}
+    lifespan_ctx.schema_cache.clear()
+    return {
+        "table": table_name,
+        "kind": kind,
+        "fields": list(fields_key),
+        "indexes": created,
+        "refreshed": refresh,
+    }
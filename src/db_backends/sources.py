@@ -0,0 +1,243 @@
+"""
+Named data sources served by one process.
+
+DATA_SOURCES (or the JSON file named by DATA_SOURCES_FILE) maps source names
+to connection URLs, or to {"url": ..., "backend": ..., "replicas": [...]}:
+
+    {"sales": "postgresql://app@db/sales", "local": "sqlite:///data/local.db"}
+
+The backend is inferred from the URL scheme unless given. A single composite
+lifespan owns every source, opening a source's pool only when a tool first
+uses it; tools take a ``source`` argument (defaulting to DATA_SOURCES_DEFAULT,
+else the first source) and dispatch to that source's backend.
+"""
+
+import asyncio
+import copy
+import functools
+import inspect
+import json
+import os
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from mcp.server.fastmcp import Context, FastMCP
+
+from .plugins import backend_for_scheme, get_manifest
+
+
+@dataclass
+class SourceSpec:
+    name: str
+    backend: str
+    url: str
+    replicas: List[str] = field(default_factory=list)
+
+    def lifespan_kwargs(self) -> Dict[str, Any]:
+        """Arguments for the backend's app_lifespan(server, ...)."""
+        if self.backend == "sqlite":
+            # sqlite:///relative.db and sqlite:////absolute.db, as in SQLAlchemy.
+            path = self.url.split("://", 1)[1]
+            return {"db_path": path[1:] if path.startswith("/") else path}
+        if self.backend == "postgres":
+            return {
+                "db_url": self.url,
+                "replica_urls": self.replicas,
+                "pool_name": self.name,
+            }
+        return {"db_url": self.url}
+
+
+def parse_sources(config: Dict[str, Any]) -> List[SourceSpec]:
+    specs = []
+    for name, entry in config.items():
+        if isinstance(entry, str):
+            entry = {"url": entry}
+        url = entry.get("url", "")
+        backend = entry.get("backend") or backend_for_scheme(urlparse(url).scheme)
+        if backend is None or get_manifest(backend) is None:
+            raise ValueError(f"Data source '{name}': cannot tell the backend of '{url}'.")
+        specs.append(SourceSpec(name, backend, url, list(entry.get("replicas", []))))
+    if not specs:
+        raise ValueError("No data sources configured.")
+    return specs
+
+
+def load_sources_config() -> Optional[Dict[str, Any]]:
+    """DATA_SOURCES (JSON) or the JSON file at DATA_SOURCES_FILE; None if neither is set."""
+    raw = os.environ.get("DATA_SOURCES")
+    path = os.environ.get("DATA_SOURCES_FILE")
+    if not raw and path:
+        with open(path) as f:
+            raw = f.read()
+    return json.loads(raw) if raw else None
+
+
+class SourceRegistry:
+    """Opens each source's backend lifespan on first use and closes them all at exit."""
+
+    def __init__(self, specs: List[SourceSpec], default: Optional[str] = None):
+        self.specs = {spec.name: spec for spec in specs}
+        self.default = default or specs[0].name
+        if self.default not in self.specs:
+            raise ValueError(f"Default data source '{self.default}' is not configured.")
+        self._contexts: Dict[str, Any] = {}
+        self._locks = {name: asyncio.Lock() for name in self.specs}
+        self._stack = AsyncExitStack()
+
+    def spec(self, name: Optional[str]) -> Optional[SourceSpec]:
+        return self.specs.get(name or self.default)
+
+    async def open(self, name: str) -> Any:
+        """Returns the source's lifespan context, entering its lifespan the first time."""
+        context = self._contexts.get(name)
+        if context is not None:
+            return context
+        async with self._locks[name]:
+            if name not in self._contexts:
+                spec = self.specs[name]
+                lifespan = get_manifest(spec.backend).load_lifespan()
+                print(f"Sources: Opening '{name}' ({spec.backend})...")
+                self._contexts[name] = await self._stack.enter_async_context(
+                    lifespan(None, **spec.lifespan_kwargs())
+                )
+            return self._contexts[name]
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "name": spec.name,
+                "backend": spec.backend,
+                "default": spec.name == self.default,
+                "open": spec.name in self._contexts,
+                "tools": list(get_manifest(spec.backend).tools),
+            }
+            for spec in self.specs.values()
+        ]
+
+    async def close(self) -> None:
+        await self._stack.aclose()
+        self._contexts.clear()
+
+
+def create_sources_lifespan(specs: List[SourceSpec], default: Optional[str] = None):
+    @asynccontextmanager
+    async def sources_lifespan(server: FastMCP) -> AsyncIterator[SourceRegistry]:
+        registry = SourceRegistry(specs, default)
+        print(f"Sources: {len(specs)} configured, default '{registry.default}'.")
+        try:
+            yield registry
+        finally:
+            await registry.close()
+
+    return sources_lifespan
+
+
+class _SourceContext:
+    """The caller's Context, with lifespan_context swapped for one source's context."""
+
+    def __init__(self, ctx: Context, lifespan_context: Any):
+        self._ctx = ctx
+        self.request_context = copy.copy(ctx.request_context)
+        self.request_context.lifespan_context = lifespan_context
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._ctx, name)
+
+
+def _merged_signature(impls: Dict[str, Callable]) -> inspect.Signature:
+    """
+    Union of the implementations' parameters. A parameter that is optional
+    in one backend, missing from one, or defaults differently across them
+    gets a None default, which the dispatcher never forwards.
+    """
+    params: Dict[str, inspect.Parameter] = {}
+    defaults: Dict[str, set] = {}
+    for func in impls.values():
+        for name, param in inspect.signature(func).parameters.items():
+            params.setdefault(name, param)
+            defaults.setdefault(name, set()).add(repr(param.default))
+    for name, param in params.items():
+        if name == "ctx":
+            continue
+        everywhere = all(name in inspect.signature(f).parameters for f in impls.values())
+        if len(defaults[name]) > 1 or (not everywhere and param.default is inspect.Parameter.empty):
+            params[name] = param.replace(default=None)
+    ordered = sorted(
+        params.values(), key=lambda p: p.default is not inspect.Parameter.empty
+    )
+    source = inspect.Parameter(
+        "source",
+        inspect.Parameter.POSITIONAL_OR_KEYWORD,
+        default=None,
+        annotation=Optional[str],
+    )
+    return inspect.Signature(ordered + [source])
+
+
+def build_source_tool(tool_name: str, impls: Dict[str, Callable]) -> Callable:
+    """
+    One MCP tool dispatching to the backend implementations in ``impls``
+    (backend -> function) by the source argument. Its parameters are the
+    union of the implementations'; arguments left at their default are not
+    forwarded, so each backend applies its own, and ones the target backend
+    lacks must be left at their defaults.
+    """
+    signature = _merged_signature(impls)
+    first = next(iter(impls.values()))
+
+    async def tool(ctx: Context, source: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        registry = ctx.request_context.lifespan_context
+        if not isinstance(registry, SourceRegistry):
+            return {"error": "Data source registry not available."}
+        spec = registry.spec(source)
+        if spec is None:
+            return {"error": f"Unknown data source '{source}'. Known sources: {sorted(registry.specs)}."}
+        impl = impls.get(spec.backend)
+        if impl is None:
+            return {"error": f"Tool '{tool_name}' is not available for {spec.backend} source '{spec.name}'."}
+        impl_signature = inspect.signature(impl)
+        for name in list(kwargs):
+            if kwargs[name] == signature.parameters[name].default:
+                del kwargs[name]
+            elif name not in impl_signature.parameters:
+                return {"error": f"Argument '{name}' is not supported for {spec.backend} sources."}
+        try:
+            impl_signature.bind(ctx, **kwargs)
+        except TypeError as e:
+            return {"error": f"Invalid arguments for {spec.backend} source '{spec.name}': {e}"}
+        try:
+            source_ctx = await registry.open(spec.name)
+        except Exception as e:
+            print(f"Sources: Could not open '{spec.name}': {e}")
+            return {"error": f"Could not open data source '{spec.name}': {type(e).__name__}"}
+        return await impl(_SourceContext(ctx, source_ctx), **kwargs)
+
+    functools.update_wrapper(tool, first)
+    del tool.__wrapped__  # FastMCP must see the merged signature, not first's.
+    tool.__signature__ = signature
+    tool.__doc__ = (first.__doc__ or "").rstrip() + (
+        "\n    source: name of the data source to use (see list_sources); "
+        "defaults to the default source.\n"
+    )
+    return tool
+
+
+def source_tools(specs: List[SourceSpec]) -> Dict[str, Callable]:
+    """Dispatching tools for every tool name implemented by a configured backend."""
+    impls: Dict[str, Dict[str, Callable]] = {}
+    for backend in dict.fromkeys(spec.backend for spec in specs):
+        for tool_name, func in get_manifest(backend).load_tools().items():
+            impls.setdefault(tool_name, {})[backend] = func
+    return {name: build_source_tool(name, by_backend) for name, by_backend in impls.items()}
+
+
+async def list_sources(ctx: Context) -> Dict[str, Any]:
+    """Lists the configured data sources, their backend, whether they are open, and their tools."""
+    registry = ctx.request_context.lifespan_context
+    if not isinstance(registry, SourceRegistry):
+        return {"error": "Data source registry not available."}
+    return {"sources": registry.status()}
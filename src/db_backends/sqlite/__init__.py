@@ -0,0 +1,37 @@
+from ..plugins import BackendManifest
+
+MANIFEST = BackendManifest(
+    name="sqlite",
+    label="SQLite",
+    package=__name__,
+    url_schemes=("sqlite",),
+    tools={
+        "get_database_schema": "schema_tools:get_database_schema",
+        "profile_table": "schema_tools:profile_table",
+        "execute_query": "query_tools:execute_query",
+        "execute_batch": "query_tools:execute_batch",
+        "fetch_next_page": "query_tools:fetch_next_page",
+        "export_query": "query_tools:export_query",
+        "import_rows": "query_tools:import_rows",
+        "get_cache_stats": "query_tools:get_cache_stats",
+        "search_data": "query_tools:search_data",
+        "create_search_index": "text_search:create_search_index",
+    },
+    # Read-only tools: identical concurrent calls share one execution.
+    shared_calls=(
+        "get_database_schema",
+        "profile_table",
+        "search_data",
+        "execute_batch",
+    ),
+    # Cheap metadata tools: served ahead of queued queries.
+    light_tools=(
+        "get_database_schema",
+        "get_cache_stats",
+    ),
+)
+
+
+def __getattr__(name):
+    # Tools and app_lifespan are imported on first access, not with the package.
+    return MANIFEST.export(name)
@@ -0,0 +1,48 @@
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from .schema_tools import row_estimate
+
+# "SCAN items", "SCAN TABLE items AS i" (SQLite < 3.36) and "SCAN items USING
+# COVERING INDEX ix" all read the whole table; SEARCH lines use an index.
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\S+)")
+# A virtual table (e.g. an FTS5 index) reports the constraints it used as
+# "INDEX <n>:<idxStr>"; a non-empty idxStr means it is not reading everything.
+_CONSTRAINED_VIRTUAL_SCAN = re.compile(r"VIRTUAL TABLE INDEX \d+:\S")
+# A trailing LIMIT stops a streaming scan early, unless a temp b-tree
+# (ORDER BY / GROUP BY / DISTINCT) has to see every row first.
+_TRAILING_LIMIT = re.compile(r"\bLIMIT\s+\S+(?:\s+OFFSET\s+\S+)?\s*;?\s*$", re.I)
+
+
+def explain_summary(
+    conn: sqlite3.Connection, sql_query: str, params: Optional[List[Any]]
+) -> Dict[str, Any]:
+    """
+    Runs on a pool worker thread. Summarizes EXPLAIN QUERY PLAN for the cost
+    guard; SQLite gives no cost or row estimates, so only full scans count.
+    """
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql_query}", params or []).fetchall()
+    depths: Dict[int, int] = {}
+    outline: List[str] = []
+    scanned: List[str] = []
+    for node_id, parent, _, detail in plan:
+        depths[node_id] = depths.get(parent, -1) + 1
+        outline.append("  " * depths[node_id] + detail)
+        match = _FULL_SCAN.match(detail)
+        if match and match.group(1) not in scanned and not _CONSTRAINED_VIRTUAL_SCAN.search(detail):
+            scanned.append(match.group(1))
+
+    bounded = _TRAILING_LIMIT.search(sql_query) and not any(
+        "TEMP B-TREE" in line for line in outline
+    )
+    full_scans = []
+    if not bounded:
+        for table in scanned:
+            full_scans.append({"table": table, "rows": row_estimate(conn, table)[0]})
+    return {
+        "estimated_cost": None,
+        "estimated_rows": None,
+        "full_scans": full_scans,
+        "plan": outline,
+    }
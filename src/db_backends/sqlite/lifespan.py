@@ -1,26 +1,54 @@
 import os
-import sqlite3
 from collections.abc import AsyncIterator
 from contextlib import (
     asynccontextmanager,
 )
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Optional
 
 from mcp.server.fastmcp import FastMCP  # For type hinting server if needed
 
+from ..common.cache import TTLCache
+from ..common.cost_guard import CostGuard
+from ..common.cursors import CursorRegistry
+from ..common.export import ExportSettings
+from ..common.ingest import ImportSettings
+from ..common.limits import QueryLimits
+from ..common.result_cache import ResultCache
+from .pool import SQLiteConnectionPool
+
 
 @dataclass
 class SQLiteAppContext:
     db_path: str
-    conn: sqlite3.Connection | None = None
+    pool: SQLiteConnectionPool | None = None
+    cursors: CursorRegistry = field(default_factory=CursorRegistry)
+    limits: QueryLimits = field(default_factory=QueryLimits)
+    schema_cache: TTLCache = field(default_factory=TTLCache)
+    result_cache: ResultCache = field(default_factory=ResultCache)
+    cost_guard: CostGuard = field(default_factory=CostGuard)
+    allow_index_ddl: bool = False  # create_search_index may create FTS5 tables
+    exports: ExportSettings = field(default_factory=ExportSettings)
+    imports: ImportSettings = field(default_factory=ImportSettings)
 
 
 @asynccontextmanager
-async def app_lifespan(server: FastMCP) -> AsyncIterator[SQLiteAppContext]:
-    """Manages the SQLite database path for the application lifecycle."""
-    db_file_path = os.environ.get(
+async def app_lifespan(
+    server: FastMCP, db_path: Optional[str] = None
+) -> AsyncIterator[SQLiteAppContext]:
+    """
+    Manages the SQLite connection pool for the application lifecycle.
+    db_path overrides SQLITE_DATABASE_PATH (used for named data sources).
+    """
+    db_file_path = db_path or os.environ.get(
         "SQLITE_DATABASE_PATH", "database.db"
     )  # Default to database.db
+    pool_size = int(os.environ.get("SQLITE_POOL_SIZE", 4))
+    if pool_size < 1:
+        raise ValueError(f"SQLITE_POOL_SIZE must be at least 1 (got {pool_size}).")
+    # Set SQLITE_JOURNAL_MODE="" to leave the database's journal mode untouched.
+    journal_mode = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    busy_timeout_ms = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
 
     # ตรวจสอบว่าไฟล์ database (หรือ directory) สามารถเข้าถึงได้ (optional)
     # db_dir = os.path.dirname(os.path.abspath(db_file_path))
@@ -30,19 +58,48 @@ async def app_lifespan(server: FastMCP) -> AsyncIterator[SQLiteAppContext]:
 
     print(f"SQLite Lifespan: Using database file at '{db_file_path}'")
 
-    # สำหรับ SQLite ที่เป็น file-based อาจจะไม่ต้องทำ "connect/disconnect" ใน lifespan
-    # แต่ lifespan ยังมีประโยชน์ในการ set up AppContext ด้วย db_path
-    # ถ้าต้องการเปิด connection ค้างไว้ ก็ทำได้ที่นี่
-    # conn = None
+    pool = SQLiteConnectionPool(
+        db_file_path,
+        size=pool_size,
+        journal_mode=journal_mode or None,
+        busy_timeout_ms=busy_timeout_ms,
+    )
+    # Each paged result pins a pooled connection; always leave one free for other tools.
+    cursors = CursorRegistry(
+        idle_timeout=float(os.environ.get("QUERY_CURSOR_IDLE_TIMEOUT", 300)),
+        max_open=max(0, min(int(os.environ.get("QUERY_MAX_OPEN_CURSORS", 4)), pool_size - 1)),
+    )
+    if cursors.max_open:
+        print(f"SQLite Lifespan: Up to {cursors.max_open} paged results can be open at once.")
+    else:
+        print(
+            "SQLite Lifespan: Paged results are disabled "
+            "(they need SQLITE_POOL_SIZE >= 2 and QUERY_MAX_OPEN_CURSORS >= 1)."
+        )
     try:
-        # conn = sqlite3.connect(db_file_path)
-        # print(f"SQLite Lifespan: Connection to '{db_file_path}' established.")
-        yield SQLiteAppContext(db_path=db_file_path)  # , conn=conn)
+        pool.open()
+        print(f"SQLite Lifespan: Connection pool of {pool_size} established.")
+        cursors.start()
+        yield SQLiteAppContext(
+            db_path=db_file_path,
+            pool=pool,
+            cursors=cursors,
+            limits=QueryLimits.from_env(),
+            schema_cache=TTLCache(
+                max_entries=int(os.environ.get("SCHEMA_CACHE_MAX_ENTRIES", 256)),
+                ttl=float(os.environ.get("SCHEMA_CACHE_TTL", 300)),
+            ),
+            result_cache=ResultCache.from_env(),
+            cost_guard=CostGuard.from_env(),
+            allow_index_ddl=os.environ.get("SEARCH_INDEX_DDL_ENABLED", "").lower()
+            in ("1", "true", "yes"),
+            exports=ExportSettings.from_env(),
+            imports=ImportSettings.from_env(),
+        )
     except Exception as e:
         print(f"SQLite Lifespan: Error during setup - {e}")
-        # yield SQLiteAppContext(db_path=db_file_path, conn=None) # หรือจัดการ error ตามความเหมาะสม
         raise
-    # finally:
-    # if conn:
-    #     print(f"SQLite Lifespan: Closing connection to '{db_file_path}'.")
-    #     conn.close()
+    finally:
+        await cursors.close()
+        print(f"SQLite Lifespan: Closing connection pool for '{db_file_path}'.")
+        pool.close()
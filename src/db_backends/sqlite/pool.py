@@ -0,0 +1,127 @@
+import asyncio
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SQLiteConnectionPool:
+    """
+    A bounded pool of reusable SQLite connections served from worker threads.
+
+    sqlite3 is blocking, so every query is dispatched to a thread pool
+    (one worker per connection) instead of running on the event loop.
+    Connections are opened once and handed back after each call; any
+    transaction left open by a call is rolled back on release, so a pooled
+    connection always starts clean.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        size: int = 4,
+        journal_mode: Optional[str] = "WAL",
+        busy_timeout_ms: int = 5000,
+        acquire_timeout: float = 30.0,
+    ):
+        if size < 1:
+            raise ValueError("SQLite pool size must be at least 1.")
+        self.db_path = db_path
+        self.size = size
+        self.journal_mode = journal_mode
+        self.busy_timeout_ms = busy_timeout_ms
+        self.acquire_timeout = acquire_timeout
+        self._idle: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=size)
+        self._all: list[sqlite3.Connection] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Kept out of the pool: PRAGMA data_version is per connection, so it is
+        # only a usable change counter when always read from the same one.
+        self._monitor: Optional[sqlite3.Connection] = None
+        self._monitor_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,  # Connections move between worker threads.
+            timeout=self.busy_timeout_ms / 1000,
+        )
+
+    def open(self) -> None:
+        """Opens all pooled connections and starts the worker threads."""
+        first = self._connect()
+        if self.journal_mode:
+            # journal_mode is persistent for WAL, so setting it once is enough.
+            first.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        self._all.append(first)
+        self._idle.put(first)
+        for _ in range(self.size - 1):
+            conn = self._connect()
+            self._all.append(conn)
+            self._idle.put(conn)
+        self._monitor = self._connect()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.size, thread_name_prefix="sqlite-pool"
+        )
+
+    def close(self) -> None:
+        """Stops the worker threads and closes every pooled connection."""
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for conn in self._all:
+            conn.close()
+        self._all.clear()
+        if self._monitor:
+            self._monitor.close()
+            self._monitor = None
+
+    def acquire(self) -> sqlite3.Connection:
+        """Blocking acquire; call from a worker thread only."""
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                "Timed out waiting for a pooled SQLite connection."
+            ) from None
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Blocking release; call from a worker thread only."""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def data_version(self) -> int:
+        """
+        Blocking; call from a worker thread only. Changes whenever another
+        connection (pooled or external) commits to the database.
+        """
+        with self._monitor_lock:
+            return self._monitor.execute("PRAGMA data_version").fetchone()[0]
+
+    def _run_pooled(self, func: Callable[..., T], *args: Any) -> T:
+        conn = self.acquire()
+        try:
+            return func(conn, *args)
+        finally:
+            self.release(conn)
+
+    async def call(self, func: Callable[..., T], *args: Any) -> T:
+        """Runs ``func(*args)`` in a worker thread without touching the pool."""
+        if self._executor is None:
+            raise RuntimeError("SQLite connection pool is not open.")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Runs ``func(conn, *args)`` on a pooled connection in a worker thread."""
+        return await self.call(self._run_pooled, func, *args)
+
+    async def checkout(self) -> sqlite3.Connection:
+        """Takes a connection out of the pool until ``checkin`` (e.g. for a held cursor)."""
+        return await self.call(self.acquire)
+
+    async def checkin(self, conn: sqlite3.Connection) -> None:
+        await self.call(self.release, conn)
@@ -1,25 +1,271 @@
+import functools
+import os
+import re
 import sqlite3
-from typing import Any, Dict, List, Optional  # เพิ่ม List, Optional
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple  # เพิ่ม List, Optional
 
 from mcp.server.fastmcp import Context
 
+from ..common.batch import batch_response, gather_limited, parse_statements
+from ..common.cost_guard import with_warning
+from ..common.cursors import HeldCursor, next_page, open_page
+from ..common.export import ExportWriter, check_export, export_path
+from ..common.formats import check_format, encode_rows
+from ..common.ingest import (
+    Row,
+    batched,
+    check_import,
+    file_rows,
+    inline_rows,
+    resolve_import_file,
+)
+from ..common.limits import QueryLimits, cap_rows
+from ..common.result_cache import referenced_tables, result_cache_key
+from .explain import explain_summary
 from .lifespan import SQLiteAppContext
+from .pool import SQLiteConnectionPool
+from .schema_tools import _quote
+from .text_search import SEARCH_MODES, fts_columns, fts_table, match_expression
+
+# How many SQLite VM instructions run between statement-timeout checks.
+_PROGRESS_HANDLER_STEPS = 10000
+
+_FILTER_OPERATORS = frozenset({"=", "!=", "<>", "<", "<=", ">", ">=", "LIKE", "NOT LIKE"})
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+@contextmanager
+def _statement_deadline(conn: sqlite3.Connection, timeout_ms: int):
+    """
+    Interrupts whatever statement runs on ``conn`` once timeout_ms has
+    elapsed; sqlite3 then raises OperationalError("interrupted").
+    """
+    if not timeout_ms:
+        yield
+        return
+    deadline = time.monotonic() + timeout_ms / 1000
+    conn.set_progress_handler(lambda: time.monotonic() > deadline, _PROGRESS_HANDLER_STEPS)
+    try:
+        yield
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def _is_interrupted(e: sqlite3.Error) -> bool:
+    return isinstance(e, sqlite3.OperationalError) and str(e) == "interrupted"
+
+
+def _timeout_error(limits: QueryLimits) -> Dict[str, Any]:
+    return {
+        "error": f"Query cancelled: exceeded the statement timeout of {limits.statement_timeout_ms} ms."
+    }
+
+
+def _open_cursor(
+    conn: sqlite3.Connection,
+    sql_query: str,
+    params: Optional[List[Any]],
+    timeout_ms: int = 0,
+) -> sqlite3.Cursor:
+    cursor = conn.cursor()
+    try:
+        with _statement_deadline(conn, timeout_ms):
+            if params:
+                cursor.execute(sql_query, tuple(params))
+            else:
+                cursor.execute(sql_query)
+    except BaseException:
+        cursor.close()
+        raise
+    return cursor
+
+
+def _fetch_many(
+    conn: sqlite3.Connection, cursor: sqlite3.Cursor, n: int, timeout_ms: int
+) -> List[Any]:
+    with _statement_deadline(conn, timeout_ms):
+        return cursor.fetchmany(n)
+
+
+class _SQLiteHeldCursor(HeldCursor):
+    """A cursor kept open on a connection checked out of the pool."""
+
+    def __init__(
+        self,
+        pool: SQLiteConnectionPool,
+        page_size: int,
+        limits: QueryLimits,
+        format: str = "objects",
+    ):
+        super().__init__(page_size, max_bytes=limits.max_response_bytes)
+        self.format = format
+        self._pool = pool
+        self._timeout_ms = limits.statement_timeout_ms
+        self._conn: Optional[sqlite3.Connection] = None
+        self._cursor: Optional[sqlite3.Cursor] = None
+        self.columns: List[str] = []
+
+    async def open(self, sql_query: str, params: Optional[List[Any]]) -> None:
+        self._conn = await self._pool.checkout()
+        self._cursor = await self._pool.call(
+            _open_cursor, self._conn, sql_query, params, self._timeout_ms
+        )
+        if self._cursor.description:
+            self.columns = [description[0] for description in self._cursor.description]
+
+    async def _fetch(self, n: int) -> List[Any]:
+        return await self._pool.call(
+            _fetch_many, self._conn, self._cursor, n, self._timeout_ms
+        )
+
+    async def _close(self) -> None:
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        try:
+            if self._cursor is not None:
+                await self._pool.call(self._cursor.close)
+        finally:
+            await self._pool.checkin(conn)
+
+
+@contextmanager
+def _query_only(conn: sqlite3.Connection):
+    """Makes SQLite reject writes on ``conn`` for the duration of the block."""
+    conn.execute("PRAGMA query_only = ON")
+    try:
+        yield
+    finally:
+        conn.execute("PRAGMA query_only = OFF")
+
+
+def _query_error(e: Exception, limits: QueryLimits) -> Dict[str, Any]:
+    if isinstance(e, sqlite3.Error):  # Catch specific SQLite errors
+        if _is_interrupted(e):
+            return _timeout_error(limits)
+        print(f"SQLite query error: {e}")
+        return {"error": f"SQLite Error: {str(e)}"}
+    print(f"Unexpected error during SQLite query: {e}")
+    return {"error": f"An unexpected error occurred: {str(e)}"}
+
+
+def _format_page(
+    cursor: _SQLiteHeldCursor, rows: List[Any], token: Optional[str]
+) -> Dict[str, Any]:
+    return {
+        "columns": cursor.columns,
+        **encode_rows(cursor.columns, rows, cursor.format),
+        "next_page_token": token,
+        "truncated": cursor.truncated,
+    }
+
+
+def _run_query(
+    conn: sqlite3.Connection,
+    sql_query: str,
+    params: Optional[List[Any]],
+    limits: QueryLimits,
+    format: str = "objects",
+    read_only: bool = False,
+) -> Dict[str, Any]:
+    """Runs on a pool worker thread with a pooled connection."""
+    if read_only:
+        with _query_only(conn):
+            return _run_query(conn, sql_query, params, limits, format)
+    timeout_ms = limits.statement_timeout_ms
+    cursor = _open_cursor(conn, sql_query, params, timeout_ms)
+    try:
+        # ดึงชื่อคอลัมน์
+        column_names = (
+            [description[0] for description in cursor.description]
+            if cursor.description
+            else []
+        )
+
+        with _statement_deadline(conn, timeout_ms):
+            if limits.max_rows:
+                # One extra row tells us whether the cap cut the result short.
+                result_rows = cursor.fetchmany(limits.max_rows + 1)
+            else:
+                result_rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    result_rows, truncated = cap_rows(
+        result_rows, limits.max_rows, limits.max_response_bytes
+    )
+
+    # แปลงผลลัพธ์เป็น list of dicts เพื่อให้ LLM ใช้งานง่าย (or another requested format)
+    return {
+        "columns": column_names,
+        **encode_rows(column_names, result_rows, format),
+        "truncated": truncated,
+    }
+
+
+def _run_snapshot_batch(
+    conn: sqlite3.Connection,
+    statements: List[Tuple[str, List[Any]]],
+    limits: QueryLimits,
+    format: str,
+) -> List[Dict[str, Any]]:
+    """
+    Runs on a pool worker thread. The explicit BEGIN holds one read
+    transaction, and so one snapshot, across every statement; it is rolled
+    back when the connection is released.
+    """
+    results = []
+    with _query_only(conn):
+        conn.execute("BEGIN")
+        for sql_query, params in statements:
+            try:
+                results.append(_run_query(conn, sql_query, params, limits, format))
+            except Exception as e:
+                results.append(_query_error(e, limits))
+    return results
+
+
+async def _cost_check(
+    lifespan_ctx: SQLiteAppContext, sql_query: str, params: Optional[List[Any]]
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Runs the cost guard on read queries; returns (rejection, warning)."""
+    if not sql_query.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None, None
+    return await lifespan_ctx.cost_guard.check(
+        sql_query, params, lambda: lifespan_ctx.pool.run(explain_summary, sql_query, params)
+    )
 
 
 # @mcp.tool() # การ register จะทำใน main.py
-def execute_query(
-    ctx: Context, sql_query: str, params: Optional[List[Any]] = None
+async def execute_query(
+    ctx: Context,
+    sql_query: str,
+    params: Optional[List[Any]] = None,
+    page_size: Optional[int] = None,
+    format: str = "objects",
 ) -> Dict[str, Any]:
     """
     Executes a given SQL query against the SQLite database.
     [!] SECURITY WARNING: Directly executing SQL from LLM can be risky.
     Consider sanitization or using this tool only with trusted queries.
+    Pass page_size to hold the cursor open and return only the first page,
+    along with a next_page_token for fetch_next_page.
+    Results are capped by the server's max_rows / max_response_bytes settings
+    ("truncated" is true when a cap was hit) and by its statement timeout.
+    format: "objects" (default, list of dicts), "compact" (columns + row
+    arrays), "columnar" (column -> values), "csv" or "arrow" (base64 blobs);
+    pages fetched with fetch_next_page keep the same format.
     """
     lifespan_ctx = ctx.request_context.lifespan_context
-    if not isinstance(lifespan_ctx, SQLiteAppContext):
-        return {"error": "SQLite context not available."}
+    if not isinstance(lifespan_ctx, SQLiteAppContext) or not lifespan_ctx.pool:
+        return {"error": "SQLite connection pool not available."}
 
-    db_path = lifespan_ctx.db_path
+    pool = lifespan_ctx.pool
+    limits = lifespan_ctx.limits
+    format_error = check_format(format)
+    if format_error:
+        return format_error
 
     # คำเตือน: การรัน SQL ดิบๆ จาก LLM มีความเสี่ยงสูงมาก
     # ควรมีมาตรการป้องกัน SQL Injection ที่เข้มงวด หรือใช้ Tool นี้กับ Query ที่เชื่อถือได้เท่านั้น
@@ -34,35 +280,440 @@ def execute_query(
         # return {"error": "Only SELECT statements are tentatively permitted."}
         pass  # Allowing more than SELECT for now, but be very careful.
 
+    if page_size is not None:
+        if page_size < 1:
+            return {"error": "page_size must be a positive integer."}
+        if not lifespan_ctx.cursors.max_open:
+            return {
+                "error": "Paging is disabled on this server: it needs SQLITE_POOL_SIZE >= 2 "
+                "and QUERY_MAX_OPEN_CURSORS >= 1. Call again without page_size."
+            }
+        if not lifespan_ctx.cursors.has_capacity():
+            return {
+                "error": "Too many open result cursors. Page through or wait for idle ones to expire."
+            }
+        rejection, warning = await _cost_check(lifespan_ctx, sql_query, params)
+        if rejection:
+            return rejection
+        cursor = _SQLiteHeldCursor(pool, limits.clamp_rows(page_size), limits, format)
+        try:
+            await cursor.open(sql_query, params)
+            rows, token = await open_page(lifespan_ctx.cursors, cursor)
+            return with_warning(_format_page(cursor, rows, token), warning)
+        except sqlite3.Error as e:
+            await cursor.close()
+            if _is_interrupted(e):
+                return _timeout_error(limits)
+            print(f"SQLite query error: {e}")
+            return {"error": f"SQLite Error: {str(e)}"}
+        except Exception as e:
+            await cursor.close()
+            print(f"Unexpected error during SQLite query: {e}")
+            return {"error": f"An unexpected error occurred: {str(e)}"}
+
+    return await _cached_query(lifespan_ctx, sql_query, params, format)
+
+
+async def _cached_query(
+    lifespan_ctx: SQLiteAppContext,
+    sql_query: str,
+    params: Optional[List[Any]],
+    format: str,
+    read_only: bool = False,
+) -> Dict[str, Any]:
+    """Runs a query on a pooled connection, serving SELECTs via the result cache."""
+    pool = lifespan_ctx.pool
+    limits = lifespan_ctx.limits
+    result_cache = lifespan_ctx.result_cache
+    cacheable = result_cache.enabled and sql_query.strip().upper().startswith("SELECT")
+
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        if params:
-            cursor.execute(sql_query, tuple(params))
-        else:
-            cursor.execute(sql_query)
+        if cacheable:
+            result_cache.observe_data_version(await pool.call(pool.data_version))
+            cache_key = result_cache_key("execute_query", sql_query, [params, format])
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        rejection, warning = await _cost_check(lifespan_ctx, sql_query, params)
+        if rejection:
+            return rejection
+        result = with_warning(
+            await pool.run(_run_query, sql_query, params, limits, format, read_only),
+            warning,
+        )
+        if cacheable:
+            result_cache.set(cache_key, result, referenced_tables(sql_query))
+        return result
+    except Exception as e:
+        return _query_error(e, limits)
 
-        # ดึงชื่อคอลัมน์
-        column_names = (
-            [description[0] for description in cursor.description]
-            if cursor.description
-            else []
+
+async def execute_batch(
+    ctx: Context,
+    statements: List[Dict[str, Any]],
+    consistent: bool = False,
+    format: str = "objects",
+) -> Dict[str, Any]:
+    """
+    Runs several read-only queries in one tool call and returns one result
+    (or {"error": ...}) per statement, in order.
+    statements: [{"sql": "SELECT * FROM t WHERE id = ?", "params": [42]}, ...]
+    By default statements run concurrently on separate pooled connections.
+    With consistent=true they run one after another on a single connection
+    inside one read transaction, so all of them see the same snapshot.
+    Writes are rejected (PRAGMA query_only); the same caps and timeout as
+    execute_query apply to each statement.
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, SQLiteAppContext) or not lifespan_ctx.pool:
+        return {"error": "SQLite connection pool not available."}
+
+    limits = lifespan_ctx.limits
+    format_error = check_format(format)
+    if format_error:
+        return format_error
+    parsed, batch_error = parse_statements(statements, limits.batch_max_statements)
+    if batch_error:
+        return batch_error
+    print(f"SQLite: Executing batch of {len(parsed)} queries (consistent={consistent})")
+
+    if not consistent:
+        results = await gather_limited(
+            [
+                functools.partial(_cached_query, lifespan_ctx, sql, params, format, True)
+                for sql, params in parsed
+            ],
+            limits.batch_concurrency,
         )
+        return batch_response(results, consistent)
+
+    # Checked up front: the snapshot batch runs entirely on a worker thread.
+    checks = [await _cost_check(lifespan_ctx, sql, params) for sql, params in parsed]
+    runnable = [stmt for stmt, (rejection, _) in zip(parsed, checks) if not rejection]
+    try:
+        ran = iter(await lifespan_ctx.pool.run(_run_snapshot_batch, runnable, limits, format))
+    except Exception as e:
+        return _query_error(e, limits)
+    results = [rejection or with_warning(next(ran), warning) for rejection, warning in checks]
+    return batch_response(results, consistent)
+
+
+def _search_sql(
+    table_name: str,
+    search_fields: Tuple[str, ...],
+    filter_shape: List[Tuple[str, str]],
+    sort_field: Optional[str],
+    sort_direction: str,
+    fulltext: bool,
+) -> str:
+    """
+    The statement behind search_data. In fulltext mode the table is joined
+    to its FTS5 index on rowid and ranked by bm25 (negated, so higher is
+    better, as with PostgreSQL's ts_rank).
+    """
+    columns = f"{table_name}.*"
+    source = table_name
+    where_clauses = []
+    if search_fields and fulltext:
+        fts = fts_table(table_name)
+        columns += f", -bm25({fts}) AS search_rank"
+        source += f" JOIN {fts} ON {fts}.rowid = {table_name}.rowid"
+        where_clauses.append(f"{fts} MATCH ?")
+    elif search_fields:
+        # LIKE is case-insensitive for ASCII text in SQLite.
+        clauses = [f"{table_name}.{field} LIKE ?" for field in search_fields]
+        where_clauses.append(f"({' OR '.join(clauses)})")
+    for field, op in filter_shape:
+        where_clauses.append(f"{table_name}.{field} {op} ?")
+
+    sql = f"SELECT {columns} FROM {source}"
+    if where_clauses:
+        sql += " WHERE " + " AND ".join(where_clauses)
+    if sort_field:
+        sql += f" ORDER BY {table_name}.{sort_field} {sort_direction}"
+    elif search_fields and fulltext:
+        sql += " ORDER BY search_rank DESC"
+    return sql + " LIMIT ? OFFSET ?"
+
+
+async def search_data(
+    ctx: Context,
+    table_name: str,
+    search_term: Optional[str] = None,
+    search_fields: Optional[List[str]] = None,
+    filters: Optional[List[Dict[str, Any]]] = None,  # [{"field": "price", "op": ">", "value": 100}]
+    sort_by: Optional[Dict[str, str]] = None,  # {"field": "name", "direction": "asc"}
+    limit: int = 10,
+    offset: int = 0,
+    format: str = "objects",
+    search_mode: str = "substring",
+) -> Dict[str, Any]:
+    """
+    Searches rows of a table for search_term in search_fields, optionally
+    narrowed by filters and ordered by sort_by.
+    search_mode: "substring" (default): case-insensitive substring (LIKE).
+    "fulltext": every word must appear in the fields, ranked by relevance
+    (search_rank column, best first without sort_by); needs an FTS5 index
+    from create_search_index covering the fields.
+    limit is capped by the server's max_rows setting.
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, SQLiteAppContext) or not lifespan_ctx.pool:
+        return {"error": "SQLite connection pool not available."}
+    limits = lifespan_ctx.limits
+
+    if not table_name.isalnum():
+        return {"error": "Invalid table name."}
+    if search_mode not in SEARCH_MODES:
+        return {"error": f"search_mode must be one of {list(SEARCH_MODES)}."}
+    format_error = check_format(format)
+    if format_error:
+        return format_error
+
+    fulltext = search_mode == "fulltext"
+    valid_search_fields = tuple(
+        field for field in (search_fields or []) if field.isalnum()
+    )
+    params: List[Any] = []
+    if search_term and valid_search_fields:
+        if fulltext:
+            try:
+                indexed = await lifespan_ctx.pool.run(fts_columns, table_name)
+            except Exception as e:
+                return _query_error(e, limits)
+            missing = [field for field in valid_search_fields if field not in indexed]
+            if missing:
+                return {
+                    "error": f"No full-text index on {table_name}({', '.join(missing)}); "
+                    "call create_search_index with these fields first."
+                }
+            params.append(match_expression(search_term, valid_search_fields))
+        else:
+            params.extend([f"%{search_term}%"] * len(valid_search_fields))
+    else:
+        valid_search_fields = ()
+
+    filter_shape = []
+    for f in filters or []:
+        op = str(f.get("op", "")).upper()
+        if not _IDENTIFIER.match(str(f.get("field", ""))) or op not in _FILTER_OPERATORS:
+            return {
+                "error": f"Invalid filter {f!r}. Fields must be plain identifiers and op one of {sorted(_FILTER_OPERATORS)}."
+            }
+        filter_shape.append((f["field"], op))
+        params.append(f["value"])
+
+    sort_field, sort_direction = None, "ASC"
+    if sort_by:
+        sort_field = sort_by.get("field", "")
+        sort_direction = sort_by.get("direction", "asc").upper()
+        if not _IDENTIFIER.match(sort_field) or sort_direction not in ("ASC", "DESC"):
+            return {"error": "Invalid sort_by; use a plain identifier field and asc/desc."}
 
-        result_rows = cursor.fetchall()
-        conn.close()
+    sql = _search_sql(
+        table_name, valid_search_fields, filter_shape, sort_field, sort_direction, fulltext
+    )
+    params.extend([limits.clamp_rows(limit), offset])
+    print(f"SQLite: search_data on {table_name} (mode={search_mode})")
+    return await _cached_query(lifespan_ctx, sql, params, format, read_only=True)
 
-        # แปลงผลลัพธ์เป็น list of dicts เพื่อให้ LLM ใช้งานง่าย
-        formatted_results = [dict(zip(column_names, row)) for row in result_rows]
 
-        return {
-            "data": formatted_results,
-            "columns": column_names,
-            "row_count": len(formatted_results),
-        }
-    except sqlite3.Error as e:  # Catch specific SQLite errors
+async def fetch_next_page(ctx: Context, page_token: str) -> Dict[str, Any]:
+    """
+    Fetches the next page of a result opened with execute_query(page_size=...).
+    The returned next_page_token is null once the result is exhausted.
+    Cursors left idle for too long are closed and their tokens expire.
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, SQLiteAppContext) or not lifespan_ctx.pool:
+        return {"error": "SQLite connection pool not available."}
+
+    try:
+        page = await next_page(lifespan_ctx.cursors, page_token)
+    except sqlite3.Error as e:
+        if _is_interrupted(e):
+            return _timeout_error(lifespan_ctx.limits)
         print(f"SQLite query error: {e}")
         return {"error": f"SQLite Error: {str(e)}"}
+    if page is None:
+        return {"error": "Unknown or expired page token."}
+    cursor, rows, token = page
+    return _format_page(cursor, rows, token)
+
+
+def _export_rows(
+    conn: sqlite3.Connection,
+    sql_query: str,
+    params: Optional[List[Any]],
+    writer: ExportWriter,
+    chunk_rows: int,
+    timeout_ms: int,
+) -> None:
+    """Runs on a pool worker thread, writing the result chunk_rows at a time."""
+    with _query_only(conn):
+        cursor = _open_cursor(conn, sql_query, params, timeout_ms)
+        try:
+            writer.write_header([description[0] for description in cursor.description or []])
+            while True:
+                rows = _fetch_many(conn, cursor, chunk_rows, timeout_ms)
+                if not rows:
+                    break
+                writer.write_rows(rows)
+        finally:
+            cursor.close()
+
+
+async def export_query(
+    ctx: Context,
+    sql_query: str,
+    params: Optional[List[Any]] = None,
+    format: str = "csv",
+    compression: str = "none",
+    file_name: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Runs a read-only query and writes its full result to a file on the
+    server, returning the file's path, row count and size instead of the
+    rows. For results too large to return through execute_query: the row
+    and response-size caps do not apply, and rows are streamed to disk in
+    chunks without being held in memory.
+    format: "csv" (with a header row), "jsonl" (one JSON object per row) or
+    "parquet" (requires pyarrow). compression: "none" or "gzip".
+    Files go to the server's export directory (EXPORT_DIR); file_name
+    defaults to a generated name and an existing file is never overwritten.
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, SQLiteAppContext) or not lifespan_ctx.pool:
+        return {"error": "SQLite connection pool not available."}
+    settings = lifespan_ctx.exports
+    export_error = check_export(format, compression)
+    if export_error:
+        return export_error
+    try:
+        path = export_path(settings, file_name, format, compression)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    print(f"SQLite: Exporting query to {path}: {sql_query} with params: {params}")
+    try:
+        with ExportWriter(path, format, compression) as writer:
+            await lifespan_ctx.pool.run(
+                _export_rows,
+                sql_query,
+                params,
+                writer,
+                settings.chunk_rows,
+                settings.statement_timeout_ms,
+            )
+    except FileExistsError:
+        return {"error": f"Export file '{os.path.basename(path)}' already exists."}
+    except sqlite3.Error as e:
+        if _is_interrupted(e):
+            return {
+                "error": f"Export cancelled: exceeded the export statement timeout of {settings.statement_timeout_ms} ms."
+            }
+        print(f"SQLite export error: {e}")
+        return {"error": f"SQLite Error: {str(e)}"}
     except Exception as e:
-        print(f"Unexpected error during SQLite query: {e}")
-        return {"error": f"An unexpected error occurred: {str(e)}"}
+        print(f"Unexpected error during SQLite export: {e}")
+        return {"error": f"Export failed: {type(e).__name__}: {e}"}
+    return writer.summary()
+
+
+def _insert_rows(
+    conn: sqlite3.Connection,
+    table_name: str,
+    columns: List[str],
+    rows: Iterable[Row],
+    batch_rows: int,
+    timeout_ms: int,
+) -> Tuple[int, int]:
+    """
+    Runs on a pool worker thread. Inserts every batch with executemany in
+    one transaction, so a failing row leaves the table untouched. Returns
+    (rows inserted, batches).
+    """
+    sql = (
+        f'INSERT INTO "{table_name}" ({", ".join(_quote(column) for column in columns)}) '
+        f'VALUES ({", ".join("?" for _ in columns)})'
+    )
+    row_count = batches = 0
+    conn.execute("BEGIN IMMEDIATE")
+    with conn, _statement_deadline(conn, timeout_ms):  # Commits, or rolls back on error
+        for batch in batched(rows, batch_rows):
+            conn.executemany(sql, batch)
+            row_count += len(batch)
+            batches += 1
+    return row_count, batches
+
+
+async def import_rows(
+    ctx: Context,
+    table_name: str,
+    rows: Optional[List[Any]] = None,
+    columns: Optional[List[str]] = None,
+    file_path: Optional[str] = None,
+    batch_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Bulk-inserts rows into an existing table in one transaction: either all
+    rows are loaded or, on any error, none are.
+    rows: a list of objects ({"column": value}) or, with columns, a list of
+    value lists. file_path instead loads a .csv (with a header row; empty
+    fields are NULL) or .jsonl file, optionally .gz, from the server's
+    import directory (IMPORT_DIR). columns picks the keys read from objects.
+    Rows are inserted batch_size at a time (default IMPORT_BATCH_ROWS).
+    Requires the server to allow imports (IMPORT_ENABLED).
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, SQLiteAppContext) or not lifespan_ctx.pool:
+        return {"error": "SQLite connection pool not available."}
+    settings = lifespan_ctx.imports
+    import_error = check_import(settings, table_name, rows, file_path, columns, batch_size)
+    if import_error:
+        return import_error
+
+    try:
+        if rows is not None:
+            columns, source = inline_rows(rows, columns)
+        else:
+            path, fmt = resolve_import_file(settings, file_path)
+            columns, source = file_rows(path, fmt, columns)
+    except (OSError, ValueError) as e:
+        return {"error": f"Invalid import: {e}"}
+
+    print(f"SQLite: Importing into {table_name} ({', '.join(columns)}) from {file_path or 'rows'}")
+    try:
+        row_count, batches = await lifespan_ctx.pool.run(
+            _insert_rows,
+            table_name,
+            columns,
+            source,
+            batch_size or settings.batch_rows,
+            settings.statement_timeout_ms,
+        )
+    except sqlite3.Error as e:
+        if _is_interrupted(e):
+            return {
+                "error": f"Import cancelled: exceeded the import statement timeout of {settings.statement_timeout_ms} ms."
+            }
+        print(f"SQLite import error: {e}")
+        return {"error": f"SQLite Error: {str(e)}"}
+    except ValueError as e:  # A malformed line further into the file
+        return {"error": f"Invalid import: {e}"}
+    return {"table": table_name, "columns": columns, "row_count": row_count, "batches": batches}
+
+
+async def get_cache_stats(ctx: Context) -> Dict[str, Any]:
+    """
+    Reports hit/miss counters and sizes of the schema and query result
+    caches, and the cost guard's counters and plan cache.
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, SQLiteAppContext):
+        return {"error": "SQLite context not available."}
+    return {
+        "schema_cache": lifespan_ctx.schema_cache.stats(),
+        "result_cache": lifespan_ctx.result_cache.stats(),
+        "cost_guard": lifespan_ctx.cost_guard.stats(),
+    }
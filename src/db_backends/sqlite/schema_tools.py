@@ -1,36 +1,220 @@
+import random
 import sqlite3
-from typing import Any, Dict
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
 
 from mcp.server.fastmcp import Context  # For type hinting ctx
 
+from ..common.formats import check_format, encode_rows
 from .lifespan import SQLiteAppContext  # For type hinting
 
+# profile_table derives column statistics from a random sample of this many rows.
+_STATS_SAMPLE_ROWS = 1000
+# Most common values reported per column by profile_table.
+_MAX_COMMON_VALUES = 5
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def row_estimate(conn: sqlite3.Connection, table: str) -> Tuple[Optional[float], Optional[str]]:
+    """
+    (row count, source): from ANALYZE statistics, else max(rowid), which
+    is exact for append-only tables; (None, None) for views and CTEs.
+    """
+    kind = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (table,)).fetchone()
+    if not kind or kind[0] != "table":
+        return None, None
+    try:
+        row = conn.execute(
+            "SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,)
+        ).fetchone()
+        if row and row[0]:
+            return float(row[0].split()[0]), "sqlite_stat1"
+    except sqlite3.OperationalError:
+        pass  # no sqlite_stat1 until ANALYZE has run
+    try:
+        row = conn.execute(f"SELECT max(rowid) FROM {_quote(table)}").fetchone()
+    except sqlite3.Error:
+        return None, None
+    return float(row[0] or 0), "max(rowid)"
+
+
+def _schema_version(conn: sqlite3.Connection) -> int:
+    # Bumped by SQLite on every schema change, from any connection.
+    return conn.execute("PRAGMA schema_version").fetchone()[0]
+
+
+def _fetch_schema_rows(conn: sqlite3.Connection) -> Tuple[int, list]:
+    version = _schema_version(conn)
+    # ดึง schema ของทุกตาราง
+    cursor = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';"
+    )
+    try:
+        return version, cursor.fetchall()
+    finally:
+        cursor.close()
+
 
 # Tool get_schema (ปรับจาก resource เดิมของคุณ)
 # @mcp.tool() # การ register จะทำใน main.py
-def get_database_schema(ctx: Context) -> Dict[str, Any]:
+async def get_database_schema(ctx: Context) -> Dict[str, Any]:
     """Provides the database schema for all tables."""
     lifespan_ctx = ctx.request_context.lifespan_context
-    if not isinstance(lifespan_ctx, SQLiteAppContext):
-        return {"error": "SQLite context not available."}
+    if not isinstance(lifespan_ctx, SQLiteAppContext) or not lifespan_ctx.pool:
+        return {"error": "SQLite connection pool not available."}
 
-    db_path = lifespan_ctx.db_path
+    pool = lifespan_ctx.pool
+    schema_cache = lifespan_ctx.schema_cache
+    cache_key = ("get_database_schema",)
 
     try:
-        conn = sqlite3.connect(db_path)
-        # ดึง schema ของทุกตาราง
-        cursor = conn.execute(
-            "SELECT sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';"
-        )
-        schema_rows = cursor.fetchall()
-        conn.close()
+        cached = schema_cache.get(cache_key)
+        if cached is not None:
+            cached_version, cached_result = cached
+            if await pool.run(_schema_version) == cached_version:
+                return cached_result
 
-        if not schema_rows:
-            return {"schema": "No tables found in the database."}
+        version, schema_rows = await pool.run(_fetch_schema_rows)
 
-        # รวม schema statements ทั้งหมด
-        full_schema = "\n\n".join(row[0] for row in schema_rows if row[0])
-        return {"schema": full_schema}
+        if not schema_rows:
+            result = {"schema": "No tables found in the database."}
+        else:
+            # รวม schema statements ทั้งหมด
+            full_schema = "\n\n".join(row[0] for row in schema_rows if row[0])
+            result = {"schema": full_schema}
+        schema_cache.set(cache_key, (version, result))
+        return result
     except Exception as e:
         print(f"Error in get_database_schema (SQLite): {e}")
         return {"error": f"An error occurred: {type(e).__name__}"}
+
+
+def _index_distinct(conn: sqlite3.Connection, table: str) -> Dict[str, int]:
+    """Distinct value estimates of each index's leading column, from sqlite_stat1."""
+    try:
+        stats = conn.execute(
+            "SELECT idx, stat FROM sqlite_stat1 WHERE tbl = ? AND idx IS NOT NULL", (table,)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    distinct = {}
+    for index, stat in stats:
+        # "<rows> <avg rows per distinct first column> <... first two columns> ..."
+        parts = stat.split()
+        leading = conn.execute(f"PRAGMA index_info({_quote(index)})").fetchone()
+        if leading and leading[2] and len(parts) > 1 and int(parts[1]):
+            distinct[leading[2]] = round(int(parts[0]) / int(parts[1]))
+    return distinct
+
+
+def _sample_rows(
+    conn: sqlite3.Connection, table: str, n: int
+) -> Tuple[List[str], List[Any], str]:
+    """
+    Up to n random rows, by looking up random rowids (a few index seeks, not
+    a scan); tables without rowids and views fall back to their first rows.
+    """
+    quoted = _quote(table)
+    try:
+        low, high = conn.execute(f"SELECT min(rowid), max(rowid) FROM {quoted}").fetchone()
+    except sqlite3.OperationalError:
+        low = high = None
+    if low is None or high - low + 1 <= n:
+        cursor = conn.execute(f"SELECT * FROM {quoted} LIMIT ?", (n,))
+        method = "all rows" if low is not None else "LIMIT"
+    else:
+        rowids = random.sample(range(low, high + 1), n)
+        placeholders = ", ".join("?" for _ in rowids)
+        cursor = conn.execute(f"SELECT * FROM {quoted} WHERE rowid IN ({placeholders})", rowids)
+        method = "random rowids"
+    columns = [description[0] for description in cursor.description]
+    rows = cursor.fetchall()
+    random.shuffle(rows)
+    return columns, rows, method
+
+
+def _profile(conn: sqlite3.Connection, table_name: str, sample_size: int) -> Dict[str, Any]:
+    """Runs on a pool worker thread."""
+    info = conn.execute(f"PRAGMA table_info({_quote(table_name)})").fetchall()
+    if not info:
+        return {"error": f"Table '{table_name}' not found."}
+    rows_estimate, source = row_estimate(conn, table_name)
+    index_distinct = _index_distinct(conn, table_name)
+    columns, rows, method = _sample_rows(
+        conn, table_name, max(sample_size, _STATS_SAMPLE_ROWS)
+    )
+
+    profiles = []
+    for position, (_, name, data_type, *_rest) in enumerate(info):
+        values = [row[position] for row in rows]
+        counts = Counter(value for value in values if value is not None)
+        profile: Dict[str, Any] = {"name": name, "data_type": data_type}
+        if values:
+            profile["null_fraction"] = round(1 - sum(counts.values()) / len(values), 4)
+            profile["distinct_in_sample"] = len(counts)
+            common = [
+                {"value": value, "frequency": round(count / len(values), 4)}
+                for value, count in counts.most_common(_MAX_COMMON_VALUES)
+                if count > 1
+            ]
+            if common:
+                profile["most_common_values"] = common
+        if name in index_distinct:
+            profile["distinct_estimate"] = index_distinct[name]
+        profiles.append(profile)
+    return {
+        "table": table_name,
+        "row_count_estimate": None if rows_estimate is None else round(rows_estimate),
+        "row_count_source": source,
+        "columns": profiles,
+        "stats_sample_rows": len(rows),
+        "sample_method": method,
+        "sample_columns": columns,
+        "sample_rows": rows[:sample_size],
+    }
+
+
+async def profile_table(
+    ctx: Context, table_name: str, sample_size: int = 20, format: str = "objects"
+) -> Dict[str, Any]:
+    """
+    Summarizes a table without scanning it: a row count estimate (from
+    ANALYZE statistics or the largest rowid), per-column null fraction,
+    distinct values and most common values measured on a random sample of
+    up to 1000 rows (plus distinct estimates of indexed columns from
+    ANALYZE), and sample_size of the sampled rows.
+    Prefer this to COUNT(*) or SELECT * LIMIT for getting to know a table.
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, SQLiteAppContext) or not lifespan_ctx.pool:
+        return {"error": "SQLite connection pool not available."}
+    format_error = check_format(format)
+    if format_error:
+        return format_error
+    if sample_size < 0:
+        return {"error": "sample_size must not be negative."}
+    sample_size = lifespan_ctx.limits.clamp_rows(sample_size)
+
+    pool = lifespan_ctx.pool
+    cache_key = ("profile_table", table_name, sample_size, format)
+    try:
+        # Read before profiling, so a concurrent schema change is never cached as current.
+        version = await pool.run(_schema_version)
+        cached = lifespan_ctx.schema_cache.get(cache_key)
+        if cached is not None:
+            cached_version, cached_result = cached
+            if version == cached_version:
+                return cached_result
+        profile = await pool.run(_profile, table_name, sample_size)
+    except Exception as e:
+        print(f"Error in profile_table (SQLite): {e}")
+        return {"error": f"An error occurred: {type(e).__name__}"}
+    if "error" in profile:
+        return profile
+    columns, rows = profile.pop("sample_columns"), profile.pop("sample_rows")
+    result = {**profile, "sample": encode_rows(columns, rows, format)}
+    lifespan_ctx.schema_cache.set(cache_key, (version, result))
+    return result
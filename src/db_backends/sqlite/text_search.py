@@ -0,0 +1,122 @@
+import sqlite3
+from typing import Any, Dict, List, Sequence, Tuple
+
+from mcp.server.fastmcp import Context
+
+from .lifespan import SQLiteAppContext
+
+SEARCH_MODES = ("substring", "fulltext")
+
+
+def fts_table(table_name: str) -> str:
+    """The FTS5 index create_search_index builds for ``table_name``."""
+    return f"{table_name}_fts"
+
+
+def fts_columns(conn: sqlite3.Connection, table_name: str) -> List[str]:
+    """Columns indexed by the table's FTS5 index; empty if it has none."""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({fts_table(table_name)})")]
+
+
+def match_expression(search_term: str, fields: Sequence[str]) -> str:
+    """
+    An FTS5 MATCH expression requiring every word of ``search_term`` in
+    ``fields``. Words are quoted, so FTS5 query syntax in the term is
+    matched literally instead of raising a syntax error.
+    """
+    words = " ".join('"' + word.replace('"', '""') + '"' for word in search_term.split())
+    return f"{{{' '.join(fields)}}} : ({words})"
+
+
+def _index_statements(table_name: str, fields: Tuple[str, ...]) -> List[str]:
+    """
+    An external-content FTS5 table over ``fields`` (no second copy of the
+    text) and the triggers that keep it in step with the table.
+    """
+    fts = fts_table(table_name)
+    columns = ", ".join(fields)
+    new_values = ", ".join(f"new.{field}" for field in fields)
+    old_values = ", ".join(f"old.{field}" for field in fields)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});"
+    insert = f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.rowid, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({columns}, content='{table_name}', content_rowid='rowid')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table_name} BEGIN {insert} END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table_name} BEGIN {delete} END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {table_name} BEGIN {delete} {insert} END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _build_index(
+    conn: sqlite3.Connection, table_name: str, fields: Tuple[str, ...], refresh: bool
+) -> Dict[str, Any]:
+    """Runs on a pool worker thread; one transaction, so a failure leaves no partial index."""
+    fts = fts_table(table_name)
+    if not conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+    ).fetchone():
+        return {"error": f"Table '{table_name}' not found."}
+    existing = fts_columns(conn, table_name)
+    conn.execute("BEGIN IMMEDIATE")
+    with conn:  # Commits, or rolls back on error
+        if existing and set(existing) == set(fields):
+            if refresh:
+                print(f"SQLite: Rebuilding search index {fts}...")
+                conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+                conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+        else:
+            if existing:
+                # One FTS table per table: indexing other fields replaces it.
+                print(f"SQLite: Replacing search index {fts} ({existing} -> {list(fields)})")
+                for trigger in ("ai", "ad", "au"):
+                    conn.execute(f"DROP TRIGGER IF EXISTS {fts}_{trigger}")
+                conn.execute(f"DROP TABLE {fts}")
+            print(f"SQLite: Creating search index {fts} on {table_name}({', '.join(fields)})")
+            for statement in _index_statements(table_name, fields):
+                conn.execute(statement)
+    return {
+        "table": table_name,
+        "kind": "fulltext",
+        "fields": list(fields),
+        "indexes": [fts],
+        "refreshed": refresh,
+    }
+
+
+async def create_search_index(
+    ctx: Context,
+    table_name: str,
+    fields: List[str],
+    kind: str = "fulltext",
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """
+    Creates (or with refresh=true, rebuilds and optimizes) the FTS5 index
+    behind search_data(search_mode="fulltext") for the given fields of a
+    table. Triggers keep the index current as the table changes; a table
+    has one index, so indexing different fields replaces it.
+    Only kind="fulltext" is supported. Requires the server to allow index
+    DDL (SEARCH_INDEX_DDL_ENABLED).
+    """
+    lifespan_ctx = ctx.request_context.lifespan_context
+    if not isinstance(lifespan_ctx, SQLiteAppContext) or not lifespan_ctx.pool:
+        return {"error": "SQLite connection pool not available."}
+    if not lifespan_ctx.allow_index_ddl:
+        return {"error": "Index creation is disabled on this server (SEARCH_INDEX_DDL_ENABLED)."}
+    if not table_name.isalnum():
+        return {"error": "Invalid table name."}
+    if kind != "fulltext":
+        return {"error": "SQLite supports only kind='fulltext' (FTS5) search indexes."}
+    if not fields or not all(field.isalnum() for field in fields):
+        return {"error": "fields must be a non-empty list of plain column names."}
+
+    try:
+        result = await lifespan_ctx.pool.run(
+            _build_index, table_name, tuple(dict.fromkeys(fields)), refresh
+        )
+    except sqlite3.Error as e:
+        print(f"Error in create_search_index (SQLite): {e}")
+        return {"error": f"Index creation failed: {e}"}
+    lifespan_ctx.schema_cache.clear()
+    return result
@@ -1,8 +1,27 @@
-import importlib
 import os
+import time
+
+# Startup is timed from here; see MCP_STARTUP_BUDGET_MS below.
+STARTUP_STARTED = time.perf_counter()
 
 from dotenv import load_dotenv
 from mcp.server import FastMCP
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from src.db_backends.common.metrics import METRICS, content_size, instrument_tool, server_stats
+from src.db_backends.common.admission import ADMISSION, AdmissionSettings, admit_calls
+from src.db_backends.common.singleflight import share_calls, single_flight_enabled
+from src.db_backends.plugins import agreed_tools, get_manifest
+from src.db_backends.sources import (
+    create_sources_lifespan,
+    list_sources,
+    load_sources_config,
+    parse_sources,
+    source_tools,
+)
+
+METRICS.record_startup("imports", time.perf_counter() - STARTUP_STARTED)
 
 # Load .env file for environment variables
 load_dotenv()
@@ -11,59 +30,75 @@ load_dotenv()
 # Defaults to "postgres" if not set
 ACTIVE_DB_BACKEND = os.environ.get("ACTIVE_DB_BACKEND", "postgres")
 
+# DATA_SOURCES (or DATA_SOURCES_FILE) serves several named databases, of any
+# backend, from this one process and takes precedence over ACTIVE_DB_BACKEND.
+try:
+    DATA_SOURCES = load_sources_config()
+except (OSError, ValueError) as e:  # unreadable DATA_SOURCES_FILE, malformed JSON
+    print(f"FATAL: Invalid DATA_SOURCES configuration. Details: {e}")
+    exit(1)
+if DATA_SOURCES:
+    ACTIVE_DB_BACKEND = "sources"
+
 print(f"INFO: Active database backend configured: '{ACTIVE_DB_BACKEND}'")
 
-# --- Dynamically import modules from the active backend ---
+# --- Load the backend's lifespan and tools from its manifest ---
+# Backends declare their tools in a MANIFEST (src/db_backends/<name>/__init__.py
+# or a "querycraft.backends" entry point). Their database drivers are imported
+# only when a lifespan first connects.
+phase_started = time.perf_counter()
 try:
-    print(f"INFO: Importing lifespan and tools for '{ACTIVE_DB_BACKEND}' backend...")
-    # Construct module paths
-    lifespan_module_path = f"src.db_backends.{ACTIVE_DB_BACKEND}.lifespan"
-    schema_tools_module_path = f"src.db_backends.{ACTIVE_DB_BACKEND}.schema_tools"
-    query_tools_module_path = f"src.db_backends.{ACTIVE_DB_BACKEND}.query_tools"
-
-    # Import modules
-    lifespan_module = importlib.import_module(lifespan_module_path)
-    schema_tools_module = importlib.import_module(schema_tools_module_path)
-    query_tools_module = importlib.import_module(query_tools_module_path)
-
-    # Get the lifespan function
-    app_lifespan = lifespan_module.app_lifespan
-
-    if ACTIVE_DB_BACKEND == "sqlite":
-        tool_get_schema = getattr(schema_tools_module, "get_database_schema", None)
-        tool_execute_query = getattr(query_tools_module, "execute_query", None)
-        # เพิ่ม tools อื่นๆ ของ SQLite ตามต้องการ
-    elif ACTIVE_DB_BACKEND == "postgres":
-        # ดึง tools ของ postgres ตามเดิม
-        tool_list_available_databases = getattr(
-            schema_tools_module, "list_available_databases", None
+    print(f"INFO: Loading lifespan and tools for '{ACTIVE_DB_BACKEND}' backend...")
+    if ACTIVE_DB_BACKEND == "sources":
+        source_specs = parse_sources(DATA_SOURCES)
+        manifests = [get_manifest(spec.backend) for spec in source_specs]
+        app_lifespan = create_sources_lifespan(
+            source_specs, os.environ.get("DATA_SOURCES_DEFAULT")
         )
-        tool_list_database_objects = getattr(
-            schema_tools_module, "list_database_objects", None
-        )
-        tool_get_object_columns = getattr(
-            schema_tools_module, "get_object_columns", None
-        )
-        tool_search_data = getattr(query_tools_module, "search_data", None)
-        tool_execute_raw_sql = getattr(query_tools_module, "execute_raw_sql", None)
+        # One tool per name, dispatching on its `source` argument
+        backend_tools = source_tools(source_specs)
+        backend_tools["list_sources"] = list_sources
+    else:
+        manifest = get_manifest(ACTIVE_DB_BACKEND)
+        if manifest is None:
+            raise ImportError(f"no backend manifest named '{ACTIVE_DB_BACKEND}'")
+        manifests = [manifest]
+        app_lifespan = manifest.load_lifespan()
+        backend_tools = manifest.load_tools()
+
+    missing_drivers = sorted({d for m in manifests for d in m.missing_drivers()})
+    if missing_drivers:
+        raise ImportError(f"missing database driver(s): {', '.join(missing_drivers)}")
 
     print("INFO: Backend modules imported successfully.")
 
 except ImportError as e:
     print(
-        f"FATAL: Could not import modules for backend '{ACTIVE_DB_BACKEND}'. "
-        f"Ensure the backend directory and files exist and are correctly named. Details: {e}"
+        f"FATAL: Could not load backend '{ACTIVE_DB_BACKEND}'. "
+        f"Ensure the backend is installed and its manifest is correct. Details: {e}"
     )
     exit(1)
+except ValueError as e:
+    print(f"FATAL: Invalid DATA_SOURCES configuration. Details: {e}")
+    exit(1)
 except AttributeError as e:
     print(
         f"FATAL: A required function (lifespan or tool) might be missing in the '{ACTIVE_DB_BACKEND}' backend modules. Details: {e}"
     )
     exit(1)
+METRICS.record_startup("backend", time.perf_counter() - phase_started)
 
 
 # --- Create FastMCP Application ---
-mcp_app = FastMCP(
+class QueryCraftMCP(FastMCP):
+    async def call_tool(self, name, arguments):
+        # Response sizes are measured on FastMCP's own serialization of the result.
+        content = await super().call_tool(name, arguments)
+        METRICS.record_response(name, content_size(content))
+        return content
+
+
+mcp_app = QueryCraftMCP(
     title=f"{ACTIVE_DB_BACKEND.capitalize()} MCP Service",
     description=f"MCP Server for interacting with a {ACTIVE_DB_BACKEND} database.",
     version="1.0.0",
@@ -74,29 +109,58 @@ mcp_app = FastMCP(
 
 
 # --- Register Tools ---
-# Helper function to register if tool exists
-def register_tool_if_exists(tool_func, tool_name):
-    if tool_func:
-        mcp_app.add_tool(tool_func)
-        print(f"INFO: Tool '{tool_name}' registered.")
-    else:
-        print(
-            f"WARN: Tool '{tool_name}' not found in {ACTIVE_DB_BACKEND} backend, not registered."
+# Every call is recorded in METRICS. Backend tools wait for an admission slot
+# (per-client limits, fair queue, busy errors under overload; ADMISSION_*),
+# and identical concurrent calls to read-only tools (the manifests'
+# shared_calls) share one execution, and so one slot, unless
+# SINGLE_FLIGHT_ENABLED is off.
+admission = AdmissionSettings.from_env()
+ADMISSION.configure(admission)
+METRICS.watch_queue("tools", ADMISSION)
+admitted_tools = {name for m in manifests for name in m.tools} if admission.enabled else set()
+light_tools = agreed_tools(manifests, "light_tools")
+shared_tools = agreed_tools(manifests, "shared_calls") if single_flight_enabled() else set()
+
+
+def register_tool(tool_func, tool_name):
+    if tool_name in admitted_tools:
+        tool_func = admit_calls(tool_func, tool_name, light=tool_name in light_tools)
+    if tool_name in shared_tools:
+        tool_func = share_calls(tool_func, tool_name)
+    mcp_app.add_tool(instrument_tool(tool_func, tool_name))
+    print(f"INFO: Tool '{tool_name}' registered.")
+
+
+phase_started = time.perf_counter()
+print("INFO: Registering tools...")
+for tool_name, tool_func in backend_tools.items():
+    register_tool(tool_func, tool_name)
+register_tool(server_stats, "server_stats")
+
+print("INFO: Tool registration complete.")
+METRICS.record_startup("tools", time.perf_counter() - phase_started)
+
+
+# --- Metrics endpoint (Prometheus text format) on the same HTTP server ---
+METRICS_PATH = os.environ.get("MCP_METRICS_PATH", "/metrics")
+if METRICS_PATH:
+
+    @mcp_app.custom_route(METRICS_PATH, methods=["GET"])
+    async def metrics_endpoint(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(
+            METRICS.render_prometheus(), media_type="text/plain; version=0.0.4"
         )
 
+    print(f"INFO: Prometheus metrics served at {METRICS_PATH}.")
 
-print("INFO: Registering tools...")
-if ACTIVE_DB_BACKEND == "sqlite":
-    register_tool_if_exists(tool_get_schema, "get_database_schema")
-    register_tool_if_exists(tool_execute_query, "execute_query")
-elif ACTIVE_DB_BACKEND == "postgres":
-    register_tool_if_exists(tool_list_available_databases, "list_available_databases")
-    register_tool_if_exists(tool_list_database_objects, "list_database_objects")
-    # ... register tools อื่นๆ ของ postgres ...
-    register_tool_if_exists(tool_search_data, "search_data")
-    register_tool_if_exists(tool_execute_raw_sql, "execute_raw_sql")
 
-print("INFO: Tool registration complete.")
+# --- Startup time budget ---
+startup_seconds = time.perf_counter() - STARTUP_STARTED
+METRICS.record_startup("total", startup_seconds)
+STARTUP_BUDGET_MS = float(os.environ.get("MCP_STARTUP_BUDGET_MS", 2000))
+print(f"INFO: Startup took {startup_seconds * 1000:.0f} ms ({METRICS.startup_summary()}).")
+if STARTUP_BUDGET_MS and startup_seconds * 1000 > STARTUP_BUDGET_MS:
+    print(f"WARN: Startup exceeded its {STARTUP_BUDGET_MS:.0f} ms budget (MCP_STARTUP_BUDGET_MS).")
 
 
 # --- Run the Application ---
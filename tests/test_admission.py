@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+
+from src.db_backends.common.admission import AdmissionQueue, AdmissionSettings, ServerBusy, admit_calls
+
+
+def queue_with(**limits) -> AdmissionQueue:
+    return AdmissionQueue(AdmissionSettings(**limits))
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_light_calls_and_other_clients_overtake_a_clients_backlog():
+    async def main():
+        queue = queue_with(max_concurrent=1, max_per_client=0, query_weight=4)
+        order = []
+
+        async def call(key, light, name):
+            await queue.acquire(key, light)
+            order.append(name)
+            queue.release(key, 0.01)
+
+        await queue.acquire("a", False)  # Holds the only slot while the others queue
+        tasks = []
+        for key, light, name in [("a", False, "a1"), ("a", False, "a2"), ("b", False, "b1"), ("c", True, "c1")]:
+            tasks.append(asyncio.create_task(call(key, light, name)))
+            await settle()
+        assert queue.queued == 4
+        queue.release("a", 0.01)
+        await asyncio.gather(*tasks)
+        # Finish tags: c1 = 1, b1 = 4, then a's own backlog at 8 and 12.
+        assert order == ["c1", "b1", "a1", "a2"]
+        assert queue.admitted == 5
+
+    asyncio.run(main())
+
+
+def test_shed_reasons_are_counted():
+    async def main():
+        queue = queue_with(max_concurrent=1, max_queue=2, max_queue_per_client=1, queue_timeout_ms=0)
+        await queue.acquire("a", False)
+        waiting = [asyncio.create_task(queue.acquire(key, False)) for key in ("b", "c")]
+        await settle()
+
+        with pytest.raises(ServerBusy) as busy:
+            await queue.acquire("d", False)
+        assert "2 calls are already queued" in busy.value.reason
+        assert busy.value.retry_after >= 1
+
+        queue.release("a", 0.01)
+        await settle()
+        with pytest.raises(ServerBusy):
+            await queue.acquire("c", False)  # c still has one call queued behind b
+        assert queue.shed == {"queue_full": 1, "client_queue_full": 1}
+        assert "d" not in queue._clients  # A refused call leaves no idle client behind
+
+        for key in ("b", "c"):
+            queue.release(key, 0.01)
+            await settle()
+        await asyncio.gather(*waiting)
+        assert queue.gauges()["running"] == 0
+
+    asyncio.run(main())
+
+
+def test_queue_timeout_sheds_and_forgets_the_waiter():
+    async def main():
+        queue = queue_with(max_concurrent=1, queue_timeout_ms=20)
+        await queue.acquire("a", False)
+        with pytest.raises(ServerBusy) as busy:
+            await queue.acquire("b", False)
+        assert "waited 20 ms" in busy.value.reason
+        assert queue.shed == {"queue_timeout": 1}
+        assert queue.queued == 0 and "b" not in queue._clients
+        queue.release("a", 0.01)
+        assert queue.gauges() == {"running": 0, "queued": 0, "clients": 0, "max_concurrent": 1}
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def main():
+        queue = queue_with(max_concurrent=1)
+        await queue.acquire("a", False)
+        waiter = asyncio.create_task(queue.acquire("b", False))
+        await settle()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert queue.queued == 0 and "b" not in queue._clients
+        queue.release("a", 0.01)
+        assert queue.running == 0 and not queue._clients
+
+    asyncio.run(main())
+
+
+def test_slot_granted_to_a_cancelled_waiter_is_handed_on():
+    async def main():
+        queue = queue_with(max_concurrent=1)
+        await queue.acquire("a", False)
+        gave_up = asyncio.create_task(queue.acquire("b", False))
+        await settle()
+        next_in_line = asyncio.create_task(queue.acquire("c", False))
+        await settle()
+
+        queue.release("a", 0.01)  # Grants b's slot...
+        gave_up.cancel()  # ...just as b stops waiting.
+        with pytest.raises(asyncio.CancelledError):
+            await gave_up
+        await asyncio.wait_for(next_in_line, 1)
+        assert queue.running == 1 and set(queue._clients) == {"c"}
+        queue.release("c", 0.01)
+        assert queue.running == 0 and not queue._clients
+
+    asyncio.run(main())
+
+
+def test_per_client_limit_does_not_block_other_clients():
+    async def main():
+        queue = queue_with(max_concurrent=3, max_per_client=1)
+        await queue.acquire("a", False)
+        blocked = asyncio.create_task(queue.acquire("a", True))
+        await settle()
+        assert queue.queued == 1 and not blocked.done()
+
+        # The queue head belongs to a client at its limit; b starts past it.
+        await asyncio.wait_for(queue.acquire("b", False), 1)
+        assert queue.running == 2 and not blocked.done()
+
+        queue.release("a", 0.01)
+        await asyncio.wait_for(blocked, 1)
+        for key in ("a", "b"):
+            queue.release(key, 0.01)
+        assert queue.running == 0
+
+    asyncio.run(main())
+
+
+def test_virtual_time_resets_once_every_client_is_idle():
+    async def main():
+        queue = queue_with(max_concurrent=1)
+        await queue.acquire("a", False)
+        waiters = [asyncio.create_task(queue.acquire("a", False)) for _ in range(3)]
+        await settle()
+        for _ in waiters:
+            queue.release("a", 0.01)
+            await settle()
+        assert queue._virtual_time > 0
+        queue.release("a", 0.01)
+        await asyncio.gather(*waiters)
+        assert queue._virtual_time == 0.0 and not queue._clients
+
+    asyncio.run(main())
+
+
+def test_admit_calls_returns_busy_error():
+    async def main():
+        queue = queue_with(max_concurrent=1, max_queue=0, queue_timeout_ms=10)
+        release = asyncio.Event()
+
+        async def tool(value):
+            await release.wait()
+            return {"value": value}
+
+        wrapped = admit_calls(tool, "tool", queue=queue)
+        first = asyncio.create_task(wrapped(1))
+        await settle()
+        busy = await wrapped(2)
+        assert busy["error"].startswith("Server busy: waited 10 ms")
+        assert busy["retry_after_s"] >= 1
+        release.set()
+        assert await first == {"value": 1}
+        assert queue.snapshot()["admitted"] == 1 and queue.running == 0
+
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+from src.db_backends.common import cache
+from src.db_backends.common.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def frozen_clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    clock = frozen_clock(monkeypatch)
+    entries = TTLCache(max_entries=4, ttl=10)
+    entries.set("a", 1)
+    entries.set("b", 2, ttl=60)
+    assert entries.get("a") == 1
+    clock.now += 10
+    assert entries.get("a") is None
+    assert entries.get("b") == 2
+    assert entries.stats() == {"entries": 1, "hits": 2, "misses": 1}
+
+
+def test_least_recently_used_entry_is_evicted():
+    entries = TTLCache(max_entries=2, ttl=60)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    entries.get("a")
+    entries.set("c", 3)
+    assert entries.get("b") is None
+    assert entries.get("a") == 1 and entries.get("c") == 3
+
+
+def test_zero_ttl_or_size_disables_caching():
+    for disabled in (TTLCache(ttl=0), TTLCache(max_entries=0)):
+        assert not disabled.enabled
+        disabled.set("a", 1)
+        assert disabled.get("a") is None
+
+
+def test_falsy_values_are_cached_and_clear_empties():
+    entries = TTLCache()
+    entries.set("empty", [])
+    assert entries.get("empty") == []
+    entries.clear()
+    assert entries.get("empty") is None and entries.stats()["entries"] == 0
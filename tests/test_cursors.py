@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from src.db_backends.common.cursors import CursorRegistry, HeldCursor, next_page, open_page
+
+
+class ListCursor(HeldCursor):
+    def __init__(self, rows, page_size, max_bytes=0, fail_after=None):
+        super().__init__(page_size, max_bytes)
+        self.rows = list(rows)
+        self.fetches = []
+        self.closed = False
+        self.fail_after = fail_after
+
+    async def _fetch(self, n):
+        if self.fail_after is not None and len(self.fetches) >= self.fail_after:
+            raise RuntimeError("connection lost")
+        self.fetches.append(n)
+        batch, self.rows = self.rows[:n], self.rows[n:]
+        return batch
+
+    async def _close(self):
+        self.closed = True
+
+
+def test_pages_report_more_rows_from_the_lookahead():
+    async def main():
+        cursor = ListCursor([(i,) for i in range(5)], page_size=2)
+        assert await cursor.fetch_page() == ([(0,), (1,)], True)
+        assert await cursor.fetch_page() == ([(2,), (3,)], True)
+        assert await cursor.fetch_page() == ([(4,)], False)
+        # One row of lookahead per page rather than an extra round trip at the end.
+        assert cursor.fetches == [3, 2, 2]
+
+    asyncio.run(main())
+
+
+def test_exact_multiple_of_the_page_size_ends_without_an_empty_page():
+    async def main():
+        cursor = ListCursor([(i,) for i in range(4)], page_size=2)
+        assert await cursor.fetch_page() == ([(0,), (1,)], True)
+        assert await cursor.fetch_page() == ([(2,), (3,)], False)
+
+    asyncio.run(main())
+
+
+def test_byte_cap_defers_rows_to_the_next_page():
+    async def main():
+        rows = [("x" * 20,) for _ in range(4)]
+        cursor = ListCursor(rows, page_size=3, max_bytes=60)
+        page, more = await cursor.fetch_page()
+        assert len(page) == 2 and more and cursor.truncated
+        page, more = await cursor.fetch_page()
+        assert len(page) == 2 and not more and not cursor.truncated
+
+        # A single row over the cap is still served.
+        cursor = ListCursor([("x" * 100,)], page_size=3, max_bytes=10)
+        assert await cursor.fetch_page() == ([("x" * 100,)], False)
+
+    asyncio.run(main())
+
+
+def test_open_page_registers_only_cursors_with_more_rows():
+    async def main():
+        registry = CursorRegistry(max_open=1)
+        single = ListCursor([(1,)], page_size=2)
+        assert await open_page(registry, single) == ([(1,)], None)
+        assert single.closed and registry.has_capacity()
+
+        paged = ListCursor([(i,) for i in range(3)], page_size=2)
+        rows, token = await open_page(registry, paged)
+        assert rows == [(0,), (1,)] and registry.get(token) is paged
+        assert not registry.has_capacity()
+
+        cursor, rows, next_token = await next_page(registry, token)
+        assert cursor is paged and rows == [(2,)] and next_token is None
+        assert paged.closed and registry.get(token) is None
+        assert await next_page(registry, token) is None
+
+    asyncio.run(main())
+
+
+def test_failed_fetch_closes_the_cursor():
+    async def main():
+        registry = CursorRegistry()
+        failing = ListCursor([(1,)], page_size=1, fail_after=0)
+        with pytest.raises(RuntimeError):
+            await open_page(registry, failing)
+        assert failing.closed
+
+        cursor = ListCursor([(i,) for i in range(5)], page_size=1, fail_after=1)
+        _, token = await open_page(registry, cursor)
+        with pytest.raises(RuntimeError):
+            await next_page(registry, token)
+        assert cursor.closed and registry.get(token) is None
+
+    asyncio.run(main())
+
+
+def test_idle_cursors_expire_unless_in_use():
+    async def main():
+        registry = CursorRegistry(idle_timeout=10)
+        idle = ListCursor([], page_size=1)
+        busy = ListCursor([], page_size=1)
+        fresh = ListCursor([], page_size=1)
+        idle.last_used -= 60
+        busy.last_used -= 60
+        tokens = [registry.register(c) for c in (idle, busy, fresh)]
+        async with busy.lock:
+            await registry.expire_idle()
+        assert [registry.get(t) for t in tokens] == [None, busy, fresh]
+        assert idle.closed and not busy.closed
+
+        await registry.close()
+        assert busy.closed and fresh.closed and registry.has_capacity()
+
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from src.db_backends.common.metrics import MetricsRegistry
+from src.db_backends.common.singleflight import SingleFlight, share_calls
+
+
+def test_overlapping_calls_share_one_execution():
+    async def main():
+        flights = SingleFlight()
+        release = asyncio.Event()
+        executions = []
+
+        async def call():
+            executions.append(1)
+            await release.wait()
+            return {"rows": 3}
+
+        callers = [asyncio.create_task(flights.run("key", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert flights.in_flight() == 1
+        release.set()
+        results = await asyncio.gather(*callers)
+        assert results == [({"rows": 3}, False), ({"rows": 3}, True), ({"rows": 3}, True)]
+        assert len(executions) == 1 and flights.in_flight() == 0
+
+        # Nothing is kept once it finishes: the next call runs again.
+        assert await flights.run("key", call) == ({"rows": 3}, False)
+        assert len(executions) == 2
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_execution():
+    async def main():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(flights.run("key", call))
+        second = asyncio.create_task(flights.run("key", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        release.set()
+        assert await second == ("done", True)
+
+    asyncio.run(main())
+
+
+def test_errors_reach_every_caller():
+    async def main():
+        flights = SingleFlight()
+
+        async def call():
+            await asyncio.sleep(0)
+            raise RuntimeError("boom")
+
+        callers = [asyncio.create_task(flights.run("key", call)) for _ in range(2)]
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+        assert flights.in_flight() == 0
+
+    asyncio.run(main())
+
+
+def test_share_calls_keys_on_normalized_sql_and_skips_paged_calls():
+    async def main():
+        flights = SingleFlight()
+        registry = MetricsRegistry()
+        release = asyncio.Event()
+        calls = []
+
+        async def execute_query(query: str, params=None, page_size=None):
+            calls.append(query)
+            await release.wait()
+            return {"query": query}
+
+        tool = share_calls(execute_query, "execute_query", flights=flights, registry=registry)
+        shared = [
+            asyncio.create_task(tool("SELECT 1")),
+            asyncio.create_task(tool("SELECT  1;")),
+            asyncio.create_task(tool(query="SELECT 1", params=None)),
+        ]
+        paged = [asyncio.create_task(tool("SELECT 1", page_size=10)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*shared, *paged)
+        assert len(calls) == 3  # One shared execution and one per paged call
+        assert registry.tool("execute_query").shared == 2
+
+    asyncio.run(main())